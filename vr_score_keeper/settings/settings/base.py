@@ -34,12 +34,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "vr_tournaments.instrumentation.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "vr_tournaments.permissions.GroupMembershipMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -68,13 +70,109 @@ WSGI_APPLICATION = "settings.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite production profile, for venues running several workers on one
+# SQLite file. With SQLITE_PRODUCTION=1, every new connection applies
+# SQLITE_PRAGMAS: write-ahead logging lets readers run alongside the writer,
+# and the busy timeout makes writers wait for the lock. Transactions start with
+# BEGIN IMMEDIATE, taking the write lock up front, since a transaction that
+# upgrades from reading to writing fails with "database is locked" instead of
+# waiting.
+SQLITE_PRODUCTION = os.environ.get("SQLITE_PRODUCTION") == "1"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 134217728,
+}
+SQLITE_OPTIONS = {"transaction_mode": "IMMEDIATE"} if SQLITE_PRODUCTION else {}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": SQLITE_OPTIONS,
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Tournament cards and standings are cached under a per-tournament version
+# stamp, so entries never expire on their own; MAX_ENTRIES bounds the cache
+# size and evicts superseded versions. Set CACHE_BACKEND=file to share the
+# cache between worker processes.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION",
+            str(BASE_DIR / "cache") if CACHE_BACKEND == "file" else "vr_score_keeper",
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 2000)),
+        },
     }
 }
 
+# Live standings streams are woken immediately by writes in the same process;
+# writes in other processes are picked up by polling every LIVE_POLL_INTERVAL
+# seconds. An idle stream sends a keepalive every LIVE_KEEPALIVE_INTERVAL.
+LIVE_POLL_INTERVAL = float(os.environ.get("LIVE_POLL_INTERVAL", 2))
+LIVE_KEEPALIVE_INTERVAL = float(os.environ.get("LIVE_KEEPALIVE_INTERVAL", 15))
+
+# Every request reports its query count, SQL time and wall time in a
+# Server-Timing header. QUERY_BUDGETS caps the queries of views by URL name:
+# a view over budget logs a warning, or fails when QUERY_BUDGET_STRICT is set,
+# as it is when running the tests. Pages checking group membership leave room
+# for storing it in the session on the first request. The write views are
+# budgeted at the count of their heaviest path plus one, as measured by
+# WriteBudgetTests in vr_tournaments/tests/test_query_scaling.py.
+QUERY_BUDGETS = {
+    "index": 10,
+    "previous_tournaments": 5,
+    "players": 4,
+    "player_search": 6,
+    "player_detail": 3,
+    "leaderboard": 3,
+    "head_to_head": 5,
+    "tournaments": 8,
+    "tournament_detail": 10,
+    "tournament_live": 3,
+    "tournament_registration": 27,
+    "create_tournament": 29,
+    "create_score": 31,
+    "delete_match": 26,
+    "export_results": 3,
+    "api_tournament_list": 4,
+    "api_tournament_standings": 5,
+    "api_tournament_matches": 6,
+    "api_head_to_head": 5,
+    "database_pool_metrics": 0,
+}
+QUERY_BUDGET_STRICT = os.environ.get("QUERY_BUDGET_STRICT") == "1"
+TEST_RUNNER = "vr_tournaments.test_runner.BudgetTestRunner"
+
+# Group memberships are checked with one query per request. With
+# GROUP_NAMES_IN_SESSION=1, they are also kept in the session, and only
+# reloaded after memberships change. Invalidation goes through the cache, so
+# it requires a CACHE_BACKEND shared between worker processes; a system check
+# refuses it with the per-process locmem cache.
+GROUP_NAMES_IN_SESSION = os.environ.get("GROUP_NAMES_IN_SESSION") == "1"
+
+# The connection pool metrics at /metrics/database-pool/ are served to
+# monitoring with this bearer token, and disabled while it is empty.
+POOL_METRICS_TOKEN = os.environ.get("POOL_METRICS_TOKEN", "")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -129,14 +227,28 @@ LOGGING = {
             "format": "{levelname} {asctime} {module} {message}",
             "style": "{",
         },
+        # One JSON object per request, with its query count and timings.
+        "request_json": {
+            "()": "vr_tournaments.instrumentation.RequestLogFormatter",
+        },
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "request_console": {
+            "class": "logging.StreamHandler",
+            "formatter": "request_json",
+        },
     },
     "loggers": {
+        # Set REQUEST_LOG_LEVEL=WARNING to only log the views over budget.
+        "vr_tournaments.requests": {
+            "handlers": ["request_console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
         "vr_tournaments": {
             "handlers": ["console"],
             "level": "INFO",
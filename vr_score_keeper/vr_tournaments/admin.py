@@ -1,6 +1,14 @@
 from django.contrib import admin
 from django.db.models import Count
-from .models import Tournament, Player, Match, Score
+from .models import (
+    Tournament,
+    Player,
+    Match,
+    Score,
+    PlayerStats,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+)
 
 
 @admin.register(Tournament)
@@ -31,6 +39,51 @@ class TournamentAdmin(admin.ModelAdmin):
     get_player_count.short_description = "Player Count"
     get_player_count.admin_order_field = "player_count"
 
+    def save_model(self, request, obj, form, change):
+        """
+        Refreshes the statistics of the old and new winner, since the admin can
+        change the winner, and declares the leader the winner if the admin
+        lowered ``points_to_win`` to their total.
+        """
+        winners = {obj.winner}
+        if change:
+            winners.update(
+                Tournament.objects.filter(pk=obj.pk).values_list("winner", flat=True)
+            )
+        super().save_model(request, obj, form, change)
+        obj.resolve_winner()
+        PlayerStats.objects.refresh(
+            Player.objects.filter(name__in=winners).values_list("pk", flat=True)
+        )
+
+    def delete_model(self, request, obj):
+        """
+        Refreshes the statistics of the deleted tournament's players, and
+        replays the ratings from its first match.
+        """
+        player_ids = list(obj.players.values_list("pk", flat=True))
+        position = RatingSnapshot.objects.earliest(obj.matches.all())
+        super().delete_model(request, obj)
+        PlayerStats.objects.refresh(player_ids)
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+
+    def delete_queryset(self, request, queryset):
+        """
+        Refreshes the statistics of the players of every deleted tournament, and
+        replays the ratings from the first deleted match.
+        """
+        player_ids = set(
+            Player.objects.filter(tournaments__in=queryset).values_list("pk", flat=True)
+        )
+        position = RatingSnapshot.objects.earliest(
+            Match.objects.filter(tournament__in=queryset)
+        )
+        super().delete_queryset(request, queryset)
+        PlayerStats.objects.refresh(player_ids)
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
@@ -58,6 +111,42 @@ class PlayerAdmin(admin.ModelAdmin):
 
     get_tournaments.short_description = "Tournaments"
 
+    def save_model(self, request, obj, form, change):
+        """
+        Invalidates the cards of the player's tournaments, which show their name,
+        and refreshes their statistics, since winners are recorded by name.
+        """
+        super().save_model(request, obj, form, change)
+        if change:
+            Tournament.objects.filter(players=obj).bump_version()
+        PlayerStats.objects.refresh([obj.pk])
+
+    def delete_model(self, request, obj):
+        """
+        Invalidates the cards of the player's tournaments before deleting them,
+        and replays the ratings from their first match.
+        """
+        Tournament.objects.filter(players=obj).bump_version()
+        position = RatingSnapshot.objects.earliest(
+            Match.objects.filter(scores__player=obj)
+        )
+        super().delete_model(request, obj)
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+
+    def delete_queryset(self, request, queryset):
+        """
+        Invalidates the cards of every deleted player's tournaments, and replays
+        the ratings from the first match of any of them.
+        """
+        Tournament.objects.filter(players__in=queryset).bump_version()
+        position = RatingSnapshot.objects.earliest(
+            Match.objects.filter(scores__player__in=queryset)
+        )
+        super().delete_queryset(request, queryset)
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+
 
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
@@ -90,6 +179,52 @@ class MatchAdmin(admin.ModelAdmin):
 
     get_players.short_description = "Players"
 
+    def save_model(self, request, obj, form, change):
+        """
+        Rebuilds the player totals of the old and new tournament, since the
+        admin can move a match or change its date, and replays the ratings from
+        the earlier of its old and new position.
+        """
+        tournament_ids = {obj.tournament_id}
+        old_position = None
+        if change:
+            tournament_ids.update(
+                Match.objects.filter(pk=obj.pk).values_list("tournament_id", flat=True)
+            )
+            old_position = RatingSnapshot.objects.earliest(
+                Match.objects.filter(pk=obj.pk)
+            )
+        super().save_model(request, obj, form, change)
+        PlayerTournamentTotal.objects.rebuild(tournament_ids=tournament_ids)
+        RatingSnapshot.objects.replay(
+            since=min(filter(None, [old_position, (obj.date, obj.pk)]))
+        )
+        Tournament.objects.filter(pk__in=tournament_ids).bump_version()
+
+    def delete_model(self, request, obj):
+        """
+        Rebuilds the player totals of the match's tournament, and replays the
+        ratings from the match on.
+        """
+        position = (obj.date, obj.pk)
+        super().delete_model(request, obj)
+        PlayerTournamentTotal.objects.rebuild(tournament_ids=[obj.tournament_id])
+        RatingSnapshot.objects.replay(since=position)
+        Tournament.objects.filter(pk=obj.tournament_id).bump_version()
+
+    def delete_queryset(self, request, queryset):
+        """
+        Rebuilds the player totals of every tournament a deleted match was part of,
+        and replays the ratings from the first deleted match.
+        """
+        tournament_ids = set(queryset.values_list("tournament_id", flat=True))
+        position = RatingSnapshot.objects.earliest(queryset)
+        super().delete_queryset(request, queryset)
+        PlayerTournamentTotal.objects.rebuild(tournament_ids=tournament_ids)
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+        Tournament.objects.filter(pk__in=tournament_ids).bump_version()
+
 
 @admin.register(Score)
 class ScoreAdmin(admin.ModelAdmin):
@@ -108,3 +243,52 @@ class ScoreAdmin(admin.ModelAdmin):
         queryset = super().get_queryset(request)
         queryset = queryset.select_related("player", "match__tournament")
         return queryset
+
+    def save_model(self, request, obj, form, change):
+        """
+        Rebuilds the totals affected by the score, before and after the edit, and
+        replays the ratings from the earliest affected match.
+        """
+        pairs = {(obj.match.tournament_id, obj.player_id)}
+        match_ids = {obj.match_id}
+        if change:
+            for tournament_id, player_id, match_id in Score.objects.filter(
+                pk=obj.pk
+            ).values_list("match__tournament_id", "player_id", "match_id"):
+                pairs.add((tournament_id, player_id))
+                match_ids.add(match_id)
+        super().save_model(request, obj, form, change)
+        for tournament_id, player_id in pairs:
+            PlayerTournamentTotal.objects.rebuild([tournament_id], [player_id])
+        RatingSnapshot.objects.replay(
+            since=RatingSnapshot.objects.earliest(Match.objects.filter(pk__in=match_ids))
+        )
+        Tournament.objects.filter(pk__in={pair[0] for pair in pairs}).bump_version()
+
+    def delete_model(self, request, obj):
+        """
+        Rebuilds the total the deleted score was counted in, and replays the
+        ratings from its match on.
+        """
+        super().delete_model(request, obj)
+        PlayerTournamentTotal.objects.rebuild(
+            [obj.match.tournament_id], [obj.player_id]
+        )
+        RatingSnapshot.objects.replay(since=(obj.match.date, obj.match_id))
+        Tournament.objects.filter(pk=obj.match.tournament_id).bump_version()
+
+    def delete_queryset(self, request, queryset):
+        """
+        Rebuilds the totals every deleted score was counted in, and replays the
+        ratings from the first affected match.
+        """
+        pairs = set(queryset.values_list("match__tournament_id", "player_id"))
+        position = RatingSnapshot.objects.earliest(
+            Match.objects.filter(scores__in=queryset)
+        )
+        super().delete_queryset(request, queryset)
+        for tournament_id, player_id in pairs:
+            PlayerTournamentTotal.objects.rebuild([tournament_id], [player_id])
+        if position:
+            RatingSnapshot.objects.replay(since=position)
+        Tournament.objects.filter(pk__in={pair[0] for pair in pairs}).bump_version()
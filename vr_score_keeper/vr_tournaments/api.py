@@ -0,0 +1,223 @@
+"""
+Read-only JSON API for scoreboards and companion apps.
+
+Every response carries an ``ETag`` and ``Last-Modified`` derived from the
+tournament version stamps, so a poll for unchanged data is answered with a
+304 after a single cheap query, without computing any standings. List items
+can be trimmed with ``?fields=a,b``.
+"""
+
+import math
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max, Sum
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+from .head_to_head import data_version, get_head_to_head
+from .models import Match, Player, PlayerTournamentTotal, Score, Tournament
+
+TOURNAMENT_FIELDS = ("id", "name", "date", "winner", "points_to_win", "version", "modified")
+STANDING_FIELDS = ("player_id", "player", "total", "matches_played", "last_match_date")
+MATCH_FIELDS = ("id", "date", "scores")
+
+
+def select_fields(request, allowed):
+    """
+    Returns the fields requested with ``?fields=``, or all allowed fields.
+
+    :raises ValueError: If an unknown field is requested.
+    """
+    requested = request.GET.get("fields")
+    if not requested:
+        return allowed
+    fields = tuple(field.strip() for field in requested.split(",") if field.strip())
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return fields
+
+
+def pick(row, fields):
+    return {field: row[field] for field in fields}
+
+
+def tournament_data(tournament):
+    return {field: getattr(tournament, field) for field in TOURNAMENT_FIELDS}
+
+
+# Change stamps. They are memoized on the request, because the condition
+# decorator asks for the ETag and the Last-Modified time separately.
+def tournament_list_stamp(request):
+    if not hasattr(request, "_api_stamp"):
+        request._api_stamp = Tournament.objects.aggregate(
+            count=Count("pk"),
+            last_pk=Max("pk"),
+            versions=Sum("version"),
+            modified=Max("modified"),
+        )
+    return request._api_stamp
+
+
+def head_to_head_stamp(request):
+    if not hasattr(request, "_api_stamp"):
+        request._api_stamp = data_version()
+    return request._api_stamp
+
+
+def tournament_stamp(request, pk):
+    if not hasattr(request, "_api_stamp"):
+        request._api_stamp = (
+            Tournament.objects.filter(pk=pk).values("pk", "version", "modified").first()
+        )
+    return request._api_stamp
+
+
+def tournament_list_etag(request):
+    # The count and version total alone repeat when a tournament is deleted and
+    # another created with the same version, but the newest pk does not.
+    stamp = tournament_list_stamp(request)
+    modified = stamp["modified"].timestamp() if stamp["modified"] else 0
+    return (
+        f"tournaments-{stamp['count']}-{stamp['last_pk'] or 0}-{stamp['versions'] or 0}-"
+        f"{modified}-{request.GET.urlencode()}"
+    )
+
+
+def tournament_list_last_modified(request):
+    return tournament_list_stamp(request)["modified"]
+
+
+def head_to_head_etag(request):
+    return f"head-to-head-{head_to_head_stamp(request)}"
+
+
+def tournament_etag(request, pk):
+    stamp = tournament_stamp(request, pk)
+    if stamp is None:
+        return None
+    return f"tournament-{stamp['pk']}-{stamp['version']}-{request.GET.urlencode()}"
+
+
+def tournament_last_modified(request, pk):
+    stamp = tournament_stamp(request, pk)
+    return stamp["modified"] if stamp else None
+
+
+@login_required
+@require_GET
+@condition(etag_func=tournament_list_etag, last_modified_func=tournament_list_last_modified)
+def tournament_list(request):
+    """
+    Lists all tournaments, newest first.
+
+    ``?status=active`` or ``?status=finished`` limits the list to tournaments
+    without or with a winner.
+    """
+    try:
+        fields = select_fields(request, TOURNAMENT_FIELDS)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    tournaments = Tournament.objects.order_by("-date", "-pk")
+    status = request.GET.get("status")
+    if status == "active":
+        tournaments = tournaments.filter(winner="")
+    elif status == "finished":
+        tournaments = tournaments.exclude(winner="")
+
+    return JsonResponse(
+        {"tournaments": [pick(row, fields) for row in tournaments.values(*TOURNAMENT_FIELDS)]}
+    )
+
+
+@login_required
+@require_GET
+@condition(etag_func=tournament_etag, last_modified_func=tournament_last_modified)
+def tournament_standings(request, pk):
+    """
+    Returns the standings of a tournament, highest total first, from a single
+    query on the player totals.
+    """
+    try:
+        fields = select_fields(request, STANDING_FIELDS)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    tournament = get_object_or_404(Tournament, pk=pk)
+
+    standings = (
+        PlayerTournamentTotal.objects.filter(tournament=tournament)
+        .order_by("-total", "pk")
+        .values("player_id", "total", "matches_played", "last_match_date", "player__name")
+    )
+    return JsonResponse(
+        {
+            "tournament": tournament_data(tournament),
+            "standings": [
+                pick({**row, "player": row["player__name"]}, fields) for row in standings
+            ],
+        }
+    )
+
+
+@login_required
+@require_GET
+@condition(etag_func=tournament_etag, last_modified_func=tournament_last_modified)
+def tournament_matches(request, pk):
+    """
+    Returns the match history of a tournament, newest match first, with the
+    score of every player in each match.
+    """
+    try:
+        fields = select_fields(request, MATCH_FIELDS)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    tournament = get_object_or_404(Tournament, pk=pk)
+
+    matches = {
+        match["id"]: {**match, "scores": []}
+        for match in Match.objects.filter(tournament=tournament)
+        .order_by("-date", "-pk")
+        .values("id", "date")
+    }
+    if "scores" in fields:
+        scores = Score.objects.filter(match__tournament=tournament).order_by("pk")
+        for match_id, player_id, player, score in scores.values_list(
+            "match_id", "player_id", "player__name", "score"
+        ):
+            matches[match_id]["scores"].append(
+                {"player_id": player_id, "player": player, "score": score}
+            )
+    return JsonResponse(
+        {
+            "tournament_id": tournament.pk,
+            "matches": [pick(match, fields) for match in matches.values()],
+        }
+    )
+
+
+@login_required
+@require_GET
+@condition(etag_func=head_to_head_etag)
+def head_to_head(request):
+    """
+    Returns the head-to-head records of every pair of players, as matrices
+    indexed like ``players``: row ``i``, column ``j`` holds the record of
+    player ``i`` against player ``j``. Averages of players who never met are
+    null.
+    """
+    records = get_head_to_head(head_to_head_stamp(request))
+    player_ids = records.player_ids.tolist()
+    names = dict(Player.objects.filter(pk__in=player_ids).values_list("pk", "name"))
+
+    def nullable(matrix):
+        return [[None if math.isnan(value) else value for value in row] for row in matrix.tolist()]
+
+    return JsonResponse(
+        {
+            "players": [{"id": pk, "name": names.get(pk)} for pk in player_ids],
+            "shared": records.shared.tolist(),
+            "wins": records.wins.tolist(),
+            "win_rate": nullable(records.win_rate),
+            "average_margin": nullable(records.average_margin),
+        }
+    )
@@ -2,7 +2,9 @@ from django import forms
 from django.contrib.auth.forms import PasswordChangeForm  # Keep existing forms
 from django.contrib.auth.models import User  # Import User model
 from django.core.exceptions import ValidationError
-from .models import Tournament, Player, Match, Score
+from django.db import transaction
+from .exports import EXPORT_FORMATS
+from .models import Counter, Tournament, Player, Match, Score, PlayerTournamentTotal, RatingSnapshot
 
 
 class UserProfileForm(forms.ModelForm):
@@ -25,7 +27,10 @@ class TournamentForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["name"].initial = f"Tournament {Tournament.objects.count() + 1}"
+        # A blank name is numbered when the tournament is saved, so two
+        # forms open at once cannot submit the same name.
+        next_number = Counter.objects.peek(Counter.TOURNAMENT) + 1
+        self.fields["name"].widget.attrs["placeholder"] = f"Tournament {next_number}"
         self.fields["points_to_win"].initial = 0
 
 
@@ -50,6 +55,19 @@ class MatchForm(forms.ModelForm):
         )
 
 
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[(name, name) for name in EXPORT_FORMATS], required=False
+    )
+    tournament = forms.IntegerField(required=False)
+    player = forms.IntegerField(required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def clean_format(self):
+        return self.cleaned_data["format"] or "csv"
+
+
 class MultiScoreForm(forms.Form):
     def __init__(self, registered_players, match, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -62,13 +80,39 @@ class MultiScoreForm(forms.Form):
                 min_value=0,
             )
 
+    @transaction.atomic
     def save(self):
+        """
+        Saves the scores of all registered players with a single upsert, and
+        updates the player totals and ratings, and the winner and version of
+        the tournament.
+
+        The number of queries does not depend on the number of players.
+        """
         scores_data = self.cleaned_data
-        scores = []
-        for player in self.registered_players:
-            points = scores_data.get(f"score_{player.pk}", 0)
-            score, created = Score.objects.update_or_create(
-                match=self.match, player_id=player.pk, defaults={"score": points}
+        previous = dict(
+            Score.objects.filter(match=self.match).values_list("player_id", "score")
+        )
+        scores = [
+            Score(
+                match=self.match,
+                player=player,
+                score=scores_data.get(f"score_{player.pk}", 0),
             )
-            scores.append(score)
+            for player in self.registered_players
+        ]
+        Score.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=["match", "player"],
+            update_fields=["score"],
+        )
+        PlayerTournamentTotal.objects.apply_scores(
+            self.match,
+            {score.player_id: score.score for score in scores},
+            previous,
+        )
+        RatingSnapshot.objects.rate(self.match)
+        self.match.tournament.resolve_winner()
+        Tournament.objects.filter(pk=self.match.tournament_id).bump_version()
         return scores
@@ -0,0 +1,128 @@
+"""
+Head-to-head records between every pair of players.
+
+For each pair, counts the matches both played, how often each outscored the
+other, and the total score margin between them. Scores are loaded as flat
+arrays with one query and compared with NumPy broadcasting: matches with the
+same number of players are stacked into a (matches, players) array, so every
+pairwise difference of a chunk of matches comes from one subtraction, and the
+pairs are summed into the matrices with ``bincount``.
+
+The result is cached under a stamp of the tournament versions, which every
+write to scores bumps, so it is only recomputed after results change.
+"""
+
+from itertools import chain
+from typing import NamedTuple
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from .models import Score, Tournament
+
+# Pairwise comparisons computed per broadcast, to bound memory.
+CHUNK_SIZE = 1_000_000
+
+
+class HeadToHead(NamedTuple):
+    """
+    Pairwise records, indexed like ``player_ids``: row ``i``, column ``j``
+    holds the record of player ``i`` against player ``j``.
+    """
+
+    player_ids: np.ndarray
+    # Matches both players played.
+    shared: np.ndarray
+    # Matches the row player outscored the column player in.
+    wins: np.ndarray
+    # Sum of the row player's score minus the column player's.
+    margin: np.ndarray
+
+    @property
+    def win_rate(self):
+        """How often the row player outscored the column player, NaN if they never met."""
+        return self._per_match(self.wins)
+
+    @property
+    def average_margin(self):
+        """The average score margin of the row player, NaN if they never met."""
+        return self._per_match(self.margin)
+
+    def _per_match(self, values):
+        result = np.full(self.shared.shape, np.nan)
+        np.divide(values, self.shared, out=result, where=self.shared > 0)
+        return result
+
+
+def compute(match_ids, player_ids, scores):
+    """
+    Computes the head-to-head records of a set of scores.
+
+    :param match_ids: The match of each score, sorted so that the scores of a
+                      match are contiguous.
+    :param player_ids: The player of each score.
+    :param scores: The score values.
+    :return: A ``HeadToHead`` of every player with a score.
+    """
+    players, index = np.unique(player_ids, return_inverse=True)
+    count = len(players)
+    shared = np.zeros(count * count, dtype=np.int64)
+    wins = np.zeros(count * count, dtype=np.int64)
+    margin = np.zeros(count * count, dtype=np.int64)
+
+    starts = np.flatnonzero(np.r_[True, match_ids[1:] != match_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(match_ids)])
+    for size in np.unique(sizes):
+        if size < 2:
+            continue
+        # Every ordered pair of distinct seats in a match of this size.
+        first, second = np.nonzero(~np.eye(size, dtype=bool))
+        match_starts = starts[sizes == size]
+        step = max(1, CHUNK_SIZE // (size * size))
+        for chunk in range(0, len(match_starts), step):
+            rows = match_starts[chunk : chunk + step, None] + np.arange(size)
+            seat_players = index[rows]
+            seat_scores = scores[rows]
+            pairs = (seat_players[:, first] * count + seat_players[:, second]).ravel()
+            diff = (seat_scores[:, first] - seat_scores[:, second]).ravel()
+            shared += np.bincount(pairs, minlength=count * count)
+            wins += np.bincount(pairs, weights=diff > 0, minlength=count * count).astype(np.int64)
+            margin += np.bincount(pairs, weights=diff, minlength=count * count).astype(np.int64)
+
+    shape = (count, count)
+    return HeadToHead(players, shared.reshape(shape), wins.reshape(shape), margin.reshape(shape))
+
+
+def load():
+    """Computes the head-to-head records of every recorded score, with a single query."""
+    rows = Score.objects.order_by("match_id").values_list("match_id", "player_id", "score")
+    flat = np.fromiter(chain.from_iterable(rows.iterator(chunk_size=5000)), dtype=np.int64)
+    match_ids, player_ids, scores = flat.reshape(-1, 3).T
+    return compute(match_ids, player_ids, scores)
+
+
+def data_version():
+    """
+    Returns a stamp that changes whenever any results change.
+
+    Score writes bump their tournament's version, and deleting a tournament
+    changes the count.
+    """
+    stamp = Tournament.objects.aggregate(
+        count=Count("pk"), versions=Sum("version"), modified=Max("modified")
+    )
+    modified = stamp["modified"].timestamp() if stamp["modified"] else 0
+    return f"{stamp['count']}-{stamp['versions'] or 0}-{modified}"
+
+
+def get_head_to_head(version=None):
+    """
+    Returns the head-to-head records of every player, cached per data version.
+
+    :param version: The ``data_version()``, if the caller already has it.
+    """
+    key = f"head_to_head:{version or data_version()}"
+    result = cache.get(key)
+    if result is None:
+        result = load()
+        cache.set(key, result, timeout=None)
+    return result
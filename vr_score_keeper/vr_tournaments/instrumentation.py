@@ -0,0 +1,165 @@
+"""
+Per-request SQL and latency instrumentation.
+
+``QueryInstrumentationMiddleware`` records every query a request runs through
+``connection.execute_wrapper``: the query count, the total SQL time, and
+fingerprints of the statements, so a query repeated with different parameters,
+the signature of an N+1 pattern, is reported as a duplicate. The totals are
+sent in a ``Server-Timing`` header, and logged at info level by the
+``vr_tournaments.requests`` logger, whose ``RequestLogFormatter`` writes them as
+one JSON object per request.
+
+``QUERY_BUDGETS`` maps URL names to the most queries their views may run. A
+view over budget logs a warning, or raises ``QueryBudgetExceeded`` when
+``QUERY_BUDGET_STRICT`` is set, as it is under the test runner.
+
+Queries of a streaming response that run while it is streamed are not counted.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("vr_tournaments.requests")
+
+# Runs of placeholders, as in IN lists, and of the rows of bulk inserts.
+REPEATED_PLACEHOLDERS = re.compile(r"%s(?:\s*,\s*%s)+")
+REPEATED_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a view runs more queries than its budget."""
+
+
+def fingerprint(sql):
+    """Returns the SQL with repeated placeholders collapsed, so that IN lists
+    and bulk inserts of any length share a fingerprint."""
+    return REPEATED_GROUPS.sub(r"\1, ...", REPEATED_PLACEHOLDERS.sub("%s, ...", sql))
+
+
+class RequestLogFormatter(logging.Formatter):
+    """Formats log records as JSON lines, with the ``request_stats`` of request logs."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        stats = getattr(record, "request_stats", None)
+        if stats is None:
+            entry["message"] = record.getMessage()
+        else:
+            entry.update(stats)
+        return json.dumps(entry, default=str)
+
+
+class QueryRecorder:
+    """Records the queries run on this thread's database connections."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def install(self):
+        self.stack = ExitStack()
+        for alias in connections:
+            self.stack.enter_context(connections[alias].execute_wrapper(self))
+
+    def uninstall(self):
+        self.stack.close()
+
+    @property
+    def duplicates(self):
+        """The statements run more than once, with how many times they ran."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        recorder.install()
+        try:
+            response = self.get_response(request)
+        finally:
+            recorder.uninstall()
+        return self.report(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # Queries of async views run in the request's thread-sensitive worker
+        # thread, so the wrappers are installed on that thread's connections.
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        await sync_to_async(recorder.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.uninstall)()
+        return self.report(request, response, recorder, time.perf_counter() - started)
+
+    def report(self, request, response, recorder, elapsed):
+        """Adds the Server-Timing header, logs the request and checks its budget."""
+        match = request.resolver_match
+        view = match.view_name if match else None
+        duplicates = recorder.duplicates
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries, '
+            f'{sum(duplicates.values()) - len(duplicates)} duplicates", '
+            f"total;dur={elapsed * 1000:.2f}"
+        )
+
+        stats = {
+            "view": view,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "sql_ms": round(recorder.duration * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "duplicates": duplicates,
+        }
+        request_logger.info(
+            f"view={view} status={response.status_code} queries={recorder.count} "
+            f"sql_ms={stats['sql_ms']} total_ms={stats['total_ms']} "
+            f"duplicates={len(duplicates)}",
+            extra={"request_stats": stats},
+        )
+
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"View {view} ran {recorder.count} queries, over its budget of {budget}. "
+                f"Repeated statements: {duplicates or 'none'}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message, extra={"request_stats": stats})
+        return response
@@ -0,0 +1,217 @@
+"""
+Live standings for scoreboard screens, pushed over Server-Sent Events.
+
+Every connected stream of a tournament subscribes to one ``TournamentChannel``
+per process. The channel reads the tournament's version stamp, and only when
+it changed, the standings, once for all of its subscribers, and sends each of
+them the players whose totals changed.
+
+Writes in this process wake the channels as soon as they commit, through
+``broadcaster.notify()``, which ``Tournament`` calls whenever it bumps a
+version. Writes in other processes are picked up by polling the version stamp
+every ``LIVE_POLL_INTERVAL`` seconds, one indexed query per watched tournament
+however many screens are connected.
+"""
+
+import asyncio
+import json
+import logging
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Events a subscriber can fall behind by before it is resynced with a snapshot.
+QUEUE_SIZE = 32
+
+
+class TournamentChannel:
+    """Computes the standings of one tournament for all of its subscribers."""
+
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+        self.queues = set()
+        self.changed = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        self.task = None
+        self.version = None
+        self.winner = ""
+        self.points_to_win = 0
+        self.standings = {}
+
+    def snapshot(self):
+        return {
+            "type": "snapshot",
+            "version": self.version,
+            "winner": self.winner,
+            "points_to_win": self.points_to_win,
+            "standings": list(self.standings.values()),
+        }
+
+    def subscribe(self, queue):
+        self.queues.add(queue)
+        if self.version is not None:
+            queue.put_nowait(self.snapshot())
+        if self.task is None:
+            self.task = self.loop.create_task(self.run())
+
+    def unsubscribe(self, queue):
+        self.queues.discard(queue)
+        if not self.queues and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def wake(self):
+        """Makes the channel check the version stamp now. Thread-safe."""
+        try:
+            self.loop.call_soon_threadsafe(self.changed.set)
+        except RuntimeError:
+            # The loop of a finished request cycle is already closed.
+            pass
+
+    async def run(self):
+        while self.queues:
+            try:
+                if not await self.refresh():
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    f"Failed to refresh the live standings of tournament {self.tournament_id}."
+                )
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout=settings.LIVE_POLL_INTERVAL)
+            except TimeoutError:
+                pass
+            self.changed.clear()
+
+    async def refresh(self):
+        """
+        Reads the version stamp and, if it changed, the standings.
+
+        :return: False if the tournament was deleted.
+        """
+        from .models import PlayerTournamentTotal, Tournament
+
+        tournament = (
+            await Tournament.objects.filter(pk=self.tournament_id)
+            .values("version", "winner", "points_to_win")
+            .afirst()
+        )
+        if tournament is None:
+            self.publish({"type": "deleted", "version": self.version})
+            return False
+        if tournament["version"] == self.version:
+            return True
+
+        rows = PlayerTournamentTotal.objects.filter(tournament_id=self.tournament_id).order_by("pk")
+        standings = {
+            row["player_id"]: {
+                "player_id": row["player_id"],
+                "player": row["player__name"],
+                "total": row["total"],
+                "matches_played": row["matches_played"],
+            }
+            async for row in rows.values("player_id", "player__name", "total", "matches_played")
+        }
+
+        first = self.version is None
+        event = {
+            "type": "update",
+            "version": tournament["version"],
+            "winner": tournament["winner"],
+            "points_to_win": tournament["points_to_win"],
+            "changed": [
+                standing
+                for player_id, standing in standings.items()
+                if self.standings.get(player_id) != standing
+            ],
+            "removed": [player_id for player_id in self.standings if player_id not in standings],
+        }
+        self.version = tournament["version"]
+        self.winner = tournament["winner"]
+        self.points_to_win = tournament["points_to_win"]
+        self.standings = standings
+        self.publish(self.snapshot() if first else event)
+        return True
+
+    def publish(self, event):
+        for queue in self.queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A slow client missed updates, so it gets the full standings.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+
+
+class Broadcaster:
+    """Keeps the tournament channels of this process."""
+
+    def __init__(self):
+        self.channels = {}
+
+    def subscribe(self, tournament_id):
+        """
+        Subscribes to the live standings of a tournament. Must be called from
+        the event loop.
+
+        :return: A queue receiving a snapshot of the standings, followed by an
+                 update for each change.
+        """
+        key = (asyncio.get_running_loop(), tournament_id)
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = TournamentChannel(tournament_id)
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        channel.subscribe(queue)
+        return queue
+
+    def unsubscribe(self, tournament_id, queue):
+        key = (asyncio.get_running_loop(), tournament_id)
+        channel = self.channels.get(key)
+        if channel is None:
+            return
+        channel.unsubscribe(queue)
+        if not channel.queues:
+            del self.channels[key]
+
+    def notify(self):
+        """
+        Wakes every channel to check its version stamp.
+
+        Called by writers after they commit, from any thread.
+        """
+        for channel in list(self.channels.values()):
+            channel.wake()
+
+
+broadcaster = Broadcaster()
+
+
+async def event_stream(tournament_id):
+    """
+    Yields the live standings of a tournament as Server-Sent Events.
+
+    A comment is sent every ``LIVE_KEEPALIVE_INTERVAL`` seconds without a
+    change, so proxies keep the connection open. The stream ends when the
+    tournament is deleted, or when the client disconnects.
+    """
+    queue = broadcaster.subscribe(tournament_id)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.LIVE_KEEPALIVE_INTERVAL
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps(event, cls=DjangoJSONEncoder)
+            yield f"event: {event['type']}\ndata: {data}\n\n"
+            if event["type"] == "deleted":
+                return
+    finally:
+        broadcaster.unsubscribe(tournament_id, queue)
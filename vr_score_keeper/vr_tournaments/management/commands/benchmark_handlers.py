@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the throughput of the WSGI and ASGI request paths on the "
+        "read-heavy pages, by sending concurrent requests through both handlers "
+        "in this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="A page to request. May be repeated. Defaults to the dashboard and tournaments.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="The number of requests per page and path."
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="The number of requests in flight."
+        )
+        parser.add_argument(
+            "--user", help="The username to request the pages as. Defaults to the first superuser."
+        )
+
+    def handle(self, *args, paths=None, requests=200, concurrency=8, user=None, **options):
+        if requests < 1 or concurrency < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        users = User.objects.filter(**({"username": user} if user else {"is_superuser": True}))
+        self.user = users.order_by("pk").first()
+        if self.user is None:
+            raise CommandError("No user to request the pages as.")
+        paths = paths or ["/", "/tournaments/"]
+
+        # Allows the test clients' host name.
+        setup_test_environment()
+        try:
+            for path in paths:
+                wsgi = self.run_wsgi(path, requests, concurrency)
+                asgi = async_to_sync(self.run_asgi)(path, requests, concurrency)
+                self.stdout.write(
+                    f"{path}: WSGI {requests / wsgi:.1f} req/s, "
+                    f"ASGI {requests / asgi:.1f} req/s ({wsgi / asgi:.2f}x)"
+                )
+        finally:
+            teardown_test_environment()
+
+    def run_wsgi(self, path, requests, concurrency):
+        """Sends the requests from a pool of threads, like sync workers."""
+        clients = [Client() for _ in range(concurrency)]
+        for client in clients:
+            client.force_login(self.user)
+
+        def worker(client, count):
+            for _ in range(count):
+                self.check_response(client.get(path), path)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            for future in [
+                executor.submit(worker, client, count)
+                for client, count in zip(clients, self.shares(requests, concurrency))
+            ]:
+                future.result()
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            client.logout()
+        return elapsed
+
+    async def run_asgi(self, path, requests, concurrency):
+        """Sends the requests from concurrent tasks on one event loop."""
+        clients = [AsyncClient() for _ in range(concurrency)]
+        for client in clients:
+            await client.aforce_login(self.user)
+
+        async def worker(client, count):
+            for _ in range(count):
+                self.check_response(await client.get(path), path)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[
+                worker(client, count)
+                for client, count in zip(clients, self.shares(requests, concurrency))
+            ]
+        )
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            await client.alogout()
+        return elapsed
+
+    def shares(self, requests, concurrency):
+        """Splits the requests evenly over the workers."""
+        return [
+            requests // concurrency + (1 if i < requests % concurrency else 0)
+            for i in range(concurrency)
+        ]
+
+    def check_response(self, response, path):
+        if response.status_code != 200:
+            raise CommandError(f"{path} returned {response.status_code}.")
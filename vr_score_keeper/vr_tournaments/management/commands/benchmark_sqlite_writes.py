@@ -0,0 +1,161 @@
+import multiprocessing
+import random
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.runner import DiscoverRunner
+from vr_tournaments.forms import MultiScoreForm
+from vr_tournaments.models import Match, Tournament
+from .benchmark_views import percentile
+
+# The profiles compared, applied in each worker before it connects. The
+# default profile is SQLite's own: a rollback journal and deferred
+# transactions. Python's sqlite3 module waits up to 5 seconds for locks.
+PROFILES = {
+    "default": {"production": False, "options": {}},
+    "production": {"production": True, "options": {"transaction_mode": "IMMEDIATE"}},
+}
+
+
+def create_match(tournament):
+    """Creates a match, retrying while the database is locked."""
+    while True:
+        try:
+            return Match.objects.create(tournament=tournament)
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+
+
+def submit_scores(job):
+    """
+    Runs in a worker process: creates matches in a tournament and submits
+    their scores, like the create_match and create_score views.
+
+    :return: The latencies in ms of the score submissions that succeeded, and
+             the number that failed because the database was locked.
+    """
+    profile, tournament_id, submissions, seed = job
+    settings.SQLITE_PRODUCTION = PROFILES[profile]["production"]
+    connection.settings_dict["OPTIONS"] = dict(PROFILES[profile]["options"])
+
+    rng = random.Random(seed)
+    tournament = Tournament.objects.get(pk=tournament_id)
+    players = list(tournament.players.order_by("pk"))
+    latencies = []
+    locked = 0
+    for _ in range(submissions):
+        # Matches are created by their own request, before they are scored.
+        match = create_match(tournament)
+        form = MultiScoreForm(
+            players, match, {f"score_{p.pk}": rng.randint(0, 5) for p in players}
+        )
+        form.is_valid()
+        started = time.perf_counter()
+        try:
+            # Reads the previous scores before writing, like the view.
+            form.save()
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+        else:
+            latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return latencies, locked
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the score submission throughput of several worker processes "
+        "writing to one SQLite file, with SQLite's default settings and with the "
+        "SQLITE_PRODUCTION profile, in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=4, help="The number of concurrent processes."
+        )
+        parser.add_argument(
+            "--submissions",
+            type=int,
+            default=50,
+            help="The number of score submissions per worker.",
+        )
+        parser.add_argument(
+            "--players", type=int, default=4, help="The number of players scored per match."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+
+    def handle(self, *args, workers=4, submissions=50, players=4, seed=0, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark only runs on SQLite.")
+        if workers < 1 or submissions < 1 or players < 2:
+            raise CommandError(
+                "The benchmark needs 1 worker, 1 submission and 2 players at least."
+            )
+
+        # The test database is a file, so that the workers can share it.
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = str(Path(directory) / "benchmark.sqlite3")
+            connection.settings_dict["TEST"]["NAME"] = test_name
+            runner = DiscoverRunner(verbosity=0, interactive=False)
+            databases = runner.setup_databases()
+            try:
+                call_command(
+                    "generate_fake_league",
+                    players=players * workers,
+                    tournaments=workers,
+                    matches=0,
+                    roster_size=players,
+                    players_per_match=players,
+                    active=workers,
+                    seed=seed,
+                    stdout=StringIO(),
+                )
+                tournament_ids = list(
+                    Tournament.objects.order_by("pk").values_list("pk", flat=True)
+                )
+                self.stdout.write(
+                    f"{workers} workers, {submissions} submissions each, "
+                    f"{players} players per match."
+                )
+                for profile in PROFILES:
+                    self.run_profile(profile, tournament_ids, submissions, seed)
+            finally:
+                runner.teardown_databases(databases)
+
+    def run_profile(self, profile, tournament_ids, submissions, seed):
+        # The journal mode is kept in the file, so it is set before the workers
+        # start, rather than by all of them at once.
+        journal_mode = "WAL" if PROFILES[profile]["production"] else "DELETE"
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        # Connections must not be shared with the forked workers.
+        connections.close_all()
+        jobs = [
+            (profile, tournament_id, submissions, seed + i)
+            for i, tournament_id in enumerate(tournament_ids)
+        ]
+        started = time.perf_counter()
+        with multiprocessing.get_context("fork").Pool(len(jobs)) as pool:
+            results = pool.map(submit_scores, jobs)
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for worker, _ in results for latency in worker]
+        locked = sum(failed for _, failed in results)
+        line = (
+            f"  {profile}: {len(latencies) / elapsed:.1f} submissions/s, "
+            f"{locked} failed with 'database is locked'"
+        )
+        if latencies:
+            line += (
+                f", p50 {percentile(latencies, 0.50):.1f} ms, "
+                f"p95 {percentile(latencies, 0.95):.1f} ms"
+            )
+        self.stdout.write(self.style.WARNING(line) if locked else line)
@@ -0,0 +1,257 @@
+import json
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from urllib.parse import urlencode
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from vr_tournaments import urls
+from vr_tournaments.models import Match, Player, Tournament
+
+# The object each URL argument is filled with, by URL name.
+URL_ARGUMENTS = {
+    "player_detail": {"pk": "player"},
+    "delete_player": {"pk": "player"},
+    "tournament_detail": {"pk": "tournament"},
+    "tournament_registration": {"pk": "tournament"},
+    "delete_tournament": {"pk": "tournament"},
+    "create_match": {"tournament_pk": "tournament"},
+    "create_score": {"match_pk": "match"},
+    "delete_match": {"pk": "match"},
+    "api_tournament_standings": {"pk": "tournament"},
+    "api_tournament_matches": {"pk": "tournament"},
+}
+# Query strings, filled the same way.
+URL_QUERIES = {
+    "previous_tournaments": {"date": ("tournament", "date"), "pk": ("tournament", "pk")},
+}
+# Streams that never end on their own.
+SKIPPED = {"tournament_live"}
+# The bearer token sent to the pool metrics, which are disabled without one.
+POOL_METRICS_TOKEN = "benchmark"
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of the values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Times every page and API endpoint at several league sizes, in a throwaway "
+        "database filled by generate_fake_league, and writes the query counts, "
+        "latency percentiles and peak memory of each to a JSON report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            type=int,
+            dest="scales",
+            help="Multiplies the league size. May be repeated. Defaults to 1 and 10.",
+        )
+        parser.add_argument(
+            "--players", type=int, default=50, help="The number of players at scale 1."
+        )
+        parser.add_argument(
+            "--tournaments", type=int, default=5, help="The number of tournaments at scale 1."
+        )
+        parser.add_argument(
+            "--matches", type=int, default=200, help="The number of matches at scale 1."
+        )
+        parser.add_argument(
+            "--requests", type=int, default=20, help="The number of timed requests per URL."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="The league's random seed.")
+        parser.add_argument(
+            "--output", default="benchmark.json", help="The file the report is written to."
+        )
+        parser.add_argument(
+            "--compare", help="A previous report to compare this run against."
+        )
+
+    def handle(self, *args, scales=None, requests=20, output="benchmark.json", **options):
+        if requests < 1:
+            raise CommandError("--requests must be at least 1.")
+        previous = None
+        if options["compare"]:
+            try:
+                previous = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read {options['compare']}: {error}")
+
+        # The league is generated in a test database, which is dropped afterwards.
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        databases = runner.setup_databases()
+        try:
+            sizes = []
+            for scale in scales or [1, 10]:
+                size = {
+                    "scale": scale,
+                    "players": options["players"] * scale,
+                    "tournaments": options["tournaments"] * scale,
+                    "matches": options["matches"] * scale,
+                }
+                self.populate(size, options["seed"])
+                self.stdout.write(
+                    f"Scale {scale}: {size['players']} players, "
+                    f"{size['tournaments']} tournaments, {size['matches']} matches."
+                )
+                size["views"] = self.run_views(requests)
+                sizes.append(size)
+        finally:
+            runner.teardown_databases(databases)
+            teardown_test_environment()
+
+        report = {
+            "generated": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "requests": requests,
+            "sizes": sizes,
+        }
+        Path(output).write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {output}."))
+        if previous:
+            self.compare(previous, report)
+
+    def populate(self, size, seed):
+        """Replaces the database contents with a league of the given size."""
+        call_command("flush", interactive=False, verbosity=0)
+        cache.clear()
+        self.user = User.objects.create_superuser("benchmark", "benchmark@example.com", None)
+        call_command(
+            "generate_fake_league",
+            players=size["players"],
+            tournaments=size["tournaments"],
+            matches=size["matches"],
+            seed=seed,
+            stdout=StringIO(),
+        )
+
+    def targets(self):
+        """Picks the objects URL arguments are filled with: the newest
+        tournament, its latest match, and the first player."""
+        tournament = Tournament.objects.order_by("-date", "-pk").first()
+        return {
+            "tournament": tournament,
+            "match": Match.objects.filter(tournament=tournament).order_by("-pk").first(),
+            "player": Player.objects.order_by("pk").first(),
+        }
+
+    def run_views(self, requests):
+        # The pool metrics need a token, which the client sends to every view.
+        token = settings.POOL_METRICS_TOKEN or POOL_METRICS_TOKEN
+        with override_settings(POOL_METRICS_TOKEN=token):
+            return self.time_views(Client(headers={"Authorization": f"Bearer {token}"}), requests)
+
+    def time_views(self, client, requests):
+        client.force_login(self.user)
+        targets = self.targets()
+        results = {}
+        for pattern in urls.urlpatterns:
+            name = pattern.name
+            if name in SKIPPED:
+                continue
+            arguments = URL_ARGUMENTS.get(name, {})
+            if set(arguments) != set(pattern.pattern.converters):
+                self.stderr.write(f"Skipping {name}: unknown URL arguments.")
+                continue
+            path = reverse(name, kwargs={key: targets[kind].pk for key, kind in arguments.items()})
+            query = {
+                key: getattr(targets[kind], field)
+                for key, (kind, field) in URL_QUERIES.get(name, {}).items()
+            }
+            if query:
+                path = f"{path}?{urlencode(query)}"
+
+            # The first request fills the caches. The query log is cleared
+            # first, since a full log cannot capture more queries.
+            reset_queries()
+            with CaptureQueriesContext(connection) as cold:
+                status = self.fetch(client, path)
+            if status == 405:
+                self.stdout.write(f"  {name}: skipped, it only accepts POST.")
+                continue
+            reset_queries()
+            with CaptureQueriesContext(connection) as warm:
+                self.fetch(client, path)
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                self.fetch(client, path)
+                timings.append((time.perf_counter() - started) * 1000)
+            tracemalloc.start()
+            try:
+                self.fetch(client, path)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+            results[name] = {
+                "path": path,
+                "status": status,
+                "cold_queries": len(cold),
+                "queries": len(warm),
+                "p50_ms": round(percentile(timings, 0.50), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "p99_ms": round(percentile(timings, 0.99), 3),
+                "max_ms": round(max(timings), 3),
+                "peak_memory_kb": round(peak / 1024, 1),
+            }
+            self.stdout.write(
+                f"  {name}: {results[name]['queries']} queries, "
+                f"p50 {results[name]['p50_ms']:.1f} ms, p95 {results[name]['p95_ms']:.1f} ms, "
+                f"peak {results[name]['peak_memory_kb']:.0f} KiB"
+            )
+        return results
+
+    def fetch(self, client, path):
+        """Requests a page, reading streamed responses to the end."""
+        response = client.get(path)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        if response.status_code >= 400 and response.status_code != 405:
+            raise CommandError(f"{path} returned {response.status_code}.")
+        return response.status_code
+
+    def compare(self, previous, report):
+        """Prints the change of each view's median latency and query count."""
+        before = {
+            (size["scale"], name): view
+            for size in previous.get("sizes", [])
+            for name, view in size["views"].items()
+        }
+        self.stdout.write("Compared with the previous report:")
+        for size in report["sizes"]:
+            for name, view in size["views"].items():
+                old = before.get((size["scale"], name))
+                if old is None:
+                    continue
+                change = view["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0
+                line = (
+                    f"  {name} at scale {size['scale']}: p50 {old['p50_ms']:.1f} -> "
+                    f"{view['p50_ms']:.1f} ms ({change:+.0%}), "
+                    f"queries {old['queries']} -> {view['queries']}"
+                )
+                if view["queries"] > old["queries"]:
+                    line = self.style.WARNING(line)
+                self.stdout.write(line)
@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+from vr_tournaments.models import (
+    Match,
+    Player,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+    Score,
+    Tournament,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints the query plans of the queries the main views run on every load, "
+        "to check that they use the indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Runs the queries and reports actual timings. PostgreSQL only.",
+        )
+
+    def handle(self, *args, analyze=False, **options):
+        if analyze and connection.vendor != "postgresql":
+            raise CommandError("--analyze is only supported on PostgreSQL.")
+        tournament = Tournament.objects.order_by("-date", "-pk").first()
+        player = Player.objects.order_by("pk").first()
+        if tournament is None or player is None:
+            raise CommandError("The database needs a tournament and a player to explain.")
+
+        for title, queryset in self.hot_queries(tournament, player):
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(str(queryset.query))
+            options = {"analyze": True} if analyze else {}
+            for line in queryset.explain(**options).splitlines():
+                # Full table scans are the plans an index should have avoided.
+                full_scan = ("SCAN " in line and " USING " not in line) or "Seq Scan" in line
+                self.stdout.write(self.style.WARNING(line) if full_scan else line)
+            self.stdout.write("")
+
+    def hot_queries(self, tournament, player):
+        """Yields (title, queryset) pairs shaped like the views' queries."""
+        yield (
+            "index: active tournaments",
+            Tournament.objects.filter(winner="").order_by("-date"),
+        )
+        yield (
+            "index, previous_tournaments: a page of finished tournaments",
+            Tournament.objects.exclude(winner="")
+            .filter(Q(date__lt=tournament.date) | Q(date=tournament.date, pk__lt=tournament.pk))
+            .order_by("-date", "-pk")[:11],
+        )
+        yield (
+            "tournaments: a page of tournaments",
+            Tournament.objects.order_by("-date", "-pk")[:10],
+        )
+        yield (
+            "tournaments, tournament_detail: standings",
+            PlayerTournamentTotal.objects.filter(tournament=tournament)
+            .select_related("player")
+            .order_by("-total", "pk"),
+        )
+        yield (
+            "tournaments, tournament_detail: match history",
+            Match.objects.filter(tournament=tournament).order_by("-date", "-pk"),
+        )
+        yield (
+            "tournaments: scores of the matches",
+            Score.objects.filter(match__tournament__in=[tournament]).values_list(
+                "match_id", "player_id", "score"
+            ),
+        )
+        yield (
+            "player statistics: best score",
+            Score.objects.filter(player=player).order_by("-score", "match__date", "pk")[:1],
+        )
+        yield (
+            "player_search: names starting with a prefix",
+            Player.objects.filter(name__istartswith=player.name[:2]).order_by(Upper("name"), "pk")[
+                :21
+            ],
+        )
+        yield (
+            "leaderboard: latest ratings",
+            RatingSnapshot.objects.rated_players().order_by("-rating", "name"),
+        )
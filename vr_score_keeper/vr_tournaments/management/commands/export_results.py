@@ -0,0 +1,50 @@
+import datetime
+from django.core.management.base import BaseCommand, CommandError
+from vr_tournaments.exports import EXPORT_FORMATS, export_lines, export_rows
+
+
+class Command(BaseCommand):
+    help = "Streams the recorded scores as CSV or NDJSON, one row per score."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=tuple(EXPORT_FORMATS), default="csv", help="The output format."
+        )
+        parser.add_argument("--output", help="The file to write. Defaults to stdout.")
+        parser.add_argument("--tournament", type=int, help="Only export this tournament pk.")
+        parser.add_argument("--player", type=int, help="Only export this player pk.")
+        parser.add_argument(
+            "--from", dest="date_from", type=self.parse_date, help="First match date (YYYY-MM-DD)."
+        )
+        parser.add_argument(
+            "--to", dest="date_to", type=self.parse_date, help="Last match date (YYYY-MM-DD)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="The number of rows fetched from the database at a time.",
+        )
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return datetime.date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        rows = export_rows(
+            tournament_id=options["tournament"],
+            player_id=options["player"],
+            date_from=options["date_from"],
+            date_to=options["date_to"],
+            chunk_size=options["chunk_size"],
+        )
+        lines = export_lines(options["format"], rows)
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
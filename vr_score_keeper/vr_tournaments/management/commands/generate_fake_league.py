@@ -0,0 +1,175 @@
+import datetime
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from vr_tournaments.models import (
+    Match,
+    Player,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+    Score,
+    Tournament,
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates a synthetic league of players, tournaments and scored matches "
+        "with bulk inserts, for load testing. The same options and seed always "
+        "create the same league."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=50, help="The number of players.")
+        parser.add_argument(
+            "--tournaments", type=int, default=5, help="The number of tournaments."
+        )
+        parser.add_argument(
+            "--matches",
+            type=int,
+            default=200,
+            help="The number of matches, spread evenly over the tournaments.",
+        )
+        parser.add_argument(
+            "--roster-size",
+            type=int,
+            default=8,
+            help="The number of players registered in each tournament.",
+        )
+        parser.add_argument(
+            "--players-per-match",
+            type=int,
+            default=4,
+            help="The number of registered players scored in each match.",
+        )
+        parser.add_argument(
+            "--active",
+            type=int,
+            default=1,
+            help="The number of newest tournaments left without a winner.",
+        )
+        parser.add_argument(
+            "--start",
+            type=datetime.date.fromisoformat,
+            default=datetime.date(2024, 1, 1),
+            help="The date of the first tournament, as YYYY-MM-DD. Tournaments are weekly.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="The random seed.")
+        parser.add_argument(
+            "--prefix",
+            default="Fake",
+            help="Prefixes the player and tournament names, to tell leagues apart.",
+        )
+
+    def handle(self, *args, **options):
+        players = options["players"]
+        tournaments = options["tournaments"]
+        matches = options["matches"]
+        roster_size = min(options["roster_size"], players)
+        per_match = min(options["players_per_match"], roster_size)
+        if players < 2 or tournaments < 1 or matches < 0 or per_match < 2:
+            raise CommandError(
+                "A league needs at least 2 players, 1 tournament and 2 players per match."
+            )
+        prefix = options["prefix"]
+        rng = random.Random(options["seed"])
+        started = time.monotonic()
+
+        player_names = [f"{prefix} Player {i + 1}" for i in range(players)]
+        if Player.objects.filter(name__in=player_names).exists():
+            raise CommandError(f"A league prefixed {prefix!r} already exists. Use --prefix.")
+
+        with transaction.atomic():
+            player_ids = [
+                player.pk
+                for player in Player.objects.bulk_create(
+                    [Player(name=name) for name in player_names], batch_size=BATCH_SIZE
+                )
+            ]
+            league = Tournament.objects.bulk_create(
+                [
+                    Tournament(
+                        name=f"{prefix} League {i + 1}",
+                        date=options["start"] + datetime.timedelta(weeks=i),
+                    )
+                    for i in range(tournaments)
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            rosters = {t.pk: rng.sample(player_ids, roster_size) for t in league}
+            Player.tournaments.through.objects.bulk_create(
+                [
+                    Player.tournaments.through(tournament_id=t, player_id=p)
+                    for t, roster in rosters.items()
+                    for p in roster
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+            # Matches go to the tournaments in turn, spread over each one's week.
+            per_tournament = -(-matches // tournaments)
+            planned = []
+            for i in range(matches):
+                tournament = league[i % tournaments]
+                day = (i // tournaments) * 7 // per_tournament
+                planned.append(
+                    Match(
+                        tournament_id=tournament.pk,
+                        date=tournament.date + datetime.timedelta(days=day),
+                    )
+                )
+            created = Match.objects.bulk_create(planned, batch_size=BATCH_SIZE)
+            scores = 0
+            batch = []
+            for match in created:
+                for player_id in rng.sample(rosters[match.tournament_id], per_match):
+                    batch.append(
+                        Score(match=match, player_id=player_id, score=rng.randint(0, 20))
+                    )
+                if len(batch) >= BATCH_SIZE:
+                    scores += len(Score.objects.bulk_create(batch))
+                    batch = []
+            scores += len(Score.objects.bulk_create(batch))
+
+            self.finish(league, roster_size, options["active"])
+            if created:
+                RatingSnapshot.objects.replay(since=(created[0].date, created[0].pk))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {players} players, {tournaments} tournaments, {len(created)} matches "
+                f"and {scores} scores in {time.monotonic() - started:.2f}s."
+            )
+        )
+
+    def finish(self, league, roster_size, active):
+        """
+        Computes the totals, and declares the winners of all but the newest
+        ``active`` tournaments. Finished tournaments are given a target their
+        leader reached, and active ones a target above their leader, so the
+        next scores can decide them.
+        """
+        tournament_ids = [t.pk for t in league]
+        PlayerTournamentTotal.objects.rebuild(tournament_ids=tournament_ids)
+        leaders = dict(
+            PlayerTournamentTotal.objects.filter(tournament_id__in=tournament_ids)
+            .values("tournament_id")
+            .annotate(leader=Max("total"))
+            .values_list("tournament_id", "leader")
+        )
+        finished = league[: max(0, len(league) - active)]
+        for tournament in league:
+            target = (roster_size - 1) * 10
+            leader = leaders.get(tournament.pk, 0)
+            if tournament in finished:
+                tournament.points_to_win = min(target, leader)
+            else:
+                tournament.points_to_win = max(target, leader + 10)
+        Tournament.objects.bulk_update(league, ["points_to_win"], batch_size=BATCH_SIZE)
+        for tournament in finished:
+            tournament.resolve_winner()
+        Tournament.objects.filter(pk__in=tournament_ids).bump_version()
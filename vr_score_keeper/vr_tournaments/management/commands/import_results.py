@@ -0,0 +1,366 @@
+import csv
+import datetime
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from vr_tournaments.models import (
+    Match,
+    Player,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+    Score,
+    Tournament,
+)
+
+
+class InvalidRow(Exception):
+    """Raised for a row that cannot be imported."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports historical match results from a CSV or NDJSON file with "
+        "tournament, date, player and score columns, and an optional match column. "
+        "Matches already recorded with the same players and scores are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The file to import, or - to read from stdin.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "ndjson"),
+            help="The file format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of scores inserted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file without writing anything.",
+        )
+
+    def handle(self, *args, path, format=None, batch_size=1000, dry_run=False, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        file_format = format or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.verbosity = options["verbosity"]
+
+        # Lookup maps, so rows are resolved without a query per row.
+        self.players = dict(Player.objects.values_list("name", "pk"))
+        self.tournaments = dict(
+            Tournament.objects.order_by("pk").values_list("name", "pk")
+        )
+        self.new_players = set()
+        self.new_tournaments = {}
+        self.touched_tournaments = set()
+        # The matches each tournament had before the import, by signature.
+        self.recorded = {}
+        self.skipped_rows = 0
+        self.skipped_matches = 0
+        self.earliest_match = None
+        self.pending = []
+        self.pending_scores = 0
+        self.errors = []
+        self.dropped_match = None
+        self.rows = 0
+        self.matches = 0
+        self.imported_rows = 0
+        self.imported_matches = 0
+        self.started = time.monotonic()
+
+        try:
+            if path == "-":
+                self.import_stream(sys.stdin, file_format)
+            else:
+                try:
+                    with open(Path(path), newline="", encoding="utf-8") as stream:
+                        self.import_stream(stream, file_format)
+                except OSError as error:
+                    raise CommandError(f"Cannot read {path}: {error}")
+        finally:
+            # Batches committed before a failure are kept, so their totals,
+            # winners and ratings are brought up to date in any case.
+            if not dry_run:
+                self.finish_tournaments()
+                # Imported matches may predate rated ones, so the ratings are
+                # replayed from the earliest of them.
+                if self.earliest_match:
+                    RatingSnapshot.objects.replay(since=self.earliest_match)
+
+        if self.errors:
+            for error in self.errors[:20]:
+                self.stderr.write(error)
+            if self.dropped_match:
+                self.stderr.write(self.dropped_match)
+            message = f"{len(self.errors)} rows could not be imported."
+            if not dry_run:
+                message += (
+                    f" The {self.imported_rows} scores in {self.imported_matches} matches "
+                    f"before the first of them were imported."
+                )
+            raise CommandError(message)
+
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        verb = "Validated" if dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {self.rows - self.skipped_rows} scores in "
+                f"{self.matches - self.skipped_matches} matches in {elapsed:.2f}s "
+                f"({self.rows / elapsed:.0f} scores/s). "
+                f"Skipped {self.skipped_matches} matches already recorded. "
+                f"New players: {len(self.new_players)}, "
+                f"new tournaments: {len(self.new_tournaments)}."
+            )
+        )
+
+    def read_rows(self, stream, file_format):
+        """Yields (line number, row dict) pairs from the stream, one at a time."""
+        if file_format == "csv":
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, error
+                continue
+            yield line_number, row
+
+    def import_stream(self, stream, file_format):
+        """
+        Groups the rows into matches and imports them in batches.
+
+        Rows with the same match column belong to the same match. Without a match
+        column, consecutive rows of the same tournament and date form a match,
+        until a player appears twice.
+        """
+        current_key = None
+        current_scores = {}
+        for line_number, row in self.read_rows(stream, file_format):
+            try:
+                tournament, date, match_key, player, score = self.parse_row(row)
+                key = (tournament, date, match_key)
+                if key == current_key and match_key is not None and player in current_scores:
+                    raise InvalidRow(f"{player} has two scores in match {match_key}.")
+            except InvalidRow as error:
+                self.errors.append(f"Line {line_number}: {error}")
+                if self.dry_run:
+                    continue
+                # The import stops at the first invalid row. The matches read
+                # before it are imported; the match it interrupted may be
+                # incomplete, so it is left out.
+                self.flush()
+                if current_scores:
+                    tournament, date, _ = current_key
+                    self.dropped_match = (
+                        f"The match of {tournament} on {date} interrupted by line "
+                        f"{line_number}, with {len(current_scores)} scores, was not imported."
+                    )
+                return
+
+            if key != current_key or player in current_scores:
+                self.add_match(current_key, current_scores)
+                current_key, current_scores = key, {}
+            current_scores[player] = score
+            self.rows += 1
+
+        self.add_match(current_key, current_scores)
+        self.flush()
+
+    def parse_row(self, row):
+        """Validates a row and returns its tournament, date, match, player and score."""
+        if isinstance(row, Exception):
+            raise InvalidRow(f"Invalid JSON: {row}")
+        if not isinstance(row, dict):
+            raise InvalidRow("Expected an object.")
+        values = {}
+        for field in ("tournament", "date", "player", "score"):
+            value = row.get(field)
+            if value is None or str(value).strip() == "":
+                raise InvalidRow(f"Missing {field}.")
+            values[field] = str(value).strip()
+        try:
+            date = datetime.date.fromisoformat(values["date"])
+        except ValueError:
+            raise InvalidRow(f"Invalid date {values['date']!r}, expected YYYY-MM-DD.")
+        try:
+            score = int(values["score"])
+        except ValueError:
+            raise InvalidRow(f"Invalid score {values['score']!r}.")
+        if score < 0:
+            raise InvalidRow("Score cannot be negative.")
+        match_key = str(row.get("match") or "").strip() or None
+        return values["tournament"], date, match_key, values["player"], score
+
+    def add_match(self, key, scores):
+        """Queues a parsed match, flushing the queue once a batch is full."""
+        if not scores:
+            return
+        self.matches += 1
+        self.pending.append((key, scores))
+        self.pending_scores += len(scores)
+        if self.pending_scores >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the queued matches, their scores and registrations in one transaction."""
+        pending, self.pending, self.pending_scores = self.pending, [], 0
+        if not pending:
+            return
+        if self.dry_run:
+            self.create_players(pending)
+            self.skip_recorded(pending)
+            return
+
+        with transaction.atomic():
+            self.create_players(pending)
+            pending = self.skip_recorded(pending)
+            if not pending:
+                return
+            matches = Match.objects.bulk_create(
+                [
+                    Match(tournament_id=self.resolve_tournament(tournament, date), date=date)
+                    for (tournament, date, _), _ in pending
+                ]
+            )
+            scores = []
+            registrations = set()
+            for match, (_, match_scores) in zip(matches, pending):
+                for player, score in match_scores.items():
+                    player_id = self.players[player]
+                    scores.append(Score(match=match, player_id=player_id, score=score))
+                    registrations.add((match.tournament_id, player_id))
+            Score.objects.bulk_create(scores)
+            Player.tournaments.through.objects.bulk_create(
+                [
+                    Player.tournaments.through(tournament_id=t, player_id=p)
+                    for t, p in registrations
+                ],
+                ignore_conflicts=True,
+            )
+        self.imported_rows += len(scores)
+        self.imported_matches += len(matches)
+        self.touched_tournaments.update(match.tournament_id for match in matches)
+        self.earliest_match = min(
+            filter(None, [self.earliest_match, *((m.date, m.pk) for m in matches)])
+        )
+
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        if self.verbosity >= 2:
+            self.stdout.write(
+                f"{self.rows} scores imported ({self.rows / elapsed:.0f} scores/s)."
+            )
+
+    def create_players(self, pending):
+        """Creates the players of the queued matches that do not exist yet, in one query."""
+        names = sorted(
+            {player for _, scores in pending for player in scores} - self.players.keys()
+        )
+        if not names:
+            return
+        self.new_players.update(names)
+        if self.dry_run:
+            self.players.update(dict.fromkeys(names))
+            return
+        players = Player.objects.bulk_create([Player(name=name) for name in names])
+        self.players.update((player.name, player.pk) for player in players)
+
+    def skip_recorded(self, pending):
+        """
+        Resolves the tournaments of the queued matches and leaves out the
+        matches that are already recorded, so importing a file again does not
+        duplicate its matches.
+
+        A match is recorded when its tournament has a match on the same date
+        with the same players and scores. Each match recorded before the
+        import is matched once, so a file holding the same match twice imports
+        it twice into an empty tournament, and not again on later runs.
+
+        :param pending: The queued matches.
+        :return: The queued matches that are not recorded yet.
+        """
+        self.load_recorded(
+            {self.resolve_tournament(tournament, date) for (tournament, date, _), _ in pending}
+        )
+        remaining = []
+        for key, scores in pending:
+            tournament, date, _ = key
+            recorded = self.recorded.get(self.tournaments[tournament])
+            player_scores = [(self.players[player], score) for player, score in scores.items()]
+            signature = self.signature(date, player_scores)
+            if recorded and recorded[signature]:
+                recorded[signature] -= 1
+                self.skipped_matches += 1
+                self.skipped_rows += len(scores)
+            else:
+                remaining.append((key, scores))
+        return remaining
+
+    def load_recorded(self, tournament_ids):
+        """
+        Reads the signatures of the matches of tournaments not seen before in
+        this import, in one query, before any of their matches are imported.
+        """
+        unseen = {pk for pk in tournament_ids if pk is not None} - self.recorded.keys()
+        if not unseen:
+            return
+        scores = {}
+        for match_id, tournament_id, date, player_id, score in Score.objects.filter(
+            match__tournament_id__in=unseen
+        ).values_list("match_id", "match__tournament_id", "match__date", "player_id", "score"):
+            scores.setdefault((match_id, tournament_id, date), []).append((player_id, score))
+        self.recorded.update((pk, Counter()) for pk in unseen)
+        for (_, tournament_id, date), match_scores in scores.items():
+            self.recorded[tournament_id][self.signature(date, match_scores)] += 1
+
+    @staticmethod
+    def signature(date, scores):
+        """Identifies a match of a tournament by its date and (player pk, score) pairs."""
+        return date, frozenset(scores)
+
+    def resolve_tournament(self, name, date):
+        """Returns the pk of the named tournament, creating it if needed."""
+        if name not in self.tournaments:
+            tournament = None if self.dry_run else Tournament.objects.create(name=name, date=date)
+            self.tournaments[name] = tournament.pk if tournament else None
+            self.new_tournaments[name] = self.tournaments[name]
+            if tournament:
+                self.recorded[tournament.pk] = Counter()
+        return self.tournaments[name]
+
+    def finish_tournaments(self):
+        """
+        Rebuilds the totals of the imported tournaments, recomputes their points
+        to win from the registered players, as 10 points per opponent, and
+        declares their winners.
+        """
+        tournament_ids = sorted(self.touched_tournaments)
+        for start in range(0, len(tournament_ids), self.batch_size):
+            chunk = tournament_ids[start : start + self.batch_size]
+            with transaction.atomic():
+                PlayerTournamentTotal.objects.rebuild(tournament_ids=chunk)
+                tournaments = Tournament.objects.filter(pk__in=chunk).annotate(
+                    registered=Count("players")
+                )
+                for tournament in tournaments:
+                    points_to_win = max(0, (tournament.registered - 1) * 10)
+                    if tournament.points_to_win != points_to_win:
+                        tournament.points_to_win = points_to_win
+                        tournament.save(update_fields=["points_to_win", "version", "modified"])
+                    tournament.resolve_winner()
+                Tournament.objects.filter(pk__in=chunk).bump_version()
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from vr_tournaments.models import PlayerStats
+
+FIELDS = (
+    "tournaments_played",
+    "tournaments_won",
+    "matches_played",
+    "total_score",
+    "best_score",
+    "best_match_id",
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the materialized player career statistics and verifies them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--player",
+            type=int,
+            action="append",
+            dest="player_ids",
+            help="Only rebuild the given player. May be repeated.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the stored statistics, without rebuilding them.",
+        )
+
+    def handle(self, *args, player_ids=None, check=False, **options):
+        if not check:
+            count = PlayerStats.objects.refresh(player_ids)
+            self.stdout.write(f"Rebuilt the statistics of {count} players.")
+
+        mismatches = self.verify(player_ids)
+        for mismatch in mismatches:
+            self.stderr.write(mismatch)
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} player statistics are out of date.")
+        self.stdout.write(self.style.SUCCESS("Player statistics are up to date."))
+
+    def verify(self, player_ids):
+        """
+        Compares the stored statistics with statistics recomputed from the totals.
+
+        :return: A list of messages describing every mismatch.
+        """
+        stored = PlayerStats.objects.all()
+        if player_ids is not None:
+            stored = stored.filter(player_id__in=player_ids)
+        stored = {row["player_id"]: row for row in stored.values("player_id", *FIELDS)}
+
+        mismatches = []
+        for expected in PlayerStats.objects.expected(player_ids):
+            row = stored.get(expected.player_id)
+            if row is None:
+                # Players who never played have no statistics yet.
+                row = {"player_id": expected.player_id} | {
+                    field: getattr(PlayerStats(), field) for field in FIELDS
+                }
+            for field in FIELDS:
+                if row[field] != getattr(expected, field):
+                    mismatches.append(
+                        f"Player {expected.player_id}: {field} is {row[field]}, "
+                        f"expected {getattr(expected, field)}."
+                    )
+        return mismatches
@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand
+from vr_tournaments.models import RatingSnapshot
+
+
+class Command(BaseCommand):
+    help = "Replays the whole match history to rebuild every player's rating snapshots."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = RatingSnapshot.objects.replay()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {count} rating snapshots in {time.monotonic() - started:.2f}s."
+            )
+        )
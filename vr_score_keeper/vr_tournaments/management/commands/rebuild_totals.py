@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from vr_tournaments.models import PlayerTournamentTotal
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-player tournament totals from the Score table and verifies them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tournament",
+            type=int,
+            action="append",
+            dest="tournament_ids",
+            help="Only rebuild the given tournament. May be repeated.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the stored totals, without rebuilding them.",
+        )
+
+    def handle(self, *args, tournament_ids=None, check=False, **options):
+        if not check:
+            count = PlayerTournamentTotal.objects.rebuild(tournament_ids=tournament_ids)
+            self.stdout.write(f"Rebuilt {count} player totals.")
+
+        mismatches = self.verify(tournament_ids)
+        for mismatch in mismatches:
+            self.stderr.write(mismatch)
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} player totals do not match the scores.")
+        self.stdout.write(self.style.SUCCESS("Player totals match the scores."))
+
+    def verify(self, tournament_ids):
+        """
+        Compares the stored totals with totals recomputed from the Score table.
+
+        :return: A list of messages describing every mismatch.
+        """
+        fields = ("total", "matches_played", "last_match_date")
+        stored = PlayerTournamentTotal.objects.all()
+        if tournament_ids is not None:
+            stored = stored.filter(tournament_id__in=tournament_ids)
+        stored = {
+            (row["tournament_id"], row["player_id"]): row
+            for row in stored.values("tournament_id", "player_id", *fields)
+        }
+
+        mismatches = []
+        for expected in PlayerTournamentTotal.objects.expected(tournament_ids):
+            key = (expected.tournament_id, expected.player_id)
+            row = stored.pop(key, None)
+            if row is None:
+                mismatches.append(f"Missing total for tournament {key[0]}, player {key[1]}.")
+                continue
+            for field in fields:
+                if row[field] != getattr(expected, field):
+                    mismatches.append(
+                        f"Tournament {key[0]}, player {key[1]}: {field} is "
+                        f"{row[field]}, expected {getattr(expected, field)}."
+                    )
+        for tournament_id, player_id in stored:
+            mismatches.append(
+                f"Unexpected total for tournament {tournament_id}, player {player_id}."
+            )
+        return mismatches
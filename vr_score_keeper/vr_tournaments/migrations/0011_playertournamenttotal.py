@@ -0,0 +1,62 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def populate_totals(apps, schema_editor):
+    Player = apps.get_model("vr_tournaments", "Player")
+    Score = apps.get_model("vr_tournaments", "Score")
+    PlayerTournamentTotal = apps.get_model("vr_tournaments", "PlayerTournamentTotal")
+
+    aggregates = {
+        (row["match__tournament"], row["player"]): row
+        for row in Score.objects.order_by()
+        .values("match__tournament", "player")
+        .annotate(
+            total=Sum("score"),
+            matches_played=Count("pk"),
+            last_match_date=Max("match__date"),
+        )
+    }
+    totals = []
+    for tournament_id, player_id in Player.tournaments.through.objects.order_by(
+        "pk"
+    ).values_list("tournament_id", "player_id"):
+        row = aggregates.get((tournament_id, player_id), {})
+        totals.append(
+            PlayerTournamentTotal(
+                tournament_id=tournament_id,
+                player_id=player_id,
+                total=row.get("total", 0),
+                matches_played=row.get("matches_played", 0),
+                last_match_date=row.get("last_match_date"),
+            )
+        )
+    PlayerTournamentTotal.objects.bulk_create(totals, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0010_alter_tournament_points_to_win'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerTournamentTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('matches_played', models.IntegerField(default=0)),
+                ('last_match_date', models.DateField(blank=True, null=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tournament_totals', to='vr_tournaments.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_totals', to='vr_tournaments.tournament')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'player'), name='unique_player_tournament_total')],
+            },
+        ),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
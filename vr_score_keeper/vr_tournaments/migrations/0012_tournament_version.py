@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0011_playertournamenttotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:27
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def delete_duplicate_scores(apps, schema_editor):
+    """
+    Keeps only the latest score of each player in a match, and removes the
+    deleted duplicates from the player totals.
+    """
+    Score = apps.get_model("vr_tournaments", "Score")
+    PlayerTournamentTotal = apps.get_model("vr_tournaments", "PlayerTournamentTotal")
+
+    seen = set()
+    for score in Score.objects.select_related("match").order_by("-pk"):
+        key = (score.match_id, score.player_id)
+        if key not in seen:
+            seen.add(key)
+            continue
+        PlayerTournamentTotal.objects.filter(
+            tournament_id=score.match.tournament_id, player_id=score.player_id
+        ).update(total=F("total") - score.score, matches_played=F("matches_played") - 1)
+        score.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0012_tournament_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='score',
+            constraint=models.UniqueConstraint(fields=('match', 'player'), name='unique_match_player_score'),
+        ),
+    ]
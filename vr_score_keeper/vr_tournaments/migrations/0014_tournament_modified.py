@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0013_score_unique_match_player'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+
+
+def populate_stats(apps, schema_editor):
+    Player = apps.get_model("vr_tournaments", "Player")
+    Score = apps.get_model("vr_tournaments", "Score")
+    Tournament = apps.get_model("vr_tournaments", "Tournament")
+    PlayerTournamentTotal = apps.get_model("vr_tournaments", "PlayerTournamentTotal")
+    PlayerStats = apps.get_model("vr_tournaments", "PlayerStats")
+
+    best_scores = Score.objects.filter(player=OuterRef("pk")).order_by(
+        "-score", "match__date", "pk"
+    )
+    players = Player.objects.order_by("pk").annotate(
+        best_score=Subquery(best_scores.values("score")[:1]),
+        best_match_id=Subquery(best_scores.values("match_id")[:1]),
+    )
+    aggregates = {
+        row["player"]: row
+        for row in PlayerTournamentTotal.objects.order_by()
+        .values("player")
+        .annotate(
+            tournaments_played=Count("pk", filter=Q(matches_played__gt=0)),
+            matches_played=Sum("matches_played"),
+            total_score=Sum("total"),
+        )
+    }
+    wins = dict(
+        Tournament.objects.exclude(winner="")
+        .order_by()
+        .values("winner")
+        .annotate(won=Count("pk"))
+        .values_list("winner", "won")
+    )
+    stats = []
+    for player in players:
+        row = aggregates.get(player.pk, {})
+        stats.append(
+            PlayerStats(
+                player_id=player.pk,
+                tournaments_played=row.get("tournaments_played", 0),
+                tournaments_won=wins.get(player.name, 0),
+                matches_played=row.get("matches_played") or 0,
+                total_score=row.get("total_score") or 0,
+                best_score=player.best_score,
+                best_match_id=player.best_match_id,
+            )
+        )
+    PlayerStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0014_tournament_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='vr_tournaments.player')),
+                ('tournaments_played', models.PositiveIntegerField(default=0)),
+                ('tournaments_won', models.PositiveIntegerField(default=0)),
+                ('matches_played', models.PositiveIntegerField(default=0)),
+                ('total_score', models.IntegerField(default=0)),
+                ('best_score', models.IntegerField(blank=True, null=True)),
+                ('best_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='vr_tournaments.match')),
+            ],
+            options={
+                'verbose_name_plural': 'player stats',
+            },
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
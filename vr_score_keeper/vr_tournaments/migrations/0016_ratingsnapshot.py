@@ -0,0 +1,91 @@
+# Generated by Django 5.1.5 on 2026-10-18 15:51
+
+import django.db.models.deletion
+from itertools import groupby
+from django.db import migrations, models
+
+# A frozen copy of vr_tournaments.ratings as of this migration, so that the
+# snapshots it writes do not change with later edits to the rating rules.
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def expected_result(rating, opponent_rating):
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def rate_match(ratings, scores):
+    if len(scores) < 2:
+        return {}
+    scale = K_FACTOR / (len(scores) - 1)
+    deltas = {}
+    for player, score in scores.items():
+        delta = 0.0
+        for opponent, opponent_score in scores.items():
+            if opponent == player:
+                continue
+            if score > opponent_score:
+                result = 1.0
+            elif score == opponent_score:
+                result = 0.5
+            else:
+                result = 0.0
+            delta += result - expected_result(ratings[player], ratings[opponent])
+        deltas[player] = scale * delta
+    return deltas
+
+
+def replay_ratings(apps, schema_editor):
+    Score = apps.get_model("vr_tournaments", "Score")
+    RatingSnapshot = apps.get_model("vr_tournaments", "RatingSnapshot")
+
+    state = {}
+    snapshots = []
+    rows = Score.objects.order_by("match__date", "match_id").values_list(
+        "match_id", "match__date", "player_id", "score"
+    )
+    for (match_id, date), match_rows in groupby(rows.iterator(), key=lambda row: row[:2]):
+        scores = {player_id: score for _, _, player_id, score in match_rows}
+        ratings = {pk: state.get(pk, (INITIAL_RATING, 0))[0] for pk in scores}
+        for player_id, delta in rate_match(ratings, scores).items():
+            rating = ratings[player_id] + delta
+            matches_rated = state.get(player_id, (INITIAL_RATING, 0))[1] + 1
+            state[player_id] = (rating, matches_rated)
+            snapshots.append(
+                RatingSnapshot(
+                    player_id=player_id,
+                    match_id=match_id,
+                    date=date,
+                    rating=rating,
+                    delta=delta,
+                    matches_rated=matches_rated,
+                )
+            )
+    RatingSnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0015_playerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rating', models.FloatField()),
+                ('delta', models.FloatField()),
+                ('matches_rated', models.PositiveIntegerField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_snapshots', to='vr_tournaments.match')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_snapshots', to='vr_tournaments.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player', 'date', 'match'], name='rating_player_position_idx'), models.Index(fields=['date', 'match'], name='rating_position_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'match'), name='unique_player_match_rating')],
+            },
+        ),
+        migrations.RunPython(replay_ratings, migrations.RunPython.noop),
+    ]
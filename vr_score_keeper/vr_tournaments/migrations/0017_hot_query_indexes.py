@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0016_ratingsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'date', 'id'], name='match_tournament_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='score',
+            index=models.Index(fields=['player', '-score'], name='score_player_best_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['date', 'id'], name='tournament_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('winner', '')), fields=['date', 'id'], name='active_tournament_idx'),
+        ),
+    ]
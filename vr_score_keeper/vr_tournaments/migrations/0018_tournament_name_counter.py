@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 16:19
+
+import re
+from django.db import migrations, models
+
+
+def seed_counter(apps, schema_editor):
+    """
+    Starts the tournament counter where ``Tournament.objects.count() + 1``
+    naming left off, past any "Tournament N" name already taken.
+    """
+    Tournament = apps.get_model("vr_tournaments", "Tournament")
+    Counter = apps.get_model("vr_tournaments", "Counter")
+    taken = [
+        int(re.fullmatch(r"Tournament (\d+)", name).group(1))
+        for name in Tournament.objects.filter(name__regex=r"^Tournament [0-9]+$").values_list(
+            "name", flat=True
+        )
+    ]
+    Counter.objects.create(
+        name="tournament", value=max([Tournament.objects.count(), *taken])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0017_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# The indexes depend on the database, so they are not declared on the model.
+# Each matches the SQL Django generates for name__istartswith and
+# name__icontains on that backend.
+INDEXES = {
+    # LIKE is case-insensitive on SQLite, and can only use a NOCASE index.
+    "sqlite": (
+        [
+            'CREATE INDEX "player_name_prefix_idx" ON "vr_tournaments_player" '
+            '("name" COLLATE NOCASE)',
+        ],
+        ['DROP INDEX "player_name_prefix_idx"'],
+    ),
+    # Lookups compare UPPER(name). text_pattern_ops serves prefix LIKEs in any
+    # locale, and the trigram index serves substring LIKEs.
+    "postgresql": (
+        [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            'CREATE INDEX "player_name_prefix_idx" ON "vr_tournaments_player" '
+            '(UPPER("name"::text) text_pattern_ops)',
+            'CREATE INDEX "player_name_trgm_idx" ON "vr_tournaments_player" '
+            'USING gin (UPPER("name"::text) gin_trgm_ops)',
+        ],
+        ['DROP INDEX "player_name_prefix_idx"', 'DROP INDEX "player_name_trgm_idx"'],
+    ),
+}
+
+
+def create_indexes(apps, schema_editor):
+    for statement in INDEXES.get(schema_editor.connection.vendor, ([], []))[0]:
+        schema_editor.execute(statement)
+
+
+def drop_indexes(apps, schema_editor):
+    for statement in INDEXES.get(schema_editor.connection.vendor, ([], []))[1]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vr_tournaments', '0018_tournament_name_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
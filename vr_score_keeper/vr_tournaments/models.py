@@ -1,30 +1,264 @@
+from itertools import groupby
+from typing import NamedTuple
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Now, Upper
+from .live import broadcaster
+from .ratings import INITIAL_RATING, rate_match
+
+
+class Standing(NamedTuple):
+    """A registered player's total score in a tournament."""
+
+    player: "Player"
+    total: int
+
+
+class TournamentQuerySet(models.QuerySet):
+    def bump_version(self):
+        """
+        Increments the version stamp and modification time of every tournament in
+        the queryset.
+
+        Must be called by every write that changes what a tournament card shows,
+        since cached cards and standings are keyed on the version. Live
+        standings streams are woken once the write commits.
+        """
+        transaction.on_commit(broadcaster.notify)
+        return self.update(version=F("version") + 1, modified=Now())
+
+    def standings(self):
+        """
+        Returns the standings of every tournament in the queryset.
+
+        The totals for all registered players of all tournaments are read from
+        ``PlayerTournamentTotal`` in a single query, so the cost does not grow
+        with the number of tournaments or matches.
+
+        :return: A dict mapping tournament pk to a list of ``Standing`` tuples,
+                 in registration order.
+        """
+        return self._group_standings(self._standing_rows())
+
+    async def astandings(self):
+        """Asynchronous version of ``standings()``."""
+        return self._group_standings([row async for row in self._standing_rows().aiterator()])
+
+    def _standing_rows(self):
+        return (
+            PlayerTournamentTotal.objects.filter(tournament__in=self)
+            .select_related("player")
+            .order_by("tournament_id", "pk")
+        )
+
+    @staticmethod
+    def _group_standings(rows):
+        standings = {}
+        for row in rows:
+            standings.setdefault(row.tournament_id, []).append(
+                Standing(row.player, row.total)
+            )
+        return standings
+
+
+class CounterManager(models.Manager):
+    def next_value(self, name):
+        """
+        Increments the named counter and returns its new value.
+
+        The increment is a single UPDATE, which locks the row until the
+        transaction ends, so concurrent callers always get distinct values.
+
+        :param name: The counter's name, one of the ``Counter`` constants.
+        :return: The new value.
+        """
+        with transaction.atomic():
+            if not self.filter(name=name).update(value=F("value") + 1):
+                try:
+                    with transaction.atomic():
+                        self.create(name=name, value=1)
+                except IntegrityError:
+                    # Created concurrently since the update.
+                    self.filter(name=name).update(value=F("value") + 1)
+            return self.filter(name=name).values_list("value", flat=True).get()
+
+    def peek(self, name):
+        """Returns the counter's current value, without incrementing it."""
+        return self.filter(name=name).values_list("value", flat=True).first() or 0
+
+
+class Counter(models.Model):
+    """
+    A named counter, incremented atomically.
+
+    ``TOURNAMENT`` numbers the automatic tournament names, so naming does not
+    count the tournament table and never repeats a name.
+    """
+
+    TOURNAMENT = "tournament"
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    objects = CounterManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
 
 
 class Tournament(models.Model):
     """
     Represents a single tournament with a date and an optional name.
 
-    The name is automatically set to a string like "Tournament 1" if not set.
+    The name is automatically set to a string like "Tournament 1" if not set,
+    numbered by the ``Counter.TOURNAMENT`` counter.
     """
 
     date = models.DateField(default=timezone.localdate)
     name = models.CharField(max_length=255, blank=True)
     winner = models.CharField(max_length=255, blank=True)
     points_to_win = models.IntegerField(default=0)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    modified = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = TournamentQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.name:
-            self.name = f"Tournament {Tournament.objects.count() + 1}"
+            self.name = f"Tournament {Counter.objects.next_value(Counter.TOURNAMENT)}"
+        if not self._state.adding:
+            self.version = F("version") + 1
+            self.modified = timezone.now()
+            transaction.on_commit(broadcaster.notify)
         super().save(*args, **kwargs)
+        if not isinstance(self.version, int):
+            self.refresh_from_db(fields=["version"])
 
     def __str__(self):
         return self.name
 
+    def resolve_winner(self):
+        """
+        Declares the leading player the winner once they reach ``points_to_win``.
+
+        Called when scores are submitted, and when ``points_to_win`` is lowered.
+        Only players who have played a match can win, so registering the first
+        players, while ``points_to_win`` is still 0, declares no winner. The
+        winner is set with a conditional update, so when scores are submitted
+        concurrently only one submission can declare a winner.
+
+        :return: True if this call declared the winner.
+        """
+        if self.winner:
+            return False
+        leader = (
+            self.player_totals.filter(total__gte=self.points_to_win, matches_played__gt=0)
+            .select_related("player")
+            .order_by("-total", "pk")
+            .first()
+        )
+        if leader is None:
+            return False
+        declared = Tournament.objects.filter(pk=self.pk, winner="").update(
+            winner=leader.player.name, version=F("version") + 1, modified=Now()
+        )
+        if declared:
+            self.winner = leader.player.name
+            PlayerStats.objects.refresh([leader.player_id])
+            transaction.on_commit(broadcaster.notify)
+        return bool(declared)
+
+    def update_registrations(self, add=(), remove=()):
+        """
+        Registers and unregisters players in one transaction, and recomputes
+        ``points_to_win`` once, as 10 points per opponent. When it is lowered,
+        the leader may have reached it, so the winner is resolved again.
+
+        The diff is written with one bulk insert and one bulk delete on the
+        through table, bypassing ``m2m_changed``, and the totals of all the
+        players in it are then synced together, so the number of queries does
+        not grow with the number of players.
+
+        :param add: The pks of the players to register.
+        :param remove: The pks of the players to unregister.
+        :return: The pks of the registered players, in ascending order.
+        """
+        registrations = Player.tournaments.through
+        add, remove = set(add), set(remove) - set(add)
+        with transaction.atomic():
+            if remove:
+                registrations.objects.filter(tournament_id=self.pk, player_id__in=remove).delete()
+            if add:
+                registrations.objects.bulk_create(
+                    [registrations(tournament_id=self.pk, player_id=pk) for pk in add],
+                    ignore_conflicts=True,
+                )
+            if add or remove:
+                PlayerTournamentTotal.objects.rebuild(
+                    tournament_ids=[self.pk], player_ids=add | remove
+                )
+            registered = list(self.players.order_by("pk").values_list("pk", flat=True))
+            previous_points_to_win = self.points_to_win
+            self.points_to_win = max(0, (len(registered) - 1) * 10)
+            self.save(update_fields=["points_to_win", "version", "modified"])
+            if self.points_to_win < previous_points_to_win:
+                self.resolve_winner()
+        return registered
+
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # Tournament lists and keyset pages, newest first.
+            models.Index(fields=["date", "id"], name="tournament_date_idx"),
+            # The active tournaments on the dashboard, a small slice of the table.
+            models.Index(
+                fields=["date", "id"], condition=Q(winner=""), name="active_tournament_idx"
+            ),
+        ]
+
+
+class PlayerQuerySet(models.QuerySet):
+    def search(self, term, offset=0, limit=20):
+        """
+        Finds players whose name contains the term, ignoring case. Names that
+        start with the term come first, then the other matches, each in
+        case-insensitive order of name.
+
+        Prefix matches are read first, through the case-insensitive name
+        index, and substring matches only when the prefix matches do not fill
+        the page, so the common case of typing the start of a name stays
+        indexed.
+
+        :param term: The text to search for. A blank term matches everyone.
+        :param offset: The number of matches to skip.
+        :param limit: The maximum number of players to return.
+        :return: A list of up to ``limit`` players, and whether more follow.
+        """
+        term = term.strip()
+        prefix = self.filter(name__istartswith=term).order_by(Upper("name"), "pk")
+        players = list(prefix[offset : offset + limit + 1])
+        if term and len(players) <= limit:
+            # All prefix matches are read, so the substring matches follow.
+            skipped = offset - prefix.count() if not players and offset else 0
+            players += (
+                self.filter(name__icontains=term)
+                .exclude(name__istartswith=term)
+                .order_by(Upper("name"), "pk")[skipped : skipped + limit + 1 - len(players)]
+            )
+        return players[:limit], len(players) > limit
 
 
 class Player(models.Model):
@@ -38,6 +272,8 @@ class Player(models.Model):
     tournaments = models.ManyToManyField(Tournament, related_name="players")
     # Add any other relevant fields for the player
 
+    objects = PlayerQuerySet.as_manager()
+
     def __str__(self):
         return str(self.name)
 
@@ -60,6 +296,10 @@ class Match(models.Model):
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            # The match history of a tournament, newest first.
+            models.Index(fields=["tournament", "date", "id"], name="match_tournament_date_idx"),
+        ]
 
 
 class Score(models.Model):
@@ -81,3 +321,501 @@ class Score(models.Model):
     def clean(self):
         if self.score < 0:
             raise ValidationError("Score cannot be negative.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["match", "player"], name="unique_match_player_score"
+            )
+        ]
+        indexes = [
+            # A player's best score, for their career statistics.
+            models.Index(fields=["player", "-score"], name="score_player_best_idx"),
+        ]
+
+
+class PlayerTournamentTotalManager(models.Manager):
+    def expected(self, tournament_ids=None, player_ids=None):
+        """
+        Computes the totals of registered players from the ``Score`` table.
+
+        :return: A list of unsaved ``PlayerTournamentTotal`` instances.
+        """
+        registrations = Player.tournaments.through.objects.order_by("pk")
+        scores = Score.objects.order_by()
+        if tournament_ids is not None:
+            registrations = registrations.filter(tournament_id__in=tournament_ids)
+            scores = scores.filter(match__tournament_id__in=tournament_ids)
+        if player_ids is not None:
+            registrations = registrations.filter(player_id__in=player_ids)
+            scores = scores.filter(player_id__in=player_ids)
+
+        aggregates = {
+            (row["match__tournament"], row["player"]): row
+            for row in scores.values("match__tournament", "player").annotate(
+                total=Sum("score"),
+                matches_played=Count("pk"),
+                last_match_date=Max("match__date"),
+            )
+        }
+        totals = []
+        for tournament_id, player_id in registrations.values_list(
+            "tournament_id", "player_id"
+        ):
+            row = aggregates.get((tournament_id, player_id), {})
+            totals.append(
+                self.model(
+                    tournament_id=tournament_id,
+                    player_id=player_id,
+                    total=row.get("total", 0),
+                    matches_played=row.get("matches_played", 0),
+                    last_match_date=row.get("last_match_date"),
+                )
+            )
+        return totals
+
+    def rebuild(self, tournament_ids=None, player_ids=None):
+        """
+        Replaces the stored totals with totals recomputed from the ``Score`` table,
+        and refreshes the career statistics of the affected players.
+
+        :return: The number of rows written.
+        """
+        with transaction.atomic():
+            affected = self._discard(tournament_ids, player_ids)
+            totals = self.bulk_create(self.expected(tournament_ids, player_ids))
+            if tournament_ids is None and player_ids is None:
+                PlayerStats.objects.refresh()
+            else:
+                affected.update(total.player_id for total in totals)
+                PlayerStats.objects.refresh(affected)
+        return len(totals)
+
+    def discard(self, tournament_ids=None, player_ids=None):
+        """
+        Deletes the stored totals of the given tournaments and players, and
+        refreshes the career statistics of their players.
+        """
+        PlayerStats.objects.refresh(self._discard(tournament_ids, player_ids))
+
+    def _discard(self, tournament_ids, player_ids):
+        """
+        Deletes the stored totals of the given tournaments and players.
+
+        :return: The set of players whose totals were deleted.
+        """
+        stale = self.all()
+        if tournament_ids is not None:
+            stale = stale.filter(tournament_id__in=tournament_ids)
+        if player_ids is not None:
+            stale = stale.filter(player_id__in=player_ids)
+        affected = set(stale.values_list("player_id", flat=True))
+        stale.delete()
+        return affected
+
+    def apply_scores(self, match, scores, previous=None):
+        """
+        Adds the scores of a match to the totals in a single UPDATE.
+
+        :param match: The scored match.
+        :param scores: A dict mapping player pk to the new score.
+        :param previous: A dict mapping player pk to the score it replaces, for
+                         players that already had a score in this match.
+        """
+        previous = previous or {}
+        if not scores:
+            return
+        new_player_ids = [pk for pk in scores if pk not in previous]
+        matches_played = F("matches_played")
+        if new_player_ids:
+            matches_played += Case(
+                When(player_id__in=new_player_ids, then=Value(1)), default=Value(0)
+            )
+        match_date = Value(match.date, output_field=models.DateField())
+        self.filter(tournament_id=match.tournament_id, player_id__in=scores).update(
+            total=F("total")
+            + Case(
+                *[
+                    When(player_id=pk, then=Value(points - previous.get(pk, 0)))
+                    for pk, points in scores.items()
+                ],
+                default=Value(0),
+            ),
+            matches_played=matches_played,
+            last_match_date=Greatest(
+                Coalesce(F("last_match_date"), match_date), match_date
+            ),
+        )
+        PlayerStats.objects.refresh(scores)
+
+    def revert_scores(self, match, scores):
+        """
+        Removes the scores of a deleted match from the totals in a single UPDATE.
+
+        Must be called after the match has been deleted, so the last match date
+        can be recomputed from the remaining scores.
+
+        :param match: The deleted match.
+        :param scores: A dict mapping player pk to the score that was removed.
+        """
+        if not scores:
+            return
+        last_match_dates = (
+            Score.objects.filter(
+                player=OuterRef("player_id"), match__tournament=OuterRef("tournament_id")
+            )
+            .order_by("-match__date")
+            .values("match__date")[:1]
+        )
+        self.filter(tournament_id=match.tournament_id, player_id__in=scores).update(
+            total=F("total")
+            - Case(
+                *[When(player_id=pk, then=Value(points)) for pk, points in scores.items()],
+                default=Value(0),
+            ),
+            matches_played=F("matches_played") - 1,
+            last_match_date=Subquery(last_match_dates),
+        )
+        PlayerStats.objects.refresh(scores)
+
+
+class PlayerTournamentTotal(models.Model):
+    """
+    Denormalized total score of a registered player in a tournament.
+
+    A row exists for every player registration and is kept in step with the
+    ``Score`` table by every write path, so standings never re-sum scores.
+    """
+
+    tournament = models.ForeignKey(
+        Tournament, on_delete=models.CASCADE, related_name="player_totals"
+    )
+    player = models.ForeignKey(
+        Player, on_delete=models.CASCADE, related_name="tournament_totals"
+    )
+    total = models.IntegerField(default=0)
+    matches_played = models.IntegerField(default=0)
+    last_match_date = models.DateField(null=True, blank=True)
+
+    objects = PlayerTournamentTotalManager()
+
+    def __str__(self):
+        return f"{self.player.name} - {self.tournament.name}: {self.total}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tournament", "player"], name="unique_player_tournament_total"
+            )
+        ]
+
+
+class PlayerStatsManager(models.Manager):
+    def expected(self, player_ids=None):
+        """
+        Computes the career statistics of players from their tournament totals,
+        the tournament winners and their best score.
+
+        Each statistic is read with one grouped query for all players.
+
+        :return: A list of unsaved ``PlayerStats`` instances.
+        """
+        players = Player.objects.order_by("pk")
+        totals = PlayerTournamentTotal.objects.order_by()
+        if player_ids is not None:
+            players = players.filter(pk__in=player_ids)
+            totals = totals.filter(player_id__in=player_ids)
+
+        best_scores = Score.objects.filter(player=OuterRef("pk")).order_by(
+            "-score", "match__date", "pk"
+        )
+        players = {
+            row["pk"]: row
+            for row in players.annotate(
+                best_score=Subquery(best_scores.values("score")[:1]),
+                best_match_id=Subquery(best_scores.values("match_id")[:1]),
+            ).values("pk", "name", "best_score", "best_match_id")
+        }
+        aggregates = {
+            row["player"]: row
+            for row in totals.values("player").annotate(
+                tournaments_played=Count("pk", filter=Q(matches_played__gt=0)),
+                matches_played=Sum("matches_played"),
+                total_score=Sum("total"),
+            )
+        }
+        # Winners are stored by name.
+        names = {row["name"]: pk for pk, row in players.items()}
+        winners = Tournament.objects.exclude(winner="").order_by()
+        if player_ids is not None:
+            winners = winners.filter(winner__in=names)
+        wins = {
+            names[row["winner"]]: row["won"]
+            for row in winners.values("winner").annotate(won=Count("pk"))
+            if row["winner"] in names
+        }
+
+        stats = []
+        for player_id, player in players.items():
+            row = aggregates.get(player_id, {})
+            stats.append(
+                self.model(
+                    player_id=player_id,
+                    tournaments_played=row.get("tournaments_played", 0),
+                    tournaments_won=wins.get(player_id, 0),
+                    matches_played=row.get("matches_played") or 0,
+                    total_score=row.get("total_score") or 0,
+                    best_score=player["best_score"],
+                    best_match_id=player["best_match_id"],
+                )
+            )
+        return stats
+
+    def refresh(self, player_ids=None):
+        """
+        Recomputes and stores the career statistics of the given players, or of
+        every player, in a single upsert.
+
+        Must be called by every write that changes a player's totals or declares
+        a winner.
+
+        :return: The number of rows written.
+        """
+        if player_ids is not None:
+            player_ids = list(player_ids)
+            if not player_ids:
+                return 0
+        stats = self.expected(player_ids)
+        self.bulk_create(
+            stats,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["player"],
+            update_fields=[
+                "tournaments_played",
+                "tournaments_won",
+                "matches_played",
+                "total_score",
+                "best_score",
+                "best_match",
+            ],
+        )
+        return len(stats)
+
+
+class PlayerStats(models.Model):
+    """
+    Materialized career statistics of a player.
+
+    Kept in step with the player's tournament totals and the tournament winners
+    by every write path, so the player page never scans the ``Score`` table.
+    """
+
+    player = models.OneToOneField(
+        Player, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    tournaments_played = models.PositiveIntegerField(default=0)
+    tournaments_won = models.PositiveIntegerField(default=0)
+    matches_played = models.PositiveIntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+    best_score = models.IntegerField(null=True, blank=True)
+    best_match = models.ForeignKey(
+        Match, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    objects = PlayerStatsManager()
+
+    def __str__(self):
+        return f"{self.player.name} career statistics"
+
+    @property
+    def average_score(self):
+        """The average score per match played, or None before the first match."""
+        if not self.matches_played:
+            return None
+        return self.total_score / self.matches_played
+
+    @property
+    def win_rate(self):
+        """The share of tournaments played that the player won, or None."""
+        if not self.tournaments_played:
+            return None
+        return self.tournaments_won / self.tournaments_played
+
+    class Meta:
+        verbose_name_plural = "player stats"
+
+
+class RatingSnapshotManager(models.Manager):
+    def rated_players(self, before=None):
+        """
+        Annotates every rated player with their ``rating``, ``matches_rated`` and
+        last rating change ``delta``, read from their latest snapshot.
+
+        :param before: Only consider matches before this (date, match pk).
+        """
+        latest = self.filter(player=OuterRef("pk"))
+        if before is not None:
+            latest = latest.exclude(self._at_or_after(before))
+        latest = latest.order_by("-date", "-match_id")
+        return Player.objects.annotate(
+            rating=Subquery(latest.values("rating")[:1]),
+            matches_rated=Subquery(latest.values("matches_rated")[:1]),
+            delta=Subquery(latest.values("delta")[:1]),
+        ).filter(rating__isnull=False)
+
+    def current(self, before=None, player_ids=None):
+        """
+        Returns the latest rating of players.
+
+        :param before: Only consider matches before this (date, match pk).
+        :param player_ids: Only return these players. Defaults to every player.
+        :return: A dict mapping player pk to a ``(rating, matches_rated)`` pair,
+                 for the players that have been rated.
+        """
+        players = self.rated_players(before).order_by()
+        if player_ids is not None:
+            players = players.filter(pk__in=player_ids)
+        return {
+            pk: (rating, matches_rated)
+            for pk, rating, matches_rated in players.values_list(
+                "pk", "rating", "matches_rated"
+            )
+        }
+
+    @staticmethod
+    def earliest(matches):
+        """
+        Returns the (date, pk) position of the earliest of the given matches,
+        or None if there are none.
+        """
+        return matches.order_by("date", "pk").values_list("date", "pk").first()
+
+    @staticmethod
+    def _at_or_after(position, date_field="date"):
+        """Builds a filter for rows at or after a (date, match pk) position."""
+        date, match_id = position
+        return Q(**{f"{date_field}__gt": date}) | Q(
+            **{date_field: date, "match_id__gte": match_id}
+        )
+
+    def _snapshots(self, match_id, date, scores, state):
+        """
+        Rates one match against the ratings in ``state``, and updates them.
+
+        :return: A list of unsaved snapshots, one per player in the match.
+        """
+        ratings = {pk: state.get(pk, (INITIAL_RATING, 0))[0] for pk in scores}
+        deltas = rate_match(ratings, scores)
+        snapshots = []
+        for player_id, delta in deltas.items():
+            rating = ratings[player_id] + delta
+            matches_rated = state.get(player_id, (INITIAL_RATING, 0))[1] + 1
+            state[player_id] = (rating, matches_rated)
+            snapshots.append(
+                self.model(
+                    player_id=player_id,
+                    match_id=match_id,
+                    date=date,
+                    rating=rating,
+                    delta=delta,
+                    matches_rated=matches_rated,
+                )
+            )
+        return snapshots
+
+    def rate(self, match):
+        """
+        Rates a newly scored match.
+
+        Matches scored after the latest rated match are rated incrementally
+        from their players' latest snapshots. A back-dated match, or a match
+        whose scores changed, replays the history from that match on.
+
+        :return: The number of snapshots written.
+        """
+        with transaction.atomic():
+            position = (match.date, match.pk)
+            if self.filter(self._at_or_after(position)).exists():
+                return self.replay(since=position)
+            scores = dict(match.scores.values_list("player_id", "score"))
+            if len(scores) < 2:
+                return 0
+            state = self.current(player_ids=scores)
+            return len(self.bulk_create(self._snapshots(match.pk, match.date, scores, state)))
+
+    def replay(self, since=None):
+        """
+        Recomputes the snapshots of every match from the given position on, in
+        (date, match pk) order, starting from the ratings just before it.
+
+        Must be called after matches or scores are deleted or rewritten, with
+        the position of the earliest affected match.
+
+        :param since: The (date, match pk) to replay from. Defaults to the
+                      whole history.
+        :return: The number of snapshots written.
+        """
+        with transaction.atomic():
+            stale = self.all()
+            scores = Score.objects.all()
+            if since is not None:
+                stale = stale.filter(self._at_or_after(since))
+                scores = scores.filter(self._at_or_after(since, date_field="match__date"))
+            stale.delete()
+            state = self.current(before=since) if since is not None else {}
+
+            rows = scores.order_by("match__date", "match_id").values_list(
+                "match_id", "match__date", "player_id", "score"
+            )
+            written = 0
+            snapshots = []
+            for (match_id, date), match_rows in groupby(
+                rows.iterator(chunk_size=2000), key=lambda row: row[:2]
+            ):
+                match_scores = {player_id: score for _, _, player_id, score in match_rows}
+                snapshots.extend(self._snapshots(match_id, date, match_scores, state))
+                if len(snapshots) >= 1000:
+                    written += len(self.bulk_create(snapshots))
+                    snapshots = []
+            written += len(self.bulk_create(snapshots))
+        return written
+
+
+class RatingSnapshot(models.Model):
+    """
+    A player's rating after a match, as computed by ``ratings.rate_match``.
+
+    Snapshots are written in (date, match pk) order, so a player's current
+    rating is their latest snapshot.
+    """
+
+    player = models.ForeignKey(
+        Player, on_delete=models.CASCADE, related_name="rating_snapshots"
+    )
+    match = models.ForeignKey(
+        Match, on_delete=models.CASCADE, related_name="rating_snapshots"
+    )
+    # Copied from the match, so the latest snapshot is found with one index.
+    date = models.DateField()
+    rating = models.FloatField()
+    delta = models.FloatField()
+    matches_rated = models.PositiveIntegerField()
+
+    objects = RatingSnapshotManager()
+
+    def __str__(self):
+        return f"{self.player.name} after match {self.match_id}: {self.rating:.0f}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["player", "match"], name="unique_player_match_rating"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["player", "date", "match"], name="rating_player_position_idx"
+            ),
+            models.Index(fields=["date", "match"], name="rating_position_idx"),
+        ]
@@ -0,0 +1,125 @@
+"""
+Group membership checks that cost one query per request at most.
+
+The names of a user's groups are loaded once and memoized on the user object,
+which lives as long as the request, so decorators, views and the ``has_group``
+template filter can check membership any number of times.
+
+With ``GROUP_NAMES_IN_SESSION``, ``GroupMembershipMiddleware`` also keeps the
+names in the session, so later requests check membership without a query.
+Sessions are tagged with a membership version kept in the cache, which every
+change to group memberships, names or groups bumps, so stale names are
+reloaded. The version must be seen by every worker process, so the
+``group_names_cache`` check refuses a cache kept in each process.
+"""
+
+import time
+from django.conf import settings
+from django.contrib.auth.middleware import get_user
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+POWERUSER_GROUP = "powerUser"
+SESSION_KEY = "_group_names"
+VERSION_KEY = "group_membership_version"
+
+# Cache backends whose entries are only seen by the process that wrote them.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def group_names(user):
+    """Returns the names of the user's groups, loading them once per user object."""
+    if not user.is_authenticated:
+        return frozenset()
+    names = getattr(user, "_group_names", None)
+    if names is None:
+        names = user._group_names = frozenset(user.groups.values_list("name", flat=True))
+        session = getattr(user, "_group_session", None)
+        if session is not None:
+            session[SESSION_KEY] = {
+                "user": user.pk,
+                "version": membership_version(),
+                "names": sorted(names),
+            }
+    return names
+
+
+def has_group(user, name):
+    return name in group_names(user)
+
+
+def is_superuser(user):
+    """Checks if the given user has superuser privileges."""
+    return user.is_superuser
+
+
+def is_poweruser(user):
+    """Checks if the given user has poweruser privileges."""
+    return user.is_superuser or has_group(user, POWERUSER_GROUP)
+
+
+def membership_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def invalidate_group_names():
+    """Makes every session reload its group names. Called when memberships change."""
+    cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def attach_session(user, session):
+    """Memoizes the group names kept in the session on the user, if still valid,
+    and keeps the session to store freshly loaded names in."""
+    if not user.is_authenticated:
+        return user
+    stored = session.get(SESSION_KEY)
+    if stored and stored["user"] == user.pk and stored["version"] == membership_version():
+        user._group_names = frozenset(stored["names"])
+    user._group_session = session
+    return user
+
+
+@checks.register(checks.Tags.caches)
+def group_names_cache(app_configs, **kwargs):
+    """Refuses ``GROUP_NAMES_IN_SESSION`` unless the default cache is shared
+    between processes, as a membership change in one worker would otherwise
+    leave stale group names in the sessions served by the others."""
+    if not settings.GROUP_NAMES_IN_SESSION:
+        return []
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"]
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        checks.Error(
+            f"GROUP_NAMES_IN_SESSION requires a cache shared between processes, "
+            f"but the default cache is {backend}.",
+            hint="Set CACHE_BACKEND=file, or turn GROUP_NAMES_IN_SESSION off.",
+            id="vr_tournaments.E001",
+        )
+    ]
+
+
+class GroupMembershipMiddleware(MiddlewareMixin):
+    """
+    Keeps the names of the user's groups in the session, when
+    ``GROUP_NAMES_IN_SESSION`` is set. Must follow ``AuthenticationMiddleware``.
+    """
+
+    def process_request(self, request):
+        if not settings.GROUP_NAMES_IN_SESSION:
+            return
+        auser = request.auser
+        request.user = SimpleLazyObject(
+            lambda: attach_session(get_user(request), request.session)
+        )
+
+        async def load_user():
+            # The session is already loaded by the time the user is.
+            return attach_session(await auser(), request.session)
+
+        request.auser = load_user
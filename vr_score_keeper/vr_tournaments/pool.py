@@ -0,0 +1,160 @@
+"""
+Metrics of the PostgreSQL connection pool.
+
+With ``DATABASE_POOL=1``, production connections to PostgreSQL are borrowed
+from a psycopg pool kept by each worker process, instead of being opened by
+each thread. ``pool_metrics`` reports the size, utilization and wait times of
+the pools of this process in the Prometheus text format, and
+``database_pool_metrics`` serves them to monitoring at ``/metrics/database-pool/``
+with the ``POOL_METRICS_TOKEN`` bearer token.
+"""
+
+import hmac
+import logging
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "vr_db_pool"
+
+# The metrics read from ``ConnectionPool.get_stats()``: name, type,
+# description, stats key and the scale from the stats unit to the metric's.
+# Counters are totals since the worker process started.
+POOL_METRICS = (
+    ("min_size", "gauge", "Connections the pool keeps open.", "pool_min", 1),
+    ("max_size", "gauge", "Connections the pool may open.", "pool_max", 1),
+    ("connections", "gauge", "Connections currently open.", "pool_size", 1),
+    ("available", "gauge", "Open connections not lent to a request.", "pool_available", 1),
+    ("requests_waiting", "gauge", "Requests waiting for a connection.", "requests_waiting", 1),
+    ("requests_total", "counter", "Connections requested from the pool.", "requests_num", 1),
+    (
+        "requests_queued_total",
+        "counter",
+        "Requests that had to wait for a connection.",
+        "requests_queued",
+        1,
+    ),
+    (
+        "wait_seconds_total",
+        "counter",
+        "Time requests spent waiting for a connection.",
+        "requests_wait_ms",
+        0.001,
+    ),
+    (
+        "request_errors_total",
+        "counter",
+        "Requests that timed out waiting for a connection.",
+        "requests_errors",
+        1,
+    ),
+    ("usage_seconds_total", "counter", "Time connections were lent out.", "usage_ms", 0.001),
+    (
+        "bad_returns_total",
+        "counter",
+        "Connections returned broken or inside a transaction.",
+        "returns_bad",
+        1,
+    ),
+    (
+        "connections_lost_total",
+        "counter",
+        "Connections found broken by the health check.",
+        "connections_lost",
+        1,
+    ),
+    (
+        "connection_errors_total",
+        "counter",
+        "Failed attempts to open a connection.",
+        "connections_errors",
+        1,
+    ),
+)
+
+
+def pool_stats(alias):
+    """
+    Reads the counters of the connection pool of a database.
+
+    :param alias: The alias of the database in ``DATABASES``.
+    :return: The stats of ``ConnectionPool.get_stats()``, or None when the
+             database is not pooled.
+    """
+    pool = getattr(connections[alias], "pool", None)
+    return pool.get_stats() if pool is not None else None
+
+
+def utilization(stats):
+    """Returns the share of the pool's maximum size lent out to requests."""
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    return in_use / stats["pool_max"] if stats.get("pool_max") else 0.0
+
+
+def pool_metrics(stats_by_alias):
+    """
+    Formats pool stats in the Prometheus text exposition format.
+
+    :param stats_by_alias: The stats of each database by alias, None for the
+                           databases that are not pooled.
+    :return: The metrics, one sample per line, labelled with the database.
+    """
+    pooled = {alias: stats for alias, stats in stats_by_alias.items() if stats is not None}
+    families = [
+        (
+            "enabled",
+            "gauge",
+            "Whether connections are taken from a pool.",
+            {alias: int(stats is not None) for alias, stats in stats_by_alias.items()},
+        ),
+        (
+            "utilization",
+            "gauge",
+            "Share of the maximum size lent out to requests.",
+            {alias: utilization(stats) for alias, stats in pooled.items()},
+        ),
+    ]
+    for name, metric_type, description, key, scale in POOL_METRICS:
+        families.append(
+            (
+                name,
+                metric_type,
+                description,
+                {alias: stats.get(key, 0) * scale for alias, stats in pooled.items()},
+            )
+        )
+
+    lines = []
+    for name, metric_type, description, samples in families:
+        if not samples:
+            continue
+        lines.append(f"# HELP {PREFIX}_{name} {description}")
+        lines.append(f"# TYPE {PREFIX}_{name} {metric_type}")
+        for alias, value in samples.items():
+            lines.append(f'{PREFIX}_{name}{{database="{alias}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+def database_pool_metrics(request):
+    """
+    Serves the connection pool metrics of this worker process to monitoring.
+
+    The endpoint is disabled unless ``POOL_METRICS_TOKEN`` is set, and then
+    requires it as a bearer token in the ``Authorization`` header.
+
+    :param request: The HTTP request object.
+    :return: The metrics as ``text/plain`` in the Prometheus format.
+    """
+    token = settings.POOL_METRICS_TOKEN
+    if not token:
+        raise Http404("Pool metrics are disabled.")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        logger.warning(f"Rejected pool metrics request from {request.META.get('REMOTE_ADDR')}.")
+        response = HttpResponse("Invalid token.", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+    metrics = pool_metrics({alias: pool_stats(alias) for alias in connections})
+    return HttpResponse(metrics, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,48 @@
+"""
+Multiplayer Elo ratings.
+
+A free-for-all match is rated as a round robin of head-to-head results: every
+player is compared with every other player in the match, scoring a win, a draw
+or a loss against them by match score. The rating change is the usual Elo
+update over those comparisons, scaled by the number of opponents so that a
+match moves a rating about as much as a single two-player game.
+"""
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def expected_result(rating, opponent_rating):
+    """Returns the probability that a player beats an opponent, from 0 to 1."""
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+
+def rate_match(ratings, scores):
+    """
+    Rates a free-for-all match.
+
+    :param ratings: A dict mapping each player in the match to their rating
+                    before the match.
+    :param scores: A dict mapping each player in the match to their score.
+                   Higher scores beat lower scores.
+    :return: A dict mapping each player to their rating change. Empty if fewer
+             than two players took part.
+    """
+    if len(scores) < 2:
+        return {}
+    scale = K_FACTOR / (len(scores) - 1)
+    deltas = {}
+    for player, score in scores.items():
+        delta = 0.0
+        for opponent, opponent_score in scores.items():
+            if opponent == player:
+                continue
+            if score > opponent_score:
+                result = 1.0
+            elif score == opponent_score:
+                result = 0.5
+            else:
+                result = 0.0
+            delta += result - expected_result(ratings[player], ratings[opponent])
+        deltas[player] = scale * delta
+    return deltas
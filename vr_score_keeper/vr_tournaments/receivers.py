@@ -1,6 +1,12 @@
 import logging
+from django.conf import settings
+from django.contrib.auth.models import Group, User
 from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from .models import Player, PlayerTournamentTotal, Tournament
+from .permissions import invalidate_group_names
 
 logger = logging.getLogger(__name__)
 
@@ -17,3 +23,58 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
     Logs failed user login attempts.
     """
     logger.warning(f"Failed login attempt for username: '{credentials.get('username')}'.")
+
+@receiver(m2m_changed, sender=Player.tournaments.through)
+def sync_player_tournament_totals(sender, instance, action, pk_set, **kwargs):
+    """
+    Keeps a PlayerTournamentTotal row for every player registration, and bumps
+    the version of every tournament whose registrations changed.
+
+    Registrations can be changed from either side of the relation, e.g.
+    ``player.tournaments.add()`` in the registration view or
+    ``tournament.players.add()`` when a tournament is created.
+    """
+    if action == "pre_clear":
+        # The cleared tournaments are only known before the clear, so their
+        # cards are invalidated here.
+        if isinstance(instance, Player):
+            instance.tournaments.all().bump_version()
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if isinstance(instance, Player):
+        filters = {"player_ids": [instance.pk], "tournament_ids": pk_set}
+        if pk_set:
+            Tournament.objects.filter(pk__in=pk_set).bump_version()
+    else:
+        filters = {"tournament_ids": [instance.pk], "player_ids": pk_set}
+        Tournament.objects.filter(pk=instance.pk).bump_version()
+
+    if action == "post_add":
+        PlayerTournamentTotal.objects.rebuild(**filters)
+    else:
+        PlayerTournamentTotal.objects.discard(**filters)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_session_group_names(sender, **kwargs):
+    """
+    Makes sessions reload the group names they keep when group memberships or
+    groups change.
+    """
+    action = kwargs.get("action")
+    if action is None or action.startswith("post_"):
+        invalidate_group_names()
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Applies ``SQLITE_PRAGMAS`` to every new SQLite connection when
+    ``SQLITE_PRODUCTION`` is set.
+    """
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRODUCTION:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -0,0 +1,101 @@
+// Player autocomplete for the tournament forms. Results are fetched a page at
+// a time from the player_search endpoint, and checked players are kept apart
+// from the results, so a new search does not drop them.
+document.addEventListener('DOMContentLoaded', () => {
+    function showChecked(cb) {
+        const label = cb.closest('.player-btn-label');
+        const icon = label.querySelector('.check-icon i');
+        label.classList.toggle('is-info', cb.checked);
+        icon.className = cb.checked ? "fas fa-check-circle has-text-info" : "far fa-circle has-text-grey-light";
+    }
+
+    function playerLabel(player, inputName) {
+        const label = document.createElement('label');
+        label.className = 'player-btn-label mb-3';
+        const name = document.createElement('span');
+        name.className = 'is-size-5 has-text-weight-semibold';
+        name.textContent = player.name;
+        const cb = document.createElement('input');
+        cb.type = 'checkbox';
+        cb.name = inputName;
+        cb.value = player.id;
+        cb.className = 'player-checkbox is-hidden';
+        const icon = document.createElement('span');
+        icon.className = 'icon check-icon has-text-grey-light';
+        icon.innerHTML = '<i class="far fa-circle"></i>';
+        label.append(name, cb, icon);
+        return label;
+    }
+
+    // Every player checkbox on the page shows its state, including those
+    // added by searches.
+    document.addEventListener('change', (event) => {
+        if (event.target.matches('.player-btn-label .player-checkbox')) {
+            showChecked(event.target);
+        }
+    });
+
+    document.querySelectorAll('.player-search').forEach(search => {
+        const input = search.querySelector('.player-search-input');
+        const selected = search.querySelector('.player-search-selected');
+        const results = search.querySelector('.player-search-results');
+        const empty = search.querySelector('.player-search-empty');
+        const more = search.querySelector('.player-search-more');
+        let request = 0;
+
+        async function load(page) {
+            const current = ++request;
+            const url = new URL(search.dataset.url, window.location.href);
+            url.searchParams.set('q', input.value);
+            url.searchParams.set('page', page);
+            const response = await fetch(url, {headers: {'Accept': 'application/json'}});
+            // A newer search was started while this one was loading.
+            if (!response.ok || current !== request) {
+                return;
+            }
+            const data = await response.json();
+            const chosen = new Set(
+                Array.from(selected.querySelectorAll('.player-checkbox'), cb => cb.value)
+            );
+            if (page === 1) {
+                results.replaceChildren();
+            }
+            data.results
+                .filter(player => !chosen.has(String(player.id)))
+                .forEach(player => results.appendChild(playerLabel(player, search.dataset.inputName)));
+            empty.classList.toggle('is-hidden', results.children.length > 0);
+            more.classList.toggle('is-hidden', !data.has_next);
+            more.dataset.page = page + 1;
+        }
+
+        // Checked players move to the selection, unchecked ones leave it.
+        search.addEventListener('change', (event) => {
+            const cb = event.target;
+            if (!cb.matches('.player-checkbox')) {
+                return;
+            }
+            const label = cb.closest('.player-btn-label');
+            if (cb.checked && label.parentElement === results) {
+                selected.appendChild(label);
+            } else if (!cb.checked && label.parentElement === selected) {
+                label.remove();
+            }
+        });
+
+        let timer = null;
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => load(1), 200);
+        });
+        // Enter searches instead of submitting the form.
+        input.addEventListener('keydown', (event) => {
+            if (event.key === 'Enter') {
+                event.preventDefault();
+                clearTimeout(timer);
+                load(1);
+            }
+        });
+        more.addEventListener('click', () => load(Number(more.dataset.page)));
+        search.addEventListener('player-search:refresh', () => load(1));
+    });
+});
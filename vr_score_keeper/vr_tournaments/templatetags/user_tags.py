@@ -1,5 +1,5 @@
 from django import template
-from django.contrib.auth.models import Group
+from ..permissions import has_group as user_has_group
 
 register = template.Library()
 
@@ -8,7 +8,8 @@ register = template.Library()
 def has_group(user, group_name):
     if user.is_superuser:
         return True
-    return user.groups.filter(name=group_name).exists()
+    # Memoized on the user, so the filter can be used in loops.
+    return user_has_group(user, group_name)
 
 
 @register.filter(name="percentage")
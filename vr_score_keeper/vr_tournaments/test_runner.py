@@ -0,0 +1,23 @@
+import logging
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class BudgetTestRunner(DiscoverRunner):
+    """
+    Runs the tests with query budgets enforced, so a view over budget fails.
+    The per-request log lines are silenced, so they do not bury the results.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.strict_budgets = override_settings(QUERY_BUDGET_STRICT=True)
+        self.strict_budgets.enable()
+        self.request_logger = logging.getLogger("vr_tournaments.requests")
+        self.request_log_level = self.request_logger.level
+        self.request_logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        self.request_logger.setLevel(self.request_log_level)
+        self.strict_budgets.disable()
+        super().teardown_test_environment(**kwargs)
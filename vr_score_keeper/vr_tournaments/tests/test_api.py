@@ -0,0 +1,112 @@
+import datetime
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from ..forms import MultiScoreForm
+from ..models import Tournament, Player, Match
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        User.objects.create_user("user", "user@test.com", "password")
+        self.client.login(username="user", password="password")
+        self.tournament = Tournament.objects.create(name="Spring", points_to_win=100)
+        self.rocky = Player.objects.create(name="Rocky")
+        self.bubba = Player.objects.create(name="Bubba")
+        self.tournament.players.add(self.rocky, self.bubba)
+        self.score(3, 5)
+
+    def score(self, rocky, bubba):
+        match = Match.objects.create(tournament=self.tournament)
+        form = MultiScoreForm(
+            [self.rocky, self.bubba],
+            match,
+            data={f"score_{self.rocky.pk}": rocky, f"score_{self.bubba.pk}": bubba},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+
+    def test_tournament_list_supports_field_selection(self):
+        response = self.client.get(
+            reverse("api_tournament_list"), {"fields": "id,name", "status": "active"}
+        )
+        self.assertEqual(
+            response.json(), {"tournaments": [{"id": self.tournament.pk, "name": "Spring"}]}
+        )
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse("api_tournament_list"), {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_standings_are_ordered_by_total(self):
+        response = self.client.get(
+            reverse("api_tournament_standings", args=[self.tournament.pk]),
+            {"fields": "player,total"},
+        )
+        self.assertEqual(
+            response.json()["standings"],
+            [{"player": "Bubba", "total": 5}, {"player": "Rocky", "total": 3}],
+        )
+
+    def test_matches_include_scores(self):
+        response = self.client.get(reverse("api_tournament_matches", args=[self.tournament.pk]))
+        matches = response.json()["matches"]
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(
+            {score["player"]: score["score"] for score in matches[0]["scores"]},
+            {"Rocky": 3, "Bubba": 5},
+        )
+
+    def test_unchanged_standings_return_not_modified_with_one_query(self):
+        url = reverse("api_tournament_standings", args=[self.tournament.pk])
+        etag = self.client.get(url)["ETag"]
+
+        # Session, user and the tournament's change stamp.
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.score(4, 0)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_tournament_list_etag_changes_when_a_tournament_is_replaced(self):
+        url = reverse("api_tournament_list")
+        modified = self.tournament.modified - datetime.timedelta(days=1)
+        old = Tournament.objects.create(name="Old")
+        Tournament.objects.filter(pk=old.pk).update(version=1, modified=modified)
+        etag = self.client.get(url)["ETag"]
+
+        # Same count, version total and last modification time.
+        old.delete()
+        new = Tournament.objects.create(name="New")
+        Tournament.objects.filter(pk=new.pk).update(version=1, modified=modified)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["tournaments"][0]["name"], "New")
+
+    def test_missing_tournament_returns_not_found(self):
+        response = self.client.get(reverse("api_tournament_standings", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_head_to_head_matrices(self):
+        self.score(9, 4)
+        response = self.client.get(reverse("api_head_to_head"))
+        data = response.json()
+        self.assertEqual([player["name"] for player in data["players"]], ["Rocky", "Bubba"])
+        self.assertEqual(data["shared"], [[0, 2], [2, 0]])
+        self.assertEqual(data["wins"], [[0, 1], [1, 0]])
+        self.assertEqual(data["win_rate"], [[None, 0.5], [0.5, None]])
+        self.assertEqual(data["average_margin"], [[None, 1.5], [-1.5, None]])
+
+        # Unchanged results are answered from the stamp alone.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("api_head_to_head"), HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+
+        self.score(1, 1)
+        response = self.client.get(reverse("api_head_to_head"))
+        self.assertEqual(response.json()["shared"], [[0, 3], [3, 0]])
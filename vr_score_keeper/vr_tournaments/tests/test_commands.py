@@ -0,0 +1,368 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipIf
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from .. import urls
+from ..management.commands import benchmark_views
+from ..models import (
+    Tournament,
+    Player,
+    Match,
+    Score,
+    PlayerStats,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+)
+
+
+class RebuildTotalsCommandTest(TestCase):
+    def test_rebuild_totals_command_fixes_and_verifies_totals(self):
+        tournament = Tournament.objects.create()
+        rocky = Player.objects.create(name="Rocky")
+        tournament.players.add(rocky)
+        match = Match.objects.create(tournament=tournament)
+        Score.objects.create(match=match, player=rocky, score=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_totals", "--check", stdout=StringIO(), stderr=StringIO())
+        call_command("rebuild_totals", stdout=StringIO())
+
+        total = PlayerTournamentTotal.objects.get(player=rocky)
+        self.assertEqual((total.total, total.matches_played), (7, 1))
+
+
+class RebuildPlayerStatsCommandTest(TestCase):
+    def test_rebuild_player_stats_command_fixes_and_verifies_stats(self):
+        tournament = Tournament.objects.create()
+        rocky = Player.objects.create(name="Rocky")
+        tournament.players.add(rocky)
+        match = Match.objects.create(tournament=tournament)
+        Score.objects.create(match=match, player=rocky, score=7)
+        call_command("rebuild_totals", stdout=StringIO())
+        PlayerStats.objects.filter(player=rocky).update(total_score=0)
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_player_stats", "--check", stdout=StringIO(), stderr=StringIO()
+            )
+        call_command("rebuild_player_stats", "--player", str(rocky.pk), stdout=StringIO())
+
+        stats = PlayerStats.objects.get(player=rocky)
+        self.assertEqual((stats.total_score, stats.best_score, stats.best_match), (7, 7, match))
+
+
+class RebuildRatingsCommandTest(TestCase):
+    def test_rebuild_ratings(self):
+        tournament = Tournament.objects.create()
+        rocky = Player.objects.create(name="Rocky")
+        bubba = Player.objects.create(name="Bubba")
+        match = Match.objects.create(tournament=tournament)
+        Score.objects.create(match=match, player=rocky, score=10)
+        Score.objects.create(match=match, player=bubba, score=5)
+
+        out = StringIO()
+        call_command("rebuild_ratings", stdout=out)
+        self.assertIn("Rebuilt 2 rating snapshots", out.getvalue())
+        ratings = RatingSnapshot.objects.current()
+        self.assertGreater(ratings[rocky.pk][0], ratings[bubba.pk][0])
+
+
+class GenerateFakeLeagueCommandTest(TestCase):
+    def generate(self, prefix):
+        call_command(
+            "generate_fake_league",
+            players=12,
+            tournaments=3,
+            matches=30,
+            prefix=prefix,
+            stdout=StringIO(),
+        )
+        return list(
+            Score.objects.filter(player__name__startswith=prefix)
+            .order_by("match__date", "match_id", "player__name")
+            .values_list("match__date", "player__name", "score")
+        )
+
+    def test_league_is_deterministic(self):
+        first = self.generate("First")
+        second = self.generate("Second")
+        self.assertEqual(len(first), 120)
+        self.assertEqual(
+            [(day, name.split(" ", 1)[1], score) for day, name, score in first],
+            [(day, name.split(" ", 1)[1], score) for day, name, score in second],
+        )
+
+    def test_league_is_consistent(self):
+        self.generate("Fake")
+        self.assertEqual(Tournament.objects.count(), 3)
+        # Only the newest tournament is left without a winner.
+        self.assertEqual(
+            list(Tournament.objects.filter(winner="").values_list("name", flat=True)),
+            ["Fake League 3"],
+        )
+        # The derived tables match the generated scores.
+        call_command("rebuild_totals", "--check", stdout=StringIO())
+        call_command("rebuild_player_stats", "--check", stdout=StringIO())
+        self.assertEqual(RatingSnapshot.objects.count(), Score.objects.count())
+
+    def test_existing_league_is_rejected(self):
+        self.generate("Fake")
+        with self.assertRaises(CommandError):
+            self.generate("Fake")
+
+
+class BenchmarkViewsCommandTest(TestCase):
+    def test_every_url_is_timed_or_skipped(self):
+        call_command(
+            "generate_fake_league",
+            players=8,
+            tournaments=2,
+            matches=6,
+            stdout=StringIO(),
+        )
+        command = benchmark_views.Command(stdout=StringIO(), stderr=StringIO())
+        command.user = User.objects.create_superuser("benchmark", "benchmark@example.com", None)
+
+        results = command.run_views(requests=1)
+
+        names = {pattern.name for pattern in urls.urlpatterns} - benchmark_views.SKIPPED
+        post_only = {name for name in names if f"{name}: skipped" in command.stdout.getvalue()}
+        self.assertEqual(set(results), names - post_only)
+        self.assertIn("database_pool_metrics", results)
+        self.assertEqual(command.stderr.getvalue(), "")
+
+
+class ExplainHotQueriesCommandTest(TestCase):
+    def test_hot_queries_use_indexes(self):
+        tournament = Tournament.objects.create()
+        Player.objects.create(name="Rocky")
+        Match.objects.create(tournament=tournament)
+
+        out = StringIO()
+        call_command("explain_hot_queries", stdout=out, no_color=True)
+        self.assertIn("active_tournament_idx", out.getvalue())
+        self.assertIn("match_tournament_date_idx", out.getvalue())
+
+    @skipIf(connection.vendor == "postgresql", "EXPLAIN ANALYZE is supported.")
+    def test_analyze_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command("explain_hot_queries", "--analyze", stdout=StringIO())
+
+
+class ImportResultsCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_import_csv_creates_matches_and_totals(self):
+        Player.objects.create(name="Rocky")
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Spring,2024-03-01,Rocky,10\n"
+            "Spring,2024-03-01,Bubba,4\n"
+            "Spring,2024-03-01,Rocky,3\n"
+            "Spring,2024-03-01,Bubba,8\n",
+        )
+
+        call_command("import_results", path, "--batch-size", "1", stdout=StringIO())
+
+        tournament = Tournament.objects.get(name="Spring")
+        self.assertEqual(tournament.matches.count(), 2)
+        self.assertEqual(tournament.points_to_win, 10)
+        self.assertEqual(tournament.winner, "Rocky")
+        totals = {
+            total.player.name: total.total
+            for total in PlayerTournamentTotal.objects.select_related("player")
+        }
+        self.assertEqual(totals, {"Rocky": 13, "Bubba": 12})
+
+    def test_import_ndjson_groups_rows_by_match_column(self):
+        tournament = Tournament.objects.create(name="Summer", points_to_win=100)
+        path = self.write(
+            "results.ndjson",
+            '{"tournament": "Summer", "date": "2024-06-01", "match": "a", "player": "Rocky", "score": 1}\n'
+            '{"tournament": "Summer", "date": "2024-06-01", "match": "b", "player": "Rocky", "score": 2}\n'
+            '{"tournament": "Summer", "date": "2024-06-01", "match": "b", "player": "Trejo", "score": 5}\n',
+        )
+
+        call_command("import_results", path, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(tournament.matches.values_list("scores__score", flat=True)), [1, 2, 5]
+        )
+        self.assertEqual(tournament.matches.count(), 2)
+        self.assertEqual(tournament.players.count(), 2)
+
+    def test_dry_run_validates_without_writing(self):
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Fall,2024-09-01,Rocky,10\n"
+            "Fall,09/01/2024,Bubba,4\n"
+            "Fall,2024-09-01,Trejo,-1\n",
+        )
+        stderr = StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "import_results", path, "--dry-run", stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertIn("Line 3", stderr.getvalue())
+        self.assertIn("Line 4", stderr.getvalue())
+        self.assertFalse(Tournament.objects.exists())
+        self.assertFalse(Player.objects.exists())
+
+    def test_failed_import_finishes_the_committed_batches(self):
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Spring,2024-03-01,Rocky,10\n"
+            "Spring,2024-03-01,Bubba,4\n"
+            "Spring,2024-03-01,Rocky,3\n"
+            "Spring,2024-03-01,Bubba,x\n",
+        )
+        stderr = StringIO()
+
+        with self.assertRaisesMessage(CommandError, "The 2 scores in 1 matches"):
+            call_command(
+                "import_results", path, "--batch-size", "2", stdout=StringIO(), stderr=stderr
+            )
+
+        self.assertIn("Line 5: Invalid score 'x'.", stderr.getvalue())
+        self.assertIn("with 1 scores, was not imported", stderr.getvalue())
+        tournament = Tournament.objects.get(name="Spring")
+        self.assertEqual(tournament.matches.count(), 1)
+        self.assertEqual(tournament.points_to_win, 10)
+        self.assertEqual(tournament.winner, "Rocky")
+        totals = {
+            total.player.name: total.total
+            for total in PlayerTournamentTotal.objects.select_related("player")
+        }
+        self.assertEqual(totals, {"Rocky": 10, "Bubba": 4})
+        self.assertEqual(RatingSnapshot.objects.count(), 2)
+
+    def test_importing_a_file_again_skips_recorded_matches(self):
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Spring,2024-03-01,Rocky,3\n"
+            "Spring,2024-03-01,Bubba,4\n"
+            "Spring,2024-03-01,Rocky,3\n"
+            "Spring,2024-03-01,Bubba,4\n"
+            "Spring,2024-03-02,Rocky,3\n"
+            "Spring,2024-03-02,Bubba,4\n",
+        )
+        call_command("import_results", path, "--batch-size", "2", stdout=StringIO())
+        tournament = Tournament.objects.get(name="Spring")
+        self.assertEqual(tournament.matches.count(), 3)
+
+        stdout = StringIO()
+        call_command("import_results", path, "--batch-size", "2", stdout=stdout)
+
+        self.assertIn("Imported 0 scores in 0 matches", stdout.getvalue())
+        self.assertIn("Skipped 3 matches already recorded.", stdout.getvalue())
+        self.assertEqual(tournament.matches.count(), 3)
+        self.assertEqual(Score.objects.count(), 6)
+        self.assertEqual(
+            dict(tournament.player_totals.values_list("player__name", "total")),
+            {"Rocky": 9, "Bubba": 12},
+        )
+
+    def test_import_recomputes_points_to_win_of_existing_tournaments(self):
+        tournament = Tournament.objects.create(name="Summer", date="2024-06-01")
+        tournament.update_registrations(add=[Player.objects.create(name="Rocky").pk])
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).points_to_win, 0)
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Summer,2024-06-02,Rocky,12\n"
+            "Summer,2024-06-02,Bubba,4\n"
+            "Summer,2024-06-02,Trejo,6\n",
+        )
+
+        call_command("import_results", path, stdout=StringIO())
+
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.points_to_win, 20)
+        self.assertEqual(tournament.winner, "")
+
+    def test_new_players_are_created_in_one_query_per_batch(self):
+        Player.objects.create(name="Rocky")
+        path = self.write(
+            "results.csv",
+            "tournament,date,player,score\n"
+            "Spring,2024-03-01,Rocky,10\n"
+            "Spring,2024-03-01,Bubba,4\n"
+            "Spring,2024-03-01,Trejo,8\n",
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("import_results", path, stdout=StringIO())
+
+        player_table = Player._meta.db_table
+        inserts = [q for q in queries if q["sql"].startswith(f'INSERT INTO "{player_table}"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(Player.objects.values_list("name", flat=True)), {"Rocky", "Bubba", "Trejo"}
+        )
+
+
+class ExportResultsCommandTest(TestCase):
+    def test_export_round_trips_through_import(self):
+        tournament = Tournament.objects.create(name="Winter", date="2024-01-01")
+        rocky = Player.objects.create(name="Rocky")
+        bubba = Player.objects.create(name="Bubba")
+        tournament.players.add(rocky, bubba)
+        for points in ((3, 5), (7, 2)):
+            match = Match.objects.create(tournament=tournament, date="2024-01-02")
+            Score.objects.create(match=match, player=rocky, score=points[0])
+            Score.objects.create(match=match, player=bubba, score=points[1])
+
+        stdout = StringIO()
+        call_command("export_results", "--format", "ndjson", stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"player": "Rocky"', lines[0])
+
+        Tournament.objects.all().delete()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "results.ndjson"
+        path.write_text(stdout.getvalue(), encoding="utf-8")
+        call_command("import_results", str(path), stdout=StringIO())
+
+        imported = Tournament.objects.get(name="Winter")
+        self.assertEqual(imported.matches.count(), 2)
+        self.assertEqual(
+            dict(imported.player_totals.values_list("player__name", "total")),
+            {"Rocky": 10, "Bubba": 7},
+        )
+
+    def test_export_filters_by_player(self):
+        tournament = Tournament.objects.create()
+        rocky = Player.objects.create(name="Rocky")
+        bubba = Player.objects.create(name="Bubba")
+        match = Match.objects.create(tournament=tournament)
+        Score.objects.create(match=match, player=rocky, score=3)
+        Score.objects.create(match=match, player=bubba, score=5)
+
+        stdout = StringIO()
+        call_command("export_results", "--player", str(bubba.pk), stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            ["tournament,date,match,player,score", f"{tournament.name},{match.date},{match.pk},Bubba,5"],
+        )
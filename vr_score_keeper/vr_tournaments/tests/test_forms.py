@@ -9,6 +9,13 @@ class FormTests(TestCase):
         form = TournamentForm(data=form_data)
         self.assertTrue(form.is_valid())
 
+    def test_tournament_form_leaves_blank_names_to_the_counter(self):
+        form = TournamentForm()
+        next_name = form.fields["name"].widget.attrs["placeholder"]
+        form = TournamentForm(data={"name": "", "date": "2024-01-01", "points_to_win": 0})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.save().name, next_name)
+
     def test_player_form(self):
         form_data = {"name": "Test Player"}
         form = PlayerForm(data=form_data)
@@ -90,3 +97,38 @@ class FormTests(TestCase):
         )
 
         self.assertTrue(form.is_valid())
+
+    def test_multi_score_form_declares_winner_once(self):
+        tournament = Tournament.objects.create(points_to_win=10)
+        players = [
+            Player.objects.create(name="Rocky"),
+            Player.objects.create(name="Bubba"),
+        ]
+        tournament.players.add(*players)
+
+        match = Match.objects.create(tournament=tournament)
+        form = MultiScoreForm(
+            players,
+            match,
+            data={f"score_{players[0].pk}": 5, f"score_{players[1].pk}": 4},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.winner, "")
+
+        for points in ((6, 4), (0, 30)):
+            match = Match.objects.create(tournament=tournament)
+            form = MultiScoreForm(
+                players,
+                match,
+                data={
+                    f"score_{players[0].pk}": points[0],
+                    f"score_{players[1].pk}": points[1],
+                },
+            )
+            self.assertTrue(form.is_valid())
+            form.save()
+
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.winner, "Rocky")
@@ -0,0 +1,100 @@
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ..forms import MultiScoreForm
+from ..live import broadcaster, event_stream
+from ..models import Tournament, Player, Match
+
+
+def parse_event(chunk):
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode()
+    lines = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+# Without a notification, the streams would only pick up the writes after an hour.
+@override_settings(LIVE_POLL_INTERVAL=3600)
+class LiveStandingsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@test.com", "password")
+        self.tournament = Tournament.objects.create(name="Spring", points_to_win=100)
+        self.rocky = Player.objects.create(name="Rocky")
+        self.bubba = Player.objects.create(name="Bubba")
+        self.tiny = Player.objects.create(name="Tiny")
+        self.tournament.players.add(self.rocky, self.bubba, self.tiny)
+        self.url = reverse("tournament_live", args=[self.tournament.pk])
+
+    def score(self, rocky, bubba):
+        match = Match.objects.create(tournament=self.tournament)
+        form = MultiScoreForm(
+            [self.rocky, self.bubba],
+            match,
+            data={f"score_{self.rocky.pk}": rocky, f"score_{self.bubba.pk}": bubba},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+
+    async def test_stream_sends_snapshot_then_changed_players_only(self):
+        stream = event_stream(self.tournament.pk)
+
+        event, data = parse_event(await anext(stream))
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(
+            {standing["player"]: standing["total"] for standing in data["standings"]},
+            {"Rocky": 0, "Bubba": 0, "Tiny": 0},
+        )
+
+        # The write runs in a test transaction, so it is published by hand
+        # instead of on commit.
+        await sync_to_async(self.score)(7, 3)
+        broadcaster.notify()
+        event, data = parse_event(await anext(stream))
+        self.assertEqual(event, "update")
+        self.assertEqual(
+            [(standing["player"], standing["total"]) for standing in data["changed"]],
+            [("Rocky", 7), ("Bubba", 3)],
+        )
+        self.assertEqual(data["removed"], [])
+        await stream.aclose()
+        self.assertEqual(broadcaster.channels, {})
+
+    async def test_streams_share_one_channel(self):
+        first = event_stream(self.tournament.pk)
+        second = event_stream(self.tournament.pk)
+        await anext(first)
+        await anext(second)
+        self.assertEqual(len(broadcaster.channels), 1)
+        await first.aclose()
+        await second.aclose()
+        self.assertEqual(broadcaster.channels, {})
+
+    async def test_view_streams_events(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        event, data = parse_event(await anext(aiter(response.streaming_content)))
+        self.assertEqual(event, "snapshot")
+        self.assertEqual(data["points_to_win"], 100)
+
+    async def test_missing_tournament_returns_not_found(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("tournament_live", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_view_is_not_streamed_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 501)
+        self.assertNotIn('data-live-url="', self.client.get(reverse("index")).content.decode())
+
+    async def test_index_follows_the_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("index"))
+        self.assertContains(response, f'data-live-url="{self.url}"')
@@ -1,7 +1,30 @@
-from django.test import TestCase
+import tempfile
+from importlib.util import find_spec
+from asgiref.sync import sync_to_async
+from datetime import date
+from django.db import OperationalError, connection
+from unittest import skipIf
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib import admin
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from ..models import Tournament, Player, Match, Score
+import numpy as np
+from ..admin import TournamentAdmin
+from ..forms import MultiScoreForm
+from ..head_to_head import compute
+from ..models import (
+    Counter,
+    Tournament,
+    Player,
+    Match,
+    Score,
+    PlayerStats,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+)
+from ..pool import pool_metrics, utilization
+from ..ratings import INITIAL_RATING, K_FACTOR, expected_result, rate_match
 
 
 class TournamentModelTest(TestCase):
@@ -10,10 +33,177 @@ class TournamentModelTest(TestCase):
         self.assertIsNotNone(tournament)
         self.assertIn("Tournament", tournament.name)
 
+    def test_tournament_save_bumps_version(self):
+        tournament = Tournament.objects.create()
+        self.assertEqual(tournament.version, 1)
+        tournament.save()
+        self.assertEqual(tournament.version, 2)
+        Tournament.objects.filter(pk=tournament.pk).bump_version()
+        tournament.refresh_from_db()
+        self.assertEqual(tournament.version, 3)
+
     def test_tournament_str(self):
         tournament = Tournament.objects.create(name="Test Tournament")
         self.assertEqual(str(tournament), "Test Tournament")
 
+    def test_automatic_names_are_numbered_by_counter(self):
+        start = Counter.objects.peek(Counter.TOURNAMENT)
+        first = Tournament.objects.create()
+        Tournament.objects.create(name="Named")
+        first.delete()
+        # Deleting a tournament does not make its number available again.
+        with CaptureQueriesContext(connection) as queries:
+            second = Tournament.objects.create()
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+        self.assertEqual(first.name, f"Tournament {start + 1}")
+        self.assertEqual(second.name, f"Tournament {start + 2}")
+        self.assertEqual(Counter.objects.peek(Counter.TOURNAMENT), start + 2)
+
+    def test_unregistering_players_declares_a_leader_who_reached_the_new_target(self):
+        rocky, bubba, tiny = (
+            Player.objects.create(name=name) for name in ("Rocky", "Bubba", "Tiny")
+        )
+        tournament = Tournament.objects.create(name="Spring")
+        tournament.update_registrations(add=[rocky.pk, bubba.pk, tiny.pk])
+        self.assertEqual(tournament.points_to_win, 20)
+        match = Match.objects.create(tournament=tournament)
+        form = MultiScoreForm(
+            [rocky, bubba], match, data={f"score_{rocky.pk}": 15, f"score_{bubba.pk}": 5}
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).winner, "")
+
+        tournament.update_registrations(remove=[tiny.pk])
+
+        self.assertEqual(tournament.points_to_win, 10)
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).winner, "Rocky")
+
+    def test_lowering_points_to_win_in_the_admin_declares_the_winner(self):
+        rocky = Player.objects.create(name="Rocky")
+        tournament = Tournament.objects.create(name="Spring", points_to_win=20)
+        tournament.players.add(rocky)
+        match = Match.objects.create(tournament=tournament)
+        form = MultiScoreForm([rocky], match, data={f"score_{rocky.pk}": 12})
+        self.assertTrue(form.is_valid())
+        form.save()
+
+        tournament.refresh_from_db()
+        tournament.points_to_win = 10
+        TournamentAdmin(Tournament, admin.site).save_model(None, tournament, None, True)
+
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).winner, "Rocky")
+
+    def test_registering_the_first_player_declares_no_winner(self):
+        rocky = Player.objects.create(name="Rocky")
+        tournament = Tournament.objects.create(name="Spring")
+        tournament.update_registrations(add=[rocky.pk])
+        self.assertEqual(tournament.points_to_win, 0)
+        self.assertEqual(Tournament.objects.get(pk=tournament.pk).winner, "")
+
+    def test_counter_is_created_on_first_use(self):
+        Counter.objects.all().delete()
+        self.assertEqual(Counter.objects.peek(Counter.TOURNAMENT), 0)
+        self.assertEqual(Counter.objects.next_value(Counter.TOURNAMENT), 1)
+        self.assertEqual(Counter.objects.next_value(Counter.TOURNAMENT), 2)
+
+
+class TournamentStandingsTest(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(name="Standings")
+        self.other = Tournament.objects.create(name="Other")
+        self.rocky = Player.objects.create(name="Rocky")
+        self.bubba = Player.objects.create(name="Bubba")
+        self.tournament.players.add(self.rocky, self.bubba)
+        self.other.players.add(self.rocky)
+
+    def test_standings_sum_scores_per_tournament(self):
+        for points in (3, 4):
+            match = Match.objects.create(tournament=self.tournament)
+            Score.objects.create(player=self.rocky, match=match, score=points)
+        other_match = Match.objects.create(tournament=self.other)
+        Score.objects.create(player=self.rocky, match=other_match, score=7)
+        PlayerTournamentTotal.objects.rebuild()
+
+        standings = Tournament.objects.standings()
+
+        self.assertEqual(
+            [(s.player.name, s.total) for s in standings[self.tournament.pk]],
+            [("Rocky", 7), ("Bubba", 0)],
+        )
+        self.assertEqual(
+            [(s.player.name, s.total) for s in standings[self.other.pk]],
+            [("Rocky", 7)],
+        )
+
+    def test_standings_use_one_query(self):
+        for i in range(5):
+            tournament = Tournament.objects.create()
+            player = Player.objects.create(name=f"Extra {i}")
+            tournament.players.add(player, self.rocky)
+            match = Match.objects.create(tournament=tournament)
+            Score.objects.create(player=player, match=match, score=i)
+
+        with self.assertNumQueries(1):
+            standings = Tournament.objects.standings()
+        self.assertEqual(len(standings), 7)
+
+    async def test_async_standings_match_standings(self):
+        match = await Match.objects.acreate(tournament=self.tournament)
+        await Score.objects.acreate(player=self.bubba, match=match, score=5)
+        await sync_to_async(PlayerTournamentTotal.objects.rebuild)()
+
+        standings = await Tournament.objects.astandings()
+
+        self.assertEqual(
+            [(s.player.name, s.total) for s in standings[self.tournament.pk]],
+            [("Rocky", 0), ("Bubba", 5)],
+        )
+
+
+class PlayerTournamentTotalTest(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create()
+        self.rocky = Player.objects.create(name="Rocky")
+        self.bubba = Player.objects.create(name="Bubba")
+        self.tournament.players.add(self.rocky, self.bubba)
+
+    def totals(self):
+        return {
+            total.player.name: (total.total, total.matches_played, total.last_match_date)
+            for total in PlayerTournamentTotal.objects.select_related("player")
+        }
+
+    def test_registration_creates_and_removes_totals(self):
+        self.assertEqual(set(self.totals()), {"Rocky", "Bubba"})
+        self.bubba.tournaments.remove(self.tournament)
+        self.assertEqual(set(self.totals()), {"Rocky"})
+
+    def test_apply_scores_adds_deltas(self):
+        match = Match.objects.create(tournament=self.tournament, date=date(2024, 1, 2))
+        PlayerTournamentTotal.objects.apply_scores(
+            match, {self.rocky.pk: 5, self.bubba.pk: 2}
+        )
+        PlayerTournamentTotal.objects.apply_scores(
+            match, {self.rocky.pk: 3, self.bubba.pk: 2}, {self.rocky.pk: 5, self.bubba.pk: 2}
+        )
+        self.assertEqual(
+            self.totals(),
+            {"Rocky": (3, 1, date(2024, 1, 2)), "Bubba": (2, 1, date(2024, 1, 2))},
+        )
+
+    def test_revert_scores_restores_last_match_date(self):
+        first = Match.objects.create(tournament=self.tournament, date=date(2024, 1, 1))
+        second = Match.objects.create(tournament=self.tournament, date=date(2024, 1, 5))
+        for match, points in ((first, 4), (second, 6)):
+            Score.objects.create(match=match, player=self.rocky, score=points)
+            PlayerTournamentTotal.objects.apply_scores(match, {self.rocky.pk: points})
+
+        second.delete()
+        PlayerTournamentTotal.objects.revert_scores(second, {self.rocky.pk: 6})
+
+        self.assertEqual(self.totals()["Rocky"], (4, 1, date(2024, 1, 1)))
+
 
 class PlayerModelTest(TestCase):
     def test_player_creation(self):
@@ -24,6 +214,22 @@ class PlayerModelTest(TestCase):
         player = Player.objects.create(name="Test Player")
         self.assertEqual(str(player), "Test Player")
 
+    def test_search_lists_prefix_matches_first(self):
+        for name in ["Bubba", "Rocky", "rob", "Big Rob", "Trejo", "Robin"]:
+            Player.objects.create(name=name)
+
+        def names(term, offset=0, limit=20):
+            players, has_next = Player.objects.search(term, offset, limit)
+            return [player.name for player in players], has_next
+
+        self.assertEqual(names(" ro "), (["rob", "Robin", "Rocky", "Big Rob"], False))
+        # Pages may end within the prefix matches or after them.
+        self.assertEqual(names("ro", limit=2), (["rob", "Robin"], True))
+        self.assertEqual(names("ro", offset=2, limit=2), (["Rocky", "Big Rob"], False))
+        self.assertEqual(names("ro", offset=3, limit=2), (["Big Rob"], False))
+        self.assertEqual(names("ro", offset=4), ([], False))
+        self.assertEqual(names("", limit=3), (["Big Rob", "Bubba", "rob"], True))
+
 
 class MatchModelTest(TestCase):
     def setUp(self):
@@ -67,3 +273,270 @@ class ScoreModelTest(TestCase):
 
         score = Score(player=self.player, match=self.match, score=2)
         score.clean()  # This should not raise an error
+
+
+class PlayerStatsTest(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(points_to_win=10)
+        self.rocky = Player.objects.create(name="Rocky")
+        self.bubba = Player.objects.create(name="Bubba")
+        self.tournament.players.add(self.rocky, self.bubba)
+
+    def submit(self, rocky, bubba):
+        match = Match.objects.create(tournament=self.tournament)
+        form = MultiScoreForm(
+            [self.rocky, self.bubba],
+            match,
+            data={f"score_{self.rocky.pk}": rocky, f"score_{self.bubba.pk}": bubba},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        return match
+
+    def stats(self, player):
+        stats = PlayerStats.objects.get(player=player)
+        return (
+            stats.tournaments_played,
+            stats.tournaments_won,
+            stats.matches_played,
+            stats.total_score,
+            stats.best_score,
+        )
+
+    def test_score_submissions_refresh_stats(self):
+        self.submit(4, 2)
+        best = self.submit(7, 1)
+
+        self.assertEqual(self.stats(self.rocky), (1, 1, 2, 11, 7))
+        self.assertEqual(self.stats(self.bubba), (1, 0, 2, 3, 2))
+        rocky = PlayerStats.objects.get(player=self.rocky)
+        self.assertEqual(rocky.best_match, best)
+        self.assertEqual(rocky.average_score, 5.5)
+        self.assertEqual(rocky.win_rate, 1)
+
+    def test_deleting_a_match_refreshes_stats(self):
+        self.submit(4, 2)
+        match = self.submit(1, 3)
+        scores = dict(match.scores.values_list("player_id", "score"))
+        match.delete()
+        PlayerTournamentTotal.objects.revert_scores(match, scores)
+
+        self.assertEqual(self.stats(self.bubba), (1, 0, 1, 2, 2))
+
+    def test_unregistering_refreshes_stats(self):
+        self.submit(4, 2)
+        self.bubba.tournaments.remove(self.tournament)
+
+        self.assertEqual(self.stats(self.bubba)[:4], (0, 0, 0, 0))
+        self.assertEqual(PlayerStats.objects.get(player=self.bubba).average_score, None)
+
+    def test_refresh_matches_expected(self):
+        self.submit(4, 2)
+        PlayerStats.objects.all().delete()
+        self.assertEqual(PlayerStats.objects.refresh(), 2)
+        self.assertEqual(self.stats(self.rocky), (1, 0, 1, 4, 4))
+
+
+class RatingEngineTest(TestCase):
+    def test_expected_result_is_symmetric(self):
+        self.assertEqual(expected_result(1500, 1500), 0.5)
+        self.assertAlmostEqual(expected_result(1600, 1400) + expected_result(1400, 1600), 1.0)
+        self.assertGreater(expected_result(1600, 1400), 0.5)
+
+    def test_rate_match_is_zero_sum(self):
+        ratings = {"a": 1500.0, "b": 1600.0, "c": 1400.0}
+        deltas = rate_match(ratings, {"a": 30, "b": 20, "c": 20})
+        self.assertAlmostEqual(sum(deltas.values()), 0.0)
+        self.assertGreater(deltas["a"], 0)
+        self.assertLess(deltas["b"], 0)
+
+    def test_two_player_match_is_standard_elo(self):
+        deltas = rate_match({"a": 1500.0, "b": 1500.0}, {"a": 10, "b": 5})
+        self.assertAlmostEqual(deltas["a"], K_FACTOR / 2)
+        self.assertEqual(rate_match({"a": 1500.0}, {"a": 10}), {})
+
+
+class RatingSnapshotTest(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(points_to_win=1000)
+        self.players = [Player.objects.create(name=name) for name in ("Rocky", "Bubba", "Trejo")]
+        self.tournament.players.add(*self.players)
+
+    def submit(self, day, *scores):
+        match = Match.objects.create(tournament=self.tournament, date=date(2024, 1, day))
+        form = MultiScoreForm(
+            self.players,
+            match,
+            data={f"score_{player.pk}": score for player, score in zip(self.players, scores)},
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        return match
+
+    def snapshots(self):
+        return sorted(
+            (player_id, match_id, round(rating, 6), matches_rated)
+            for player_id, match_id, rating, matches_rated in RatingSnapshot.objects.values_list(
+                "player_id", "match_id", "rating", "matches_rated"
+            )
+        )
+
+    def assertMatchesReplay(self):
+        incremental = self.snapshots()
+        RatingSnapshot.objects.replay()
+        self.assertEqual(incremental, self.snapshots())
+
+    def test_scored_matches_are_rated(self):
+        self.submit(1, 30, 20, 10)
+        ratings = RatingSnapshot.objects.current()
+        rocky, bubba, trejo = (ratings[player.pk] for player in self.players)
+        self.assertGreater(rocky[0], INITIAL_RATING)
+        self.assertEqual(bubba[0], INITIAL_RATING)
+        self.assertLess(trejo[0], INITIAL_RATING)
+        self.assertEqual(rocky[1], 1)
+
+        self.submit(2, 10, 20, 30)
+        self.assertEqual(RatingSnapshot.objects.current()[self.players[0].pk][1], 2)
+        self.assertMatchesReplay()
+
+    def test_back_dated_match_replays_later_matches(self):
+        self.submit(5, 30, 20, 10)
+        self.submit(9, 10, 30, 20)
+        self.submit(1, 20, 10, 30)
+        self.assertEqual(RatingSnapshot.objects.count(), 9)
+        self.assertMatchesReplay()
+
+    def test_replay_after_deletion(self):
+        self.submit(1, 30, 20, 10)
+        match = self.submit(2, 10, 20, 30)
+        self.submit(3, 20, 30, 10)
+        position = (match.date, match.pk)
+        match.delete()
+        RatingSnapshot.objects.replay(since=position)
+        self.assertEqual(RatingSnapshot.objects.count(), 6)
+        self.assertMatchesReplay()
+
+    def test_current_before_position(self):
+        first = self.submit(1, 30, 20, 10)
+        second = self.submit(2, 10, 20, 30)
+        before = RatingSnapshot.objects.current(before=(second.date, second.pk))
+        after_first = {
+            player_id: (rating, matches_rated)
+            for player_id, rating, matches_rated in RatingSnapshot.objects.filter(
+                match=first
+            ).values_list("player_id", "rating", "matches_rated")
+        }
+        self.assertEqual(before, after_first)
+
+
+class HeadToHeadTest(TestCase):
+    def test_compute_matches_pairwise_loop(self):
+        # Matches of two, three and one player, keyed by match id.
+        matches = {1: {10: 5, 20: 3}, 2: {10: 1, 20: 4, 30: 4}, 3: {30: 7}, 4: {20: 2, 30: 6}}
+        rows = [(m, p, s) for m, scores in matches.items() for p, s in scores.items()]
+        match_ids, player_ids, scores = (np.array(column) for column in zip(*rows))
+        records = compute(match_ids, player_ids, scores)
+
+        self.assertEqual(records.player_ids.tolist(), [10, 20, 30])
+        self.assertEqual(records.shared.tolist(), [[0, 2, 1], [2, 0, 2], [1, 2, 0]])
+        self.assertEqual(records.wins.tolist(), [[0, 1, 0], [1, 0, 0], [1, 1, 0]])
+        self.assertEqual(records.margin.tolist(), [[0, -1, -3], [1, 0, -4], [3, 4, 0]])
+        self.assertEqual(records.average_margin[1, 2], -2.0)
+        self.assertTrue(np.isnan(records.win_rate[0, 0]))
+
+
+@skipIf(connection.vendor != "sqlite", "The SQLite profile only applies to SQLite.")
+class SqliteProductionProfileTest(TestCase):
+    def pragmas(self, names):
+        """Opens a new connection to a database file and reads its pragmas."""
+        with tempfile.TemporaryDirectory() as directory:
+            new_connection = connection.copy("sqlite_profile")
+            new_connection.settings_dict["NAME"] = f"{directory}/profile.sqlite3"
+            try:
+                with new_connection.cursor() as cursor:
+                    return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
+            finally:
+                new_connection.close()
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        names = ["journal_mode", "synchronous", "busy_timeout", "cache_size"]
+        self.assertNotEqual(self.pragmas(names)["journal_mode"], "wal")
+        with override_settings(SQLITE_PRODUCTION=True):
+            # synchronous = NORMAL
+            self.assertEqual(
+                self.pragmas(names),
+                {
+                    "journal_mode": "wal",
+                    "synchronous": 1,
+                    "busy_timeout": 5000,
+                    "cache_size": -20000,
+                },
+            )
+
+
+@skipIf(
+    connection.vendor != "postgresql" or find_spec("psycopg_pool") is None,
+    "Connection pools need PostgreSQL and psycopg_pool.",
+)
+class DatabasePoolTest(TestCase):
+    def pooled_connection(self, alias, **pool):
+        """
+        Copies the test connection into one that borrows from a pool of its own.
+
+        Django keeps one pool per alias, so every copy needs its own alias.
+        """
+        new_connection = connection.copy(alias)
+        new_connection.settings_dict.update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True)
+        new_connection.settings_dict["OPTIONS"] = {
+            **new_connection.settings_dict["OPTIONS"],
+            "pool": pool,
+        }
+        self.addCleanup(new_connection.close_pool)
+        return new_connection
+
+    def test_connections_are_returned_to_the_pool(self):
+        pooled = self.pooled_connection("pool_returned", min_size=1, max_size=2, timeout=1)
+        for _ in range(3):
+            with pooled.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pooled.close()
+
+        stats = pooled.pool.get_stats()
+        self.assertEqual(stats["requests_num"], 3)
+        self.assertEqual(stats["pool_available"], stats["pool_size"])
+        self.assertEqual(utilization(stats), 0)
+
+    def test_exhausted_pool_times_out_and_reports_the_wait(self):
+        pooled = self.pooled_connection("pool_exhausted", min_size=1, max_size=1, timeout=0.2)
+        # Another thread holds the only connection of the pool.
+        pooled.pool.open()
+        held = pooled.pool.getconn()
+        self.assertEqual(utilization(pooled.pool.get_stats()), 1)
+
+        with self.assertRaises(OperationalError):
+            pooled.ensure_connection()
+        stats = pooled.pool.get_stats()
+        self.assertEqual(stats["requests_errors"], 1)
+        self.assertGreaterEqual(stats["requests_wait_ms"], 200)
+        self.assertIn(
+            'vr_db_pool_request_errors_total{database="pool_exhausted"} 1',
+            pool_metrics({"pool_exhausted": stats}),
+        )
+
+        pooled.pool.putconn(held)
+        pooled.ensure_connection()
+        pooled.close()
+
+    def test_broken_connections_are_replaced_before_they_are_lent(self):
+        pooled = self.pooled_connection("pool_checked", min_size=1, max_size=1, timeout=1)
+        pooled.ensure_connection()
+        backend_pid = pooled.connection.info.backend_pid
+        pooled.close()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [backend_pid])
+
+        with pooled.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            self.assertNotEqual(cursor.fetchone()[0], backend_pid)
+        pooled.close()
+        self.assertEqual(pooled.pool.get_stats()["connections_lost"], 1)
@@ -0,0 +1,304 @@
+import re
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Match, Player, Tournament
+from ..permissions import POWERUSER_GROUP
+
+# Leagues of both sizes, built by generate_fake_league. Every registered
+# player is scored in every match.
+SIZES = [
+    {"players": 4, "tournaments": 5, "matches": 20},
+    {"players": 20, "tournaments": 50, "matches": 200},
+]
+
+
+class QueryScalingTests(TestCase):
+    """
+    Pins every view to a query count that does not grow with the number of
+    tournaments, players or matches, so N+1 patterns fail here.
+    """
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(
+            "superuser", "superuser@test.com", "password"
+        )
+        self.client.force_login(self.superuser)
+
+    def query_counts(self, request, warm=False, batched=()):
+        """
+        Builds a league of each size, rolled back afterwards, and counts the
+        queries of ``request(league)`` on it.
+
+        :param warm: Count a second request, after the first filled the caches.
+        :param batched: Prefixes of statements that write rows in batches, whose
+                        number grows with the rows written. Each is counted once.
+        :return: The query count at each size.
+        """
+        counts = []
+        for size in SIZES:
+            with transaction.atomic():
+                call_command(
+                    "generate_fake_league",
+                    roster_size=size["players"],
+                    players_per_match=size["players"],
+                    stdout=StringIO(),
+                    **size,
+                )
+                cache.clear()
+                league = self.league()
+                if warm:
+                    request(league)
+                with CaptureQueriesContext(connection) as queries:
+                    response = request(league)
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 400)
+                statements = [query["sql"] for query in queries.captured_queries]
+                counts.append(
+                    sum(not sql.startswith(batched) for sql in statements)
+                    + sum(any(sql.startswith(prefix) for sql in statements) for prefix in batched)
+                )
+                transaction.set_rollback(True)
+        return counts
+
+    def league(self):
+        """The newest tournament, which is still active, its latest match, a
+        registered player and the newest finished tournament."""
+        tournament = Tournament.objects.filter(winner="").order_by("-date", "-pk").first()
+        return {
+            "tournament": tournament,
+            "match": tournament.matches.order_by("-pk").first(),
+            "player": tournament.players.order_by("pk").first(),
+            "finished": Tournament.objects.exclude(winner="").order_by("-date", "-pk").first(),
+        }
+
+    def assertConstantQueries(self, request, warm=True, batched=()):
+        small, large = self.query_counts(request, batched=batched)
+        self.assertEqual(small, large, "Cold query count grows with the data.")
+        if warm:
+            small, large = self.query_counts(request, warm=True)
+            self.assertEqual(small, large, "Warm query count grows with the data.")
+
+    def get(self, name, *args, **params):
+        return lambda league: self.client.get(
+            reverse(name, args=[arg(league) for arg in args]),
+            {key: value(league) for key, value in params.items()},
+        )
+
+    def test_index(self):
+        self.assertConstantQueries(self.get("index"))
+
+    def test_previous_tournaments(self):
+        self.assertConstantQueries(
+            self.get(
+                "previous_tournaments",
+                date=lambda league: league["tournament"].date.isoformat(),
+                pk=lambda league: league["tournament"].pk,
+            )
+        )
+
+    def test_tournaments(self):
+        self.assertConstantQueries(self.get("tournaments"))
+
+    def test_tournament_detail(self):
+        self.assertConstantQueries(
+            self.get("tournament_detail", lambda league: league["tournament"].pk)
+        )
+
+    def test_tournament_registration(self):
+        self.assertConstantQueries(
+            self.get("tournament_registration", lambda league: league["tournament"].pk)
+        )
+
+    def test_players(self):
+        self.assertConstantQueries(self.get("players"))
+
+    def test_player_search(self):
+        self.assertConstantQueries(self.get("player_search", q=lambda league: "player"))
+        self.assertConstantQueries(
+            self.get(
+                "player_search",
+                q=lambda league: "1",
+                exclude_tournament=lambda league: league["tournament"].pk,
+            )
+        )
+
+    def test_player_detail(self):
+        self.assertConstantQueries(self.get("player_detail", lambda league: league["player"].pk))
+
+    def test_leaderboard(self):
+        self.assertConstantQueries(self.get("leaderboard"))
+
+    def test_head_to_head(self):
+        self.assertConstantQueries(self.get("head_to_head"))
+
+    def test_create_match_form(self):
+        self.assertConstantQueries(
+            self.get("create_match", lambda league: league["tournament"].pk)
+        )
+
+    def test_create_score_form(self):
+        self.assertConstantQueries(self.get("create_score", lambda league: league["match"].pk))
+
+    def test_create_score(self):
+        def submit(league):
+            # A fresh match, scored low enough not to decide the tournament.
+            match = Match.objects.create(tournament=league["tournament"])
+            players = league["tournament"].players.values_list("pk", flat=True)
+            return self.client.post(
+                reverse("create_score", args=[match.pk]),
+                {f"score_{pk}": 1 for pk in players},
+            )
+
+        self.assertConstantQueries(submit, warm=False)
+
+    def test_delete_match(self):
+        self.assertConstantQueries(
+            lambda league: self.client.post(reverse("delete_match", args=[league["match"].pk])),
+            warm=False,
+        )
+
+    def test_delete_tournament(self):
+        self.assertConstantQueries(
+            lambda league: self.client.post(
+                reverse("delete_tournament", args=[league["finished"].pk])
+            ),
+            warm=False,
+        )
+
+    def test_delete_player(self):
+        # The ratings of every later match are replayed without the player,
+        # in batches of inserts.
+        self.assertConstantQueries(
+            lambda league: self.client.post(reverse("delete_player", args=[league["player"].pk])),
+            warm=False,
+            batched=('INSERT INTO "vr_tournaments_ratingsnapshot"',),
+        )
+
+    def test_export_results(self):
+        self.assertConstantQueries(self.get("export_results"))
+
+    def test_api(self):
+        self.assertConstantQueries(self.get("api_tournament_list"))
+        self.assertConstantQueries(
+            self.get("api_tournament_standings", lambda league: league["tournament"].pk)
+        )
+        self.assertConstantQueries(
+            self.get("api_tournament_matches", lambda league: league["tournament"].pk)
+        )
+        self.assertConstantQueries(self.get("api_head_to_head"))
+
+
+# Queries of room each write budget leaves above its measured count.
+BUDGET_MARGIN = 2
+
+
+@override_settings(GROUP_NAMES_IN_SESSION=True, QUERY_BUDGETS={})
+class WriteBudgetTests(TestCase):
+    """
+    Measures the heaviest path of each write view on the first request of a
+    session, which also stores the group names of a power user in it, and
+    checks that its budget in ``QUERY_BUDGETS`` leaves at most
+    ``BUDGET_MARGIN`` queries of room above the count.
+    """
+
+    budgets = settings.QUERY_BUDGETS
+
+    def setUp(self):
+        cache.clear()
+        self.superuser = User.objects.create_superuser(
+            "superuser", "superuser@test.com", "password"
+        )
+        self.poweruser = User.objects.create_user("poweruser", "poweruser@test.com", "password")
+        Group.objects.create(name=POWERUSER_GROUP).user_set.add(self.poweruser)
+        self.players = [Player.objects.create(name=f"Player {i}") for i in range(4)]
+        self.tournament = Tournament.objects.create(name="League", date="2024-01-01")
+        self.tournament.update_registrations(add=[player.pk for player in self.players[:3]])
+
+    def queries(self, user, method, name, *args, data=None):
+        """Counts the queries of a request as the budget check does, in a new session."""
+        self.client.logout()
+        self.client.force_login(user)
+        response = getattr(self.client, method)(reverse(name, args=args), data)
+        self.assertLess(response.status_code, 400)
+        return int(re.search(r'desc="(\d+) queries', response["Server-Timing"])[1])
+
+    def score(self, user, score):
+        match = Match.objects.create(tournament=self.tournament, date="2024-01-02")
+        return match, self.queries(
+            user,
+            "post",
+            "create_score",
+            match.pk,
+            data={f"score_{player.pk}": score for player in self.players[:3]},
+        )
+
+    def assertWithinBudget(self, name, counts):
+        measured = max(counts)
+        budget = self.budgets[name]
+        self.assertLessEqual(measured, budget, f"{name} runs {measured} queries.")
+        self.assertLessEqual(
+            budget - measured, BUDGET_MARGIN, f"{name} runs {measured} queries, budget {budget}."
+        )
+
+    def test_create_tournament(self):
+        self.assertWithinBudget(
+            "create_tournament",
+            [
+                self.queries(
+                    self.poweruser,
+                    "post",
+                    "create_tournament",
+                    data={
+                        "name": "Cup",
+                        "date": "2024-02-01",
+                        "points_to_win": 0,
+                        "players": [player.pk for player in self.players],
+                    },
+                )
+            ],
+        )
+
+    def test_create_score(self):
+        # A score below points_to_win, then one deciding the tournament.
+        counts = [self.score(self.poweruser, 1)[1], self.score(self.poweruser, 30)[1]]
+        self.assertTrue(Tournament.objects.get(pk=self.tournament.pk).winner)
+        self.assertWithinBudget("create_score", counts)
+
+    def test_delete_match(self):
+        self.score(self.superuser, 1)
+        match, _ = self.score(self.superuser, 1)
+        self.assertWithinBudget(
+            "delete_match",
+            [self.queries(self.poweruser, "post", "delete_match", match.pk)],
+        )
+
+    def test_tournament_registration(self):
+        # Lowering points_to_win resolves the winner again.
+        self.score(self.superuser, 15)
+        self.assertWithinBudget(
+            "tournament_registration",
+            [
+                self.queries(
+                    self.superuser,
+                    "post",
+                    "tournament_registration",
+                    self.tournament.pk,
+                    data={"add": [self.players[3].pk], "remove": [self.players[0].pk]},
+                ),
+                self.queries(
+                    self.superuser,
+                    "post",
+                    "tournament_registration",
+                    self.tournament.pk,
+                    data={"remove": [self.players[1].pk]},
+                ),
+            ],
+        )
@@ -1,11 +1,19 @@
-from django.test import TestCase, Client
+import json
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
-from django.contrib.auth.models import User
-from ..models import Tournament, Player, Match, Score
+from django.contrib.auth.models import Group, User
+from ..instrumentation import QueryBudgetExceeded, RequestLogFormatter, fingerprint
+from ..permissions import group_names_cache
+from ..pool import pool_metrics
+from ..models import Tournament, Player, Match, Score, PlayerTournamentTotal, RatingSnapshot
 
 
 class ViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             "user", "user@test.com", "password"
@@ -22,6 +30,311 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "index.html")
 
+    def test_index_view_query_count_is_fixed(self):
+        self.client.login(username="superuser", password="password")
+
+        def add_tournaments(count, winner=""):
+            for i in range(count):
+                tournament = Tournament.objects.create(winner=winner, points_to_win=1000)
+                player = Player.objects.create(name=f"{winner or 'Active'} {tournament.pk}")
+                tournament.players.add(player, self.player)
+                match = Match.objects.create(tournament=tournament)
+                Score.objects.create(player=player, match=match, score=i)
+
+        add_tournaments(1)
+        add_tournaments(1, winner="Done")
+        with self.assertNumQueries(6):
+            self.client.get(reverse("index"))
+
+        add_tournaments(5)
+        add_tournaments(5, winner="Done")
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("index"))
+        self.assertEqual(len(response.context["previous_tournaments"]), 6)
+
+    def test_create_score_and_delete_match_update_totals(self):
+        self.client.login(username="superuser", password="password")
+        self.tournament.players.add(self.player)
+        match = Match.objects.create(tournament=self.tournament)
+
+        self.client.post(
+            reverse("create_score", args=[match.pk]), {f"score_{self.player.pk}": 4}
+        )
+        self.client.post(
+            reverse("create_score", args=[match.pk]), {f"score_{self.player.pk}": 6}
+        )
+        total = PlayerTournamentTotal.objects.get(player=self.player)
+        self.assertEqual((total.total, total.matches_played), (6, 1))
+
+        self.client.post(reverse("delete_match", args=[match.pk]))
+        total.refresh_from_db()
+        self.assertEqual((total.total, total.matches_played), (0, 0))
+        self.assertIsNone(total.last_match_date)
+
+    def test_index_view_does_not_declare_winners(self):
+        self.client.login(username="user", password="password")
+        self.tournament.players.add(self.player)
+
+        self.client.get(reverse("index"))
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.winner, "")
+
+    def test_previous_tournaments_are_keyset_paginated(self):
+        self.client.login(username="user", password="password")
+        finished = [
+            Tournament.objects.create(name=f"Finished {i}", date="2024-01-01", winner="Rocky")
+            for i in range(12)
+        ]
+
+        response = self.client.get(reverse("index"))
+        first_page = [item["tournament"] for item in response.context["previous_tournaments"]]
+        self.assertEqual(first_page, finished[::-1][:10])
+        next_page_url = response.context["next_page_url"]
+        self.assertContains(response, "previous-tournaments-sentinel")
+
+        response = self.client.get(next_page_url)
+        self.assertTemplateUsed(response, "previous_tournaments.html")
+        second_page = [item["tournament"] for item in response.context["previous_tournaments"]]
+        self.assertEqual(second_page, finished[::-1][10:])
+        self.assertIsNone(response.context["next_page_url"])
+
+    def test_previous_tournaments_rejects_invalid_cursor(self):
+        self.client.login(username="user", password="password")
+        response = self.client.get(reverse("previous_tournaments"), {"date": "soon", "pk": 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_cards_are_invalidated_by_score_writes(self):
+        self.client.login(username="superuser", password="password")
+        self.tournament.points_to_win = 100
+        self.tournament.save()
+        self.tournament.players.add(self.player)
+        match = Match.objects.create(tournament=self.tournament)
+
+        self.client.get(reverse("index"))
+        self.client.get(reverse("tournaments"))
+        self.client.post(
+            reverse("create_score", args=[match.pk]), {f"score_{self.player.pk}": 42}
+        )
+
+        response = self.client.get(reverse("index"))
+        self.assertEqual(
+            response.context["active_tournaments"][0]["player_scores"][0].total, 42
+        )
+        self.assertContains(response, '<span class="live-total">42</span>')
+        response = self.client.get(reverse("tournaments"))
+        self.assertContains(response, "42</th>")
+
+    def test_player_detail_query_count_is_fixed(self):
+        self.client.login(username="user", password="password")
+        self.tournament.players.add(self.player)
+        for points in (3, 9, 4):
+            match = Match.objects.create(tournament=self.tournament)
+            Score.objects.create(player=self.player, match=match, score=points)
+        PlayerTournamentTotal.objects.rebuild()
+
+        # Session, user and the player with their statistics.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("player_detail", args=[self.player.pk]))
+        self.assertEqual(response.context["stats"].best_score, 9)
+        self.assertContains(response, "5.3")
+
+    def test_player_detail_without_stats(self):
+        self.client.login(username="user", password="password")
+        player = Player.objects.create(name="Newcomer")
+        response = self.client.get(reverse("player_detail", args=[player.pk]))
+        self.assertContains(response, "No matches played yet.")
+
+    def test_leaderboard_lists_rated_players(self):
+        self.client.login(username="user", password="password")
+        rival = Player.objects.create(name="Rival")
+        self.tournament.players.add(self.player, rival)
+        for points in (3, 9):
+            match = Match.objects.create(tournament=self.tournament)
+            Score.objects.create(player=self.player, match=match, score=points)
+            Score.objects.create(player=rival, match=match, score=5)
+        RatingSnapshot.objects.replay()
+
+        # Session, user and the rated players.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("leaderboard"))
+        players = list(response.context["players"])
+        self.assertEqual([player.matches_rated for player in players], [2, 2])
+        self.assertGreaterEqual(players[0].rating, players[1].rating)
+        self.assertContains(response, reverse("player_detail", args=[rival.pk]))
+
+    def test_head_to_head_heatmap(self):
+        self.client.login(username="user", password="password")
+        rival = Player.objects.create(name="Rival")
+        self.tournament.players.add(self.player, rival)
+        for points in (3, 9, 7):
+            match = Match.objects.create(tournament=self.tournament)
+            Score.objects.create(player=self.player, match=match, score=points)
+            Score.objects.create(player=rival, match=match, score=5)
+        Tournament.objects.filter(pk=self.tournament.pk).bump_version()
+
+        response = self.client.get(reverse("head_to_head"))
+        rows = {row["player"]["name"]: row["cells"] for row in response.context["rows"]}
+        # Players are ordered by name, so the rival comes first.
+        self.assertEqual(rows[self.player.name][1], None)
+        self.assertEqual(rows[self.player.name][0]["win_rate"], 67)
+        self.assertEqual(rows[rival.name][1]["win_rate"], 33)
+        self.assertContains(response, "+1.3")
+
+    def test_responses_report_server_timing(self):
+        self.client.login(username="user", password="password")
+        response = self.client.get(reverse("leaderboard"))
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="3 queries, 0 duplicates", total;dur=[\d.]+$',
+        )
+        # Async views are measured too.
+        response = self.client.get(reverse("index"))
+        self.assertRegex(response["Server-Timing"], r'desc="\d+ queries')
+        self.assertNotIn('desc="0 queries', response["Server-Timing"])
+
+    @override_settings(QUERY_BUDGETS={"leaderboard": 1, "index": 1})
+    def test_views_over_budget_fail_in_tests(self):
+        self.client.login(username="user", password="password")
+        with self.assertRaisesMessage(QueryBudgetExceeded, "leaderboard ran 3 queries, over its budget of 1"):
+            self.client.get(reverse("leaderboard"))
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("index"))
+
+    @override_settings(QUERY_BUDGETS={"leaderboard": 1}, QUERY_BUDGET_STRICT=False)
+    def test_views_over_budget_log_a_warning(self):
+        self.client.login(username="user", password="password")
+        with self.assertLogs("vr_tournaments.instrumentation", "WARNING") as logs:
+            response = self.client.get(reverse("leaderboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("over its budget of 1", logs.output[0])
+
+    def test_requests_are_logged_as_json(self):
+        self.client.login(username="user", password="password")
+        with self.assertLogs("vr_tournaments.requests", "INFO") as logs:
+            self.client.get(reverse("leaderboard"))
+        record = logs.records[0]
+        self.assertEqual(record.request_stats["view"], "leaderboard")
+
+        line = json.loads(RequestLogFormatter().format(record))
+        self.assertEqual(line["level"], "INFO")
+        self.assertEqual(line["view"], "leaderboard")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["queries"], record.request_stats["queries"])
+        self.assertIn("sql_ms", line)
+
+    def test_fingerprints_collapse_parameter_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO "t" VALUES (%s, %s), (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" VALUES (%s, ...), ...',
+        )
+
+    def group_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, sum('"auth_group"' in query["sql"] for query in queries)
+
+    def test_group_membership_is_loaded_once_per_request(self):
+        Group.objects.create(name="powerUser").user_set.add(self.user)
+        self.client.login(username="user", password="password")
+
+        # The decorator and the template both check the group.
+        response, queries = self.group_queries(
+            reverse("tournament_detail", args=[self.tournament.pk])
+        )
+        self.assertContains(response, reverse("create_match", args=[self.tournament.pk]))
+        self.assertEqual(queries, 1)
+
+    @override_settings(GROUP_NAMES_IN_SESSION=True)
+    def test_group_membership_is_kept_in_the_session(self):
+        group = Group.objects.create(name="powerUser")
+        group.user_set.add(self.user)
+        self.client.login(username="user", password="password")
+        path = reverse("tournament_detail", args=[self.tournament.pk])
+
+        self.assertEqual(self.group_queries(path)[1], 1)
+        response, queries = self.group_queries(path)
+        self.assertEqual((response.status_code, queries), (200, 0))
+
+        # Changing memberships makes the session reload them.
+        group.user_set.remove(self.user)
+        response, queries = self.group_queries(path)
+        self.assertEqual((response.status_code, queries), (302, 1))
+
+    def test_group_names_in_session_require_a_shared_cache(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        shared = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache"}}
+        with override_settings(GROUP_NAMES_IN_SESSION=True, CACHES=locmem):
+            self.assertEqual(
+                [error.id for error in group_names_cache(None)], ["vr_tournaments.E001"]
+            )
+        with override_settings(GROUP_NAMES_IN_SESSION=True, CACHES=shared):
+            self.assertEqual(group_names_cache(None), [])
+        with override_settings(GROUP_NAMES_IN_SESSION=False, CACHES=locmem):
+            self.assertEqual(group_names_cache(None), [])
+
+    def test_create_score_query_count_is_fixed(self):
+        self.client.login(username="superuser", password="password")
+
+        def submit_scores(player_count):
+            tournament = Tournament.objects.create(points_to_win=1000)
+            players = [
+                Player.objects.create(name=f"Scorer {tournament.pk}-{i}")
+                for i in range(player_count)
+            ]
+            tournament.players.add(*players)
+            match = Match.objects.create(tournament=tournament)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse("create_score", args=[match.pk]),
+                    {f"score_{player.pk}": 1 for player in players},
+                )
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(Score.objects.filter(match=match).count(), player_count)
+            return len(queries)
+
+        self.assertEqual(submit_scores(2), submit_scores(12))
+
+    def test_export_results_streams_csv(self):
+        self.client.login(username="user", password="password")
+        match = Match.objects.create(tournament=self.tournament, date="2024-01-02")
+        Score.objects.create(match=match, player=self.player, score=9)
+
+        response = self.client.get(
+            reverse("export_results"),
+            {"tournament": self.tournament.pk, "date_from": "2024-01-01"},
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            ["tournament,date,match,player,score", f"Test Tournament,2024-01-02,{match.pk},Test Player,9"],
+        )
+
+    async def test_export_results_streams_asynchronously_under_asgi(self):
+        match = await Match.objects.acreate(tournament=self.tournament, date="2024-01-02")
+        await Score.objects.acreate(match=match, player=self.player, score=9)
+        await self.async_client.alogin(username="user", password="password")
+
+        response = await self.async_client.get(reverse("export_results"), {"format": "ndjson"})
+
+        # The ASGI handler sends an async iterator as it is read, instead of
+        # reading it into a list first.
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["score"], 9)
+
+    def test_export_results_rejects_invalid_filters(self):
+        self.client.login(username="user", password="password")
+        response = self.client.get(reverse("export_results"), {"date_to": "tomorrow"})
+        self.assertEqual(response.status_code, 400)
+
     def test_players_view_as_superuser(self):
         self.client.login(username="superuser", password="password")
         response = self.client.get(reverse("players"))
@@ -39,6 +352,84 @@ class ViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "tournaments.html")
 
+    def test_tournaments_view_builds_score_matrix(self):
+        self.client.login(username="user", password="password")
+        bubba = Player.objects.create(name="Bubba")
+        self.tournament.players.add(self.player, bubba)
+        first = Match.objects.create(tournament=self.tournament, date="2024-01-01")
+        second = Match.objects.create(tournament=self.tournament, date="2024-01-02")
+        Score.objects.create(match=first, player=self.player, score=3)
+        Score.objects.create(match=first, player=bubba, score=0)
+        Score.objects.create(match=second, player=bubba, score=5)
+
+        response = self.client.get(reverse("tournaments"))
+
+        tournament = response.context["tournaments"][0]
+        self.assertEqual(
+            [(row["date"].isoformat(), row["scores"]) for row in tournament.score_rows],
+            [("2024-01-02", [None, 5]), ("2024-01-01", [3, 0])],
+        )
+
+    def test_tournaments_view_caches_the_cards_it_renders(self):
+        self.client.login(username="user", password="password")
+        self.tournament.players.add(self.player)
+        match = Match.objects.create(tournament=self.tournament, date="2024-01-01")
+        Score.objects.create(match=match, player=self.player, score=7)
+        self.tournament.refresh_from_db()
+        key = f"tournament_card:{self.tournament.pk}:{self.tournament.version}:0"
+
+        self.client.get(reverse("tournaments"))
+        self.assertIn("01/01/2024", cache.get(key))
+
+        # A cached card is shown as it was cached, without reading the scores.
+        cache.set(key, "<p>Cached card</p>")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("tournaments"))
+        self.assertContains(response, "<p>Cached card</p>", html=True)
+        score_table = Score._meta.db_table
+        self.assertFalse(any(f'FROM "{score_table}"' in q["sql"] for q in queries))
+
+    def test_tournaments_view_paginates_and_summarizes(self):
+        self.client.login(username="user", password="password")
+        self.tournament.delete()
+        for i in range(12):
+            tournament = Tournament.objects.create(name=f"Finished {i}", winner="Test Player")
+            tournament.players.add(self.player)
+            Match.objects.create(tournament=tournament)
+
+        response = self.client.get(reverse("tournaments"), {"page": 2, "summary": "1"})
+
+        self.assertEqual(len(response.context["tournaments"]), 2)
+        self.assertTrue(all(t.summary for t in response.context["tournaments"]))
+        self.assertNotContains(response, "No matches added yet.")
+
+    def test_tournaments_view_query_count_is_fixed(self):
+        self.client.login(username="superuser", password="password")
+
+        def add_tournaments(count, player_count):
+            for _ in range(count):
+                tournament = Tournament.objects.create()
+                players = [
+                    Player.objects.create(name=f"Grid {tournament.pk}-{i}")
+                    for i in range(player_count)
+                ]
+                tournament.players.add(*players)
+                for _ in range(3):
+                    match = Match.objects.create(tournament=tournament)
+                    for player in players:
+                        Score.objects.create(match=match, player=player, score=1)
+
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse("tournaments"))
+            return len(queries)
+
+        add_tournaments(1, 2)
+        small = count_queries()
+        add_tournaments(15, 6)
+        self.assertEqual(count_queries(), small)
+
     def test_tournament_detail_view_as_superuser(self):
         self.client.login(username="superuser", password="password")
         response = self.client.get(
@@ -82,13 +473,64 @@ class ViewTests(TestCase):
                 "name": "New Tournament",
                 "date": "2026-05-21",
                 "points_to_win": 0,
-                "players": [player1.pk, player2.pk, player3.pk],
+                "players": [player1.pk, player2.pk, player3.pk, 9999, "x"],
             },
         )
         self.assertEqual(response.status_code, 302)
         tournament = Tournament.objects.get(name="New Tournament")
         # 3 players -> (3 - 1) * 10 = 20 points
         self.assertEqual(tournament.points_to_win, 20)
+        # Saved once by the form and once with the registrations.
+        self.assertEqual(tournament.version, 2)
+        self.assertEqual(
+            set(PlayerTournamentTotal.objects.filter(tournament=tournament).values_list(
+                "player_id", flat=True
+            )),
+            {player1.pk, player2.pk, player3.pk},
+        )
+
+    def test_player_search(self):
+        self.client.login(username="superuser", password="password")
+        for i in range(25):
+            Player.objects.create(name=f"Searchable {i:02}")
+        Player.objects.create(name="Not Searchable")
+        self.tournament.players.add(Player.objects.get(name="Searchable 00"))
+
+        response = self.client.get(reverse("player_search"), {"q": "search"})
+        names = [player["name"] for player in response.json()["results"]]
+        self.assertEqual(names, [f"Searchable {i:02}" for i in range(20)])
+        self.assertTrue(response.json()["has_next"])
+
+        response = self.client.get(
+            reverse("player_search"),
+            {"q": "search", "page": 2, "exclude_tournament": self.tournament.pk},
+        )
+        names = [player["name"] for player in response.json()["results"]]
+        self.assertEqual(names, [f"Searchable {i:02}" for i in range(21, 25)] + ["Not Searchable"])
+        self.assertFalse(response.json()["has_next"])
+
+        response = self.client.get(reverse("player_search"), {"page": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_player_search_requires_poweruser(self):
+        self.client.login(username="user", password="password")
+        response = self.client.get(reverse("player_search"), {"q": "Test"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_tournament_forms_render_one_page_of_players(self):
+        self.client.login(username="superuser", password="password")
+        Player.objects.bulk_create([Player(name=f"Roster {i:03}") for i in range(100)])
+
+        response = self.client.get(reverse("create_tournament"))
+        self.assertEqual(len(response.context["search_players"]), 20)
+        self.assertTrue(response.context["search_has_next"])
+
+        self.tournament.players.add(self.player)
+        response = self.client.get(
+            reverse("tournament_registration", args=[self.tournament.pk]), {"q": "test"}
+        )
+        self.assertEqual(response.context["search_players"], [])
+        self.assertContains(response, f'name="remove" value="{self.player.pk}"')
 
     def test_tournament_registration_updates_points_to_win(self):
         self.client.login(username="superuser", password="password")
@@ -122,3 +564,94 @@ class ViewTests(TestCase):
         tournament.refresh_from_db()
         # 1 player -> max(0, (1 - 1) * 10) = 0 points
         self.assertEqual(tournament.points_to_win, 0)
+
+    def test_tournament_registration_applies_a_diff_in_bulk(self):
+        self.client.login(username="superuser", password="password")
+        tournament = Tournament.objects.create(name="Bulk Register")
+        url = reverse("tournament_registration", args=[tournament.pk])
+
+        def register(players):
+            """Registers the players with one POST, and returns its query count."""
+            tournament.players.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(f"{url}?format=json", {"add": [p.pk for p in players]})
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        players = [Player.objects.create(name=f"Bulk {i}") for i in range(16)]
+        self.assertEqual(register(players[:2]), register(players))
+
+        response = self.client.post(
+            f"{url}?format=json",
+            {"add": [self.player.pk], "remove": [p.pk for p in players[1:]]},
+        )
+        self.assertEqual(
+            response.json(),
+            {
+                "tournament": tournament.pk,
+                "points_to_win": 10,
+                "version": Tournament.objects.get(pk=tournament.pk).version,
+                "registered": [self.player.pk, players[0].pk],
+            },
+        )
+        self.assertEqual(
+            set(
+                PlayerTournamentTotal.objects.filter(tournament=tournament).values_list(
+                    "player_id", flat=True
+                )
+            ),
+            {self.player.pk, players[0].pk},
+        )
+
+    def test_tournament_registration_rejects_unknown_players(self):
+        self.client.login(username="superuser", password="password")
+        url = reverse("tournament_registration", args=[self.tournament.pk])
+
+        response = self.client.post(f"{url}?format=json", {"add": [self.player.pk, 9999]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Unknown players: 9999."})
+        self.assertFalse(self.tournament.players.exists())
+        self.assertEqual(self.client.post(url, {"add": "x"}).status_code, 400)
+
+        response = self.client.get(f"{url}?format=json")
+        self.assertEqual(response.json()["registered"], [])
+
+    def test_database_pool_metrics_require_the_token(self):
+        url = reverse("database_pool_metrics")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        with override_settings(POOL_METRICS_TOKEN="secret"):
+            response = self.client.get(url, headers={"Authorization": "Bearer wrong"})
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+            response = self.client.get(url, headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        if connection.vendor != "postgresql":
+            self.assertIn('vr_db_pool_enabled{database="default"} 0', response.content.decode())
+
+    def test_pool_metrics_format(self):
+        stats = {
+            "pool_min": 2,
+            "pool_max": 10,
+            "pool_size": 4,
+            "pool_available": 1,
+            "requests_waiting": 2,
+            "requests_num": 120,
+            "requests_queued": 7,
+            "requests_wait_ms": 1500,
+            "usage_ms": 98000,
+        }
+        lines = pool_metrics({"default": stats, "replica": None}).splitlines()
+
+        self.assertIn('vr_db_pool_enabled{database="default"} 1', lines)
+        self.assertIn('vr_db_pool_enabled{database="replica"} 0', lines)
+        # 3 of the 10 connections are lent out.
+        self.assertIn('vr_db_pool_utilization{database="default"} 0.3', lines)
+        self.assertIn('vr_db_pool_requests_waiting{database="default"} 2', lines)
+        self.assertIn('vr_db_pool_wait_seconds_total{database="default"} 1.5', lines)
+        # Counters missing from the stats have not been incremented yet.
+        self.assertIn('vr_db_pool_request_errors_total{database="default"} 0', lines)
+        self.assertIn("# TYPE vr_db_pool_requests_total counter", lines)
+        self.assertFalse(any('database="replica"' in line for line in lines[4:]))
@@ -1,11 +1,21 @@
 from django.urls import path
-from . import views
+from . import api, pool, views
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path(
+        "previous_tournaments/",
+        views.previous_tournaments,
+        name="previous_tournaments",
+    ),
     path("players/", views.players, name="players"),
+    path("players/search/", views.player_search, name="player_search"),
+    path("player/<int:pk>/", views.player_detail, name="player_detail"),
+    path("leaderboard/", views.leaderboard, name="leaderboard"),
+    path("head-to-head/", views.head_to_head, name="head_to_head"),
     path("tournaments/", views.tournaments, name="tournaments"),
     path("tournament/<pk>/", views.tournament_detail, name="tournament_detail"),
+    path("tournament/<int:pk>/live/", views.tournament_live, name="tournament_live"),
     path(
         "tournament/registration/<pk>/",
         views.tournament_registration,
@@ -17,7 +27,25 @@ urlpatterns = [
     path("delete_tournament/<pk>/", views.delete_tournament, name="delete_tournament"),
     path("delete_player/<pk>/", views.delete_player, name="delete_player"),
     path("delete_match/<pk>/", views.delete_match, name="delete_match"),
+    path("export/", views.export_results, name="export_results"),
     path("profile/", views.profile, name="profile"),
     path("profile/edit/", views.profile_edit, name="profile_edit"),
+    path("api/v1/tournaments/", api.tournament_list, name="api_tournament_list"),
+    path(
+        "api/v1/tournaments/<int:pk>/standings/",
+        api.tournament_standings,
+        name="api_tournament_standings",
+    ),
+    path(
+        "api/v1/tournaments/<int:pk>/matches/",
+        api.tournament_matches,
+        name="api_tournament_matches",
+    ),
+    path("api/v1/head-to-head/", api.head_to_head, name="api_head_to_head"),
+    path(
+        "metrics/database-pool/",
+        pool.database_pool_metrics,
+        name="database_pool_metrics",
+    ),
     path(".well-known/assetlinks.json", views.assetlinks, name="assetlinks"),
 ]
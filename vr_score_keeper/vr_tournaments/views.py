@@ -1,12 +1,43 @@
+import asyncio
+import datetime
 import logging
 from itertools import groupby
-from django.db.models import Sum
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.shortcuts import render, redirect
-from django.http import HttpResponseNotAllowed, JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.safestring import mark_safe
 from django.contrib import messages
-from .models import Tournament, Player, Match, Score
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Q
+from .exports import EXPORT_FORMATS, aexport_lines, aexport_rows, export_lines, export_rows
+from .head_to_head import get_head_to_head
+from .live import event_stream
+from .permissions import is_poweruser, is_superuser
+from .models import (
+    Tournament,
+    Player,
+    Match,
+    Score,
+    PlayerStats,
+    PlayerTournamentTotal,
+    RatingSnapshot,
+)
 from .forms import (
+    ExportForm,
     TournamentForm,
     PlayerForm,
     MatchForm,
@@ -16,30 +47,62 @@ from .forms import (
 
 logger = logging.getLogger(__name__)
 
+# Number of previous tournaments rendered per page on the index.
+PREVIOUS_TOURNAMENTS_PAGE_SIZE = 10
+
+# Number of tournaments shown per page on the tournaments list.
+TOURNAMENTS_PAGE_SIZE = 10
+
+# Number of players returned per page by the player search.
+PLAYER_SEARCH_PAGE_SIZE = 20
+
 
 # Helper Functions
-def is_superuser(user):
-    """Checks if the given user has superuser privileges."""
-    return user.is_superuser
+def served_by_asgi(request):
+    """
+    Whether the request is served through the ASGI application.
 
+    Only the ASGI handler sends an async streaming response as it is produced.
+    The WSGI handler reads it whole first, so a live stream would never start
+    and would hold a worker thread until the client's connection closes.
+    """
+    return isinstance(request, ASGIRequest)
 
-def is_poweruser(user):
-    """Checks if the given user has poweruser privileges."""
-    return user.groups.filter(name="powerUser").exists() or user.is_superuser
 
+async def arender(request, template_name, context):
+    """
+    Renders a template from an async view.
 
-def calculate_player_scores(tournament):
-    """Calculates the total score for each player in the given tournament."""
-    player_scores = []
-    for player in tournament.players.all():
-        total_score = (
-            player.scores.filter(match__tournament=tournament).aggregate(
-                total=Sum("score")
-            )["total"]
-            or 0
-        )
-        player_scores.append((player, total_score))
-    return player_scores
+    Templates run synchronously, so rendering happens in a worker thread. The
+    user is fetched asynchronously first, so rendering does not fetch it again.
+    """
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def tournament_standings(tournaments):
+    """
+    Pairs each of the given tournaments with its player standings.
+
+    Standings are cached under each tournament's version, so only tournaments
+    that changed since they were last shown are computed, with a single query.
+    """
+    tournaments = list(tournaments)
+    keys = {t.pk: f"standings:{t.pk}:{t.version}" for t in tournaments}
+    cached = await cache.aget_many(keys.values())
+    standings = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in standings]
+    if missing:
+        computed = await Tournament.objects.filter(pk__in=missing).astandings()
+        computed = {pk: computed.get(pk, []) for pk in missing}
+        await cache.aset_many({keys[pk]: computed[pk] for pk in missing}, timeout=None)
+        standings.update(computed)
+
+    return [
+        {"tournament": tournament, "player_scores": standings[tournament.pk]}
+        for tournament in tournaments
+    ]
 
 
 @login_required
@@ -70,67 +133,104 @@ def profile_edit(request):
     )  # Use app-specific template path
 
 
+async def previous_tournaments_page(before=None):
+    """
+    Returns a page of finished tournaments with their standings, newest first.
+
+    Pages are keyset-paginated on (date, pk), so fetching any page costs the same
+    no matter how many tournaments precede it.
+
+    :param before: The (date, pk) of the last tournament on the previous page, or
+                   None for the first page.
+    :return: A tuple of the tournament data for the page and the URL of the next
+             page, or None if this is the last page.
+    """
+    tournaments = Tournament.objects.exclude(winner="").order_by("-date", "-pk")
+    if before is not None:
+        date, pk = before
+        tournaments = tournaments.filter(Q(date__lt=date) | Q(date=date, pk__lt=pk))
+    page = [t async for t in tournaments[: PREVIOUS_TOURNAMENTS_PAGE_SIZE + 1]]
+
+    next_page_url = None
+    if len(page) > PREVIOUS_TOURNAMENTS_PAGE_SIZE:
+        page = page[:PREVIOUS_TOURNAMENTS_PAGE_SIZE]
+        last = page[-1]
+        next_page_url = "{}?{}".format(
+            reverse("previous_tournaments"),
+            urlencode({"date": last.date.isoformat(), "pk": last.pk}),
+        )
+    return await tournament_standings(page), next_page_url
+
+
 # INDEX #
+async def active_tournaments_standings():
+    active_tournaments = Tournament.objects.filter(winner="").order_by("-date")
+    return await tournament_standings([t async for t in active_tournaments])
+
+
 @login_required
-def index(request):
-    # Get all current and previous tournaments
+async def index(request):
     """
     Displays the index page with the latest tournaments and all previous tournaments.
 
-    The latest tournament's player scores are calculated, and the winner is determined
-    if the score threshold is met. For each previous tournament, player scores are also
-    calculated.
+    The standings of the active tournaments, the first page of previous
+    tournaments and the user's permissions are fetched concurrently. The player
+    scores are calculated with one query per group of tournaments. Winners are
+    declared when scores are submitted, so this view never writes to the database.
 
     :param request: The HTTP request object.
     :return: An HTTP response object rendering the index.html template with context
              containing the latest tournament, the latest tournament player scores,
              and previous tournaments with their respective player scores.
     """
-
-    # Get all active tournaments
-    active_tournaments = Tournament.objects.filter(winner="").order_by("-date")
-    previous_tournaments = Tournament.objects.exclude(winner="").order_by("-date")
-
-    # Calculate scores for active tournaments
-    active_tournament_data = []
-    for tournament in active_tournaments:
-        player_scores = calculate_player_scores(tournament)
-
-        # Determine winner logic (if needed)
-        winner = None
-        max_score = 0
-        for player, score in player_scores:
-            if score >= tournament.points_to_win and (winner is None or score > max_score):
-                winner = player
-                max_score = score
-        if winner:
-            tournament.winner = winner.name
-            tournament.save()
-
-        active_tournament_data.append(
-            {
-                "tournament": tournament,
-                "player_scores": player_scores,
-            }
-        )
-
-    # Calculate scores for previous tournaments
-    previous_tournament_data = []
-    for tournament in previous_tournaments:
-        player_scores = calculate_player_scores(tournament)
-        previous_tournament_data.append(
-            {
-                "tournament": tournament,
-                "player_scores": player_scores,
-            }
+    user = await request.auser()
+
+    # Only the first page of previous tournaments is rendered inline; the rest
+    # are loaded on scroll from the previous_tournaments view.
+    active_tournament_data, (previous_tournament_data, next_page_url), can_manage = (
+        await asyncio.gather(
+            active_tournaments_standings(),
+            previous_tournaments_page(),
+            sync_to_async(is_poweruser)(user),
         )
+    )
 
-    return render(
+    return await arender(
         request,
         "index.html",
         {
             "active_tournaments": active_tournament_data,
             "previous_tournaments": previous_tournament_data,
+            "next_page_url": next_page_url,
+            "is_poweruser": can_manage,
+            "live_updates": served_by_asgi(request),
+        },
+    )
+
+
+@login_required
+async def previous_tournaments(request):
+    """
+    Returns the next page of previous tournament cards as an HTML fragment.
+
+    The page starts after the tournament identified by the ``date`` and ``pk``
+    query parameters, which the index page takes from the previous page.
+    """
+    try:
+        before = (
+            datetime.date.fromisoformat(request.GET["date"]),
+            int(request.GET["pk"]),
+        )
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("A valid date and pk are required.")
+
+    previous_tournament_data, next_page_url = await previous_tournaments_page(before)
+    return await arender(
+        request,
+        "previous_tournaments.html",
+        {
+            "previous_tournaments": previous_tournament_data,
+            "next_page_url": next_page_url,
         },
     )
 
@@ -168,63 +268,349 @@ def players(request):
     return render(request, "players.html", {"players": current_players, "form": form})
 
 
+def search_players(request, exclude_tournament=None, exclude_players=()):
+    """
+    Runs the player search of the ``q`` and ``page`` query parameters.
+
+    :param exclude_tournament: Leaves out the players registered in this tournament.
+    :param exclude_players: Leaves out these players, e.g. already selected ones.
+    :raises ValueError: If the page or the tournament is not an integer.
+    :return: The players of the page, and whether more pages follow.
+    """
+    page = max(1, int(request.GET.get("page", 1)))
+    players = Player.objects.exclude(pk__in=exclude_players)
+    if exclude_tournament:
+        players = players.exclude(tournaments=int(exclude_tournament))
+    return players.search(
+        request.GET.get("q", ""),
+        offset=(page - 1) * PLAYER_SEARCH_PAGE_SIZE,
+        limit=PLAYER_SEARCH_PAGE_SIZE,
+    )
+
+
+def player_search_context(request, input_name, selected_players=(), exclude_tournament=None):
+    """
+    Builds the context of the ``player_search.html`` autocomplete, with the
+    first page of results rendered on the server.
+
+    :param input_name: The name of the checkboxes of the players.
+    :param selected_players: The players shown as already checked.
+    :param exclude_tournament: The pk of a tournament whose players are left out.
+    """
+    search_url = reverse("player_search")
+    if exclude_tournament:
+        search_url = f"{search_url}?{urlencode({'exclude_tournament': exclude_tournament})}"
+    try:
+        players, has_next = search_players(
+            request,
+            exclude_tournament=exclude_tournament,
+            exclude_players=[player.pk for player in selected_players],
+        )
+    except ValueError:
+        players, has_next = [], False
+    return {
+        "search_url": search_url,
+        "input_name": input_name,
+        "query": request.GET.get("q", ""),
+        "selected_players": selected_players,
+        "search_players": players,
+        "search_has_next": has_next,
+    }
+
+
+@login_required
+@user_passes_test(is_poweruser)
+def player_search(request):
+    """
+    Finds players by name for the autocompletes of the tournament forms.
+
+    Names starting with ``q`` come first, then names containing it, each page
+    holding ``PLAYER_SEARCH_PAGE_SIZE`` players, so the response does not grow
+    with the roster.
+
+    :param request: The HTTP request object, with the ``q`` and ``page`` query
+                    parameters, and optionally ``exclude_tournament``.
+    :return: A JSON response with the ``results`` and whether more follow.
+    """
+    try:
+        players, has_next = search_players(
+            request, exclude_tournament=request.GET.get("exclude_tournament")
+        )
+    except ValueError:
+        return HttpResponseBadRequest("The page and tournament must be integers.")
+    return JsonResponse(
+        {
+            "results": [{"id": player.pk, "name": player.name} for player in players],
+            "has_next": has_next,
+        }
+    )
+
+
+@login_required
+def player_detail(request, pk):
+    """
+    Displays the career statistics of a player.
+
+    The statistics are materialized in ``PlayerStats``, so the page is read with
+    a single query no matter how many matches the player has played.
+
+    :param request: The HTTP request object.
+    :param pk: The primary key of the player to be displayed.
+    :return: An HTTP response object rendering the player detail page.
+    """
+    player = get_object_or_404(
+        Player.objects.select_related("stats__best_match__tournament"), pk=pk
+    )
+    # Players without a registration have no statistics yet.
+    stats = getattr(player, "stats", None) or PlayerStats(player=player)
+    return render(request, "player_detail.html", {"player": player, "stats": stats})
+
+
+@login_required
+def leaderboard(request):
+    """
+    Displays every rated player, highest rating first.
+
+    Ratings are read from each player's latest ``RatingSnapshot``, which is
+    kept up to date as matches are scored, so nothing is recomputed here.
+
+    :param request: The HTTP request object.
+    :return: An HTTP response object rendering the leaderboard page.
+    """
+    players = RatingSnapshot.objects.rated_players().order_by("-rating", "name")
+    return render(request, "leaderboard.html", {"players": players})
+
+
+@login_required
+def head_to_head(request):
+    """
+    Displays a heatmap of how often each player outscored each other player in
+    the matches they shared, with the average score margin.
+
+    :param request: The HTTP request object.
+    :return: An HTTP response object rendering the head-to-head page.
+    """
+    records = get_head_to_head()
+    player_ids = records.player_ids.tolist()
+    names = dict(Player.objects.filter(pk__in=player_ids).values_list("pk", "name"))
+    # The matrices are indexed by player pk; players are shown by name.
+    order = sorted(range(len(player_ids)), key=lambda i: names[player_ids[i]].lower())
+    win_rate = records.win_rate
+    average_margin = records.average_margin
+
+    players = [{"pk": player_ids[i], "name": names[player_ids[i]]} for i in order]
+    rows = []
+    for player, i in zip(players, order):
+        cells = []
+        for j in order:
+            if i == j or not records.shared[i, j]:
+                cells.append(None)
+                continue
+            cells.append(
+                {
+                    "shared": int(records.shared[i, j]),
+                    "wins": int(records.wins[i, j]),
+                    "win_rate": round(win_rate[i, j] * 100),
+                    "margin": float(average_margin[i, j]),
+                    # Red for losing records through green for winning ones.
+                    "hue": round(win_rate[i, j] * 120),
+                }
+            )
+        rows.append({"player": player, "cells": cells})
+    return render(request, "head_to_head.html", {"players": players, "rows": rows})
+
+
 # TOURNAMENTS #
+async def score_matrices(tournaments):
+    """
+    Builds the player x match score matrix of each of the given tournaments.
+
+    The columns follow each tournament's ``standings``, which must already be set.
+    All matches and scores are read with two queries and placed in one pass.
+
+    :return: A dict mapping tournament pk to a list of rows, newest match first.
+             Each row has the match ``date`` and a list of ``scores`` with one
+             entry per column, None where the player has no score.
+    """
+    if not tournaments:
+        return {}
+    columns = {
+        t.pk: {standing.player.pk: i for i, standing in enumerate(t.standings)}
+        for t in tournaments
+    }
+
+    matrices = {t.pk: [] for t in tournaments}
+    rows_by_match = {}
+    matches = Match.objects.filter(tournament__in=tournaments).order_by("-date", "-pk")
+    async for match_id, tournament_id, date in matches.values_list(
+        "pk", "tournament_id", "date"
+    ):
+        row = {"date": date, "scores": [None] * len(columns[tournament_id])}
+        rows_by_match[match_id] = (columns[tournament_id], row)
+        matrices[tournament_id].append(row)
+
+    scores = Score.objects.filter(match__tournament__in=tournaments)
+    async for match_id, player_id, score in scores.values_list(
+        "match_id", "player_id", "score"
+    ):
+        match_columns, row = rows_by_match[match_id]
+        column = match_columns.get(player_id)
+        if column is not None:
+            row["scores"][column] = score
+    return matrices
+
+
+def render_tournament_cards(tournaments, card_keys):
+    """Renders the card of each tournament, keyed by its cache key."""
+    return {
+        card_keys[t.pk]: render_to_string("tournament_card.html", {"tournament": t})
+        for t in tournaments
+    }
+
+
 @login_required
-def tournaments(request):
+async def tournaments(request):
     """
-    Displays a list of all tournaments in descending order of date, and allows the user to create a new tournament.
+    Displays a page of tournaments in descending order of date, with the score
+    table of each tournament.
+
+    With ``?summary=1``, finished tournaments only show their totals. Score
+    tables are built only for cards that are not cached, so rendering grows
+    with what changed since the page was last shown.
 
     :param request: The HTTP request object.
     :return: An HTTP response object rendering the tournaments.html template.
     """
-    all_tournaments = Tournament.objects.prefetch_related("players", "matches__scores__player").order_by("-date")
-    form = TournamentForm()
-    return render(
-        request, "tournaments.html", {"tournaments": all_tournaments, "form": form}
+    summary = request.GET.get("summary") == "1"
+    all_tournaments = Tournament.objects.order_by("-date", "-pk")
+    paginator = Paginator(all_tournaments, TOURNAMENTS_PAGE_SIZE)
+    # The count is cached on the paginator, so get_page() does not query.
+    paginator.count = await all_tournaments.acount()
+    page = paginator.get_page(request.GET.get("page"))
+    page_tournaments = page.object_list = [t async for t in page.object_list]
+
+    for item in await tournament_standings(page_tournaments):
+        tournament = item["tournament"]
+        tournament.standings = item["player_scores"]
+        tournament.summary = summary and bool(tournament.winner)
+        tournament.winner_column = next(
+            (
+                i
+                for i, standing in enumerate(tournament.standings)
+                if standing.player.name == tournament.winner
+            ),
+            None,
+        )
+
+    # Cards are cached whole under the tournament's version, and the ones
+    # missing from the cache are rendered and cached here, so score tables are
+    # built exactly for the cards that are rendered.
+    card_keys = {
+        t.pk: f"tournament_card:{t.pk}:{t.version}:{int(t.summary)}" for t in page_tournaments
+    }
+    cards = await cache.aget_many(card_keys.values())
+    missing = [t for t in page_tournaments if card_keys[t.pk] not in cards]
+    matrices = await score_matrices([t for t in missing if not t.summary])
+    for tournament in page_tournaments:
+        tournament.score_rows = matrices.get(tournament.pk, [])
+    if missing:
+        rendered = await sync_to_async(render_tournament_cards)(missing, card_keys)
+        await cache.aset_many(rendered, timeout=None)
+        cards.update(rendered)
+    for tournament in page_tournaments:
+        tournament.card = mark_safe(cards[card_keys[tournament.pk]])
+
+    return await arender(
+        request,
+        "tournaments.html",
+        {"tournaments": page_tournaments, "page": page, "summary": summary},
     )
 
 
 # TOURNAMENT REGISTRATION #
+def registration_diff(data):
+    """
+    Reads the players to register and unregister from a registration POST.
+
+    The ``add`` and ``remove`` fields may each be repeated. A single
+    ``player_id`` with an ``action`` of "add" or "remove" is also accepted.
+
+    :raises ValueError: If a player ID is not an integer.
+    :return: The sets of player pks to add and to remove.
+    """
+    add = {int(pk) for pk in data.getlist("add")}
+    remove = {int(pk) for pk in data.getlist("remove")}
+    action = data.get("action")
+    if action in ("add", "remove") and data.get("player_id"):
+        (add if action == "add" else remove).add(int(data["player_id"]))
+    return add, remove - add
+
+
 @login_required
 @user_passes_test(is_superuser)
 def tournament_registration(request, pk):
     """
     Allows a superuser to register players for a tournament. The user is presented
     with a list of all players and a list of players who are currently registered
-    for the tournament. The user can add or remove players from the tournament.
-    """
+    for the tournament, and can add or remove any number of players at once.
 
-    tournament = Tournament.objects.get(pk=pk)
-    all_players = Player.objects.all()
-    registered_players = []
-    if hasattr(tournament, "players"):
-        registered_players = tournament.players.all()
+    Each POST applies its whole diff in one transaction. With ``?format=json``,
+    the response is the tournament's registration state instead of a page.
+
+    :param request: The HTTP request object.
+    :param pk: The primary key of the tournament.
+    :return: The registration page, a redirect back to it, or JSON.
+    """
+    tournament = get_object_or_404(Tournament, pk=pk)
+    as_json = request.GET.get("format") == "json"
 
     if request.method == "POST":
-        player_id = request.POST.get("player_id")
-        action = request.POST.get("action")
-        player = Player.objects.get(pk=player_id)
-
-        if action == "add":
-            player.tournaments.add(tournament)
-            count = tournament.players.count()
-            tournament.points_to_win = max(0, (count - 1) * 10)
-            tournament.save()
-        elif action == "remove":
-            player.tournaments.remove(tournament)
-            count = tournament.players.count()
-            tournament.points_to_win = max(0, (count - 1) * 10)
-            tournament.save()
-
-        return redirect("tournament_registration", pk=pk)
+        try:
+            add, remove = registration_diff(request.POST)
+        except ValueError:
+            error = "Player IDs must be integers."
+        else:
+            requested = add | remove
+            unknown = requested - set(
+                Player.objects.filter(pk__in=requested).values_list("pk", flat=True)
+            )
+            error = None
+            if unknown:
+                error = f"Unknown players: {', '.join(map(str, sorted(unknown)))}."
+        if error:
+            if as_json:
+                return JsonResponse({"error": error}, status=400)
+            return HttpResponseBadRequest(error)
+
+        registered = tournament.update_registrations(add=add, remove=remove)
+        logger.info(
+            f"User '{request.user.username}' registered {len(add)} and unregistered "
+            f"{len(remove)} players in tournament '{tournament.name}'."
+        )
+        if not as_json:
+            return redirect("tournament_registration", pk=pk)
+    elif as_json:
+        registered = list(tournament.players.order_by("pk").values_list("pk", flat=True))
 
+    if as_json:
+        return JsonResponse(
+            {
+                "tournament": tournament.pk,
+                "points_to_win": tournament.points_to_win,
+                "version": tournament.version,
+                "registered": registered,
+            }
+        )
+
+    # Only the first page of unregistered players is rendered, the others
+    # are found with the player search.
     return render(
         request,
         "tournament_registration.html",
         {
             "tournament": tournament,
-            "all_players": all_players,
-            "registered_players": registered_players,
+            "registered_players": tournament.players.order_by("name"),
+            **player_search_context(request, "add", exclude_tournament=tournament.pk),
         },
     )
 
@@ -232,7 +618,7 @@ def tournament_registration(request, pk):
 # TOURNAMENT DETAIL #
 @login_required
 @user_passes_test(is_poweruser)
-def tournament_detail(request, pk):
+async def tournament_detail(request, pk):
     """
     Displays the details of a tournament, including the registered players and matches.
 
@@ -243,11 +629,16 @@ def tournament_detail(request, pk):
     :param pk: The primary key of the tournament to be displayed.
     :return: An HTTP response object rendering the tournament detail page.
     """
-    tournament = Tournament.objects.get(pk=pk)
-    registered_players = tournament.players.all()
+    tournament = await Tournament.objects.aget(pk=pk)
 
-    # Get all matches, prefetching scores to prevent N+1 queries.
+    # Get all matches, prefetching scores to prevent N+1 queries, while the
+    # standings are read.
     matches = tournament.matches.prefetch_related("scores").order_by("-date", "-pk")
+    standings, matches = await asyncio.gather(
+        tournament_standings([tournament]), sync_to_async(list)(matches)
+    )
+    standings = standings[0]["player_scores"]
+    registered_players = [standing.player for standing in standings]
 
     # Augment match objects with a list of scores ordered by registered_players.
     # This fixes the rendering bug in the template and makes it more efficient.
@@ -263,12 +654,13 @@ def tournament_detail(request, pk):
         for date, match_group in groupby(matches_for_template, key=lambda m: m.date):
             grouped_matches.append((date, list(match_group)))
 
-    return render(
+    return await arender(
         request,
         "tournament_detail.html",
         {
             "tournament": tournament,
             "registered_players": registered_players,
+            "standings": standings,
             "grouped_matches": grouped_matches,
         },
     )
@@ -279,29 +671,37 @@ def tournament_detail(request, pk):
 def create_tournament(request):
     """
     Creates a new tournament, adds selected players, and redirects to the tournament detail page.
-    """
-    all_players = Player.objects.all().order_by("name")
 
+    The players are registered with ``update_registrations``, in the same
+    transaction as the tournament, which also sets ``points_to_win``.
+    """
     if request.method == "POST":
         form = TournamentForm(request.POST)
+        requested = [int(pk) for pk in request.POST.getlist("players") if pk.isdigit()]
         if form.is_valid():
-            tournament = form.save()
-            
-            player_ids = request.POST.getlist("players")
-            if player_ids:
-                players = Player.objects.filter(id__in=player_ids)
-                tournament.players.add(*players)
-                count = players.count()
-                tournament.points_to_win = max(0, (count - 1) * 10)
-                tournament.save()
-                
+            with transaction.atomic():
+                tournament = form.save()
+                player_ids = set(
+                    Player.objects.filter(pk__in=requested).values_list("pk", flat=True)
+                )
+                if player_ids:
+                    tournament.update_registrations(add=player_ids)
+
             logger.info(
                 f"User '{request.user.username}' created tournament '{tournament.name}' with {len(player_ids)} players."
             )
             return redirect("tournament_detail", pk=tournament.pk)
+        selected_players = Player.objects.filter(pk__in=requested).order_by("name")
     else:
         form = TournamentForm()
-    return render(request, "create_tournament.html", {"form": form, "all_players": all_players})
+        selected_players = []
+    # Players are picked with the player search, so the page does not list the
+    # whole roster.
+    return render(
+        request,
+        "create_tournament.html",
+        {"form": form, **player_search_context(request, "players", list(selected_players))},
+    )
 
 
 @login_required
@@ -320,7 +720,9 @@ def create_match(request, tournament_pk):
         if form.is_valid():
             match = form.save(commit=False)
             match.tournament = tournament
-            match.save()
+            with transaction.atomic():
+                match.save()
+                Tournament.objects.filter(pk=tournament.pk).bump_version()
             logger.info(
                 f"User '{request.user.username}' created match {match.id} for tournament '{tournament.name}'."
             )
@@ -342,12 +744,14 @@ def create_score(request, match_pk):
     :param match_pk: The primary key of the match to be scored.
     :return: An HTTP response object redirecting to the tournament detail page.
     """
-    match = Match.objects.get(pk=match_pk)
+    match = Match.objects.select_related("tournament").get(pk=match_pk)
     registered_players = match.tournament.players.all()
     if request.method == "POST":
         form = MultiScoreForm(registered_players, match, request.POST)
         if form.is_valid():
             scores = form.save()
+            # The scores hold the registered player instances, so the log line
+            # is built without further queries.
             score_details = ", ".join(
                 [f"{score.player.name}: {score.score}" for score in scores]
             )
@@ -375,7 +779,13 @@ def delete_tournament(request, pk):
         logger.info(
             f"User '{request.user.username}' deleted tournament '{tournament.name}'."
         )
-        tournament.delete()
+        with transaction.atomic():
+            player_ids = list(tournament.players.values_list("pk", flat=True))
+            position = RatingSnapshot.objects.earliest(tournament.matches.all())
+            tournament.delete()
+            PlayerStats.objects.refresh(player_ids)
+            if position:
+                RatingSnapshot.objects.replay(since=position)
         return redirect("tournaments")
 
     return HttpResponseNotAllowed(["POST"])
@@ -394,7 +804,15 @@ def delete_player(request, pk):
     if request.method == "POST":
         player = Player.objects.get(pk=pk)
         logger.info(f"User '{request.user.username}' deleted player '{player.name}'.")
-        player.delete()
+        with transaction.atomic():
+            Tournament.objects.filter(players=player).bump_version()
+            position = RatingSnapshot.objects.earliest(
+                Match.objects.filter(scores__player=player)
+            )
+            player.delete()
+            # The ratings of their opponents are recomputed without them.
+            if position:
+                RatingSnapshot.objects.replay(since=position)
         return redirect("players")
 
     return HttpResponseNotAllowed(["POST"])
@@ -408,8 +826,8 @@ def delete_match(request, pk):
     detail page for the tournament that the match was part of.
     """
     if request.method == "POST":
-        match = Match.objects.get(pk=pk)
-        scores = Score.objects.filter(match=match)
+        match = Match.objects.select_related("tournament").get(pk=pk)
+        scores = list(Score.objects.filter(match=match).select_related("player"))
         score_details = ", ".join(
             [f"{score.player.name}: {score.score}" for score in scores]
         )
@@ -417,12 +835,81 @@ def delete_match(request, pk):
             f"User '{request.user.username}' deleted match {match.id} from tournament '{match.tournament.name}'. Scores: {score_details}."
         )
         tournament = match.tournament
-        match.delete()
+        position = (match.date, match.pk)
+        with transaction.atomic():
+            match.delete()
+            PlayerTournamentTotal.objects.revert_scores(
+                match, {score.player_id: score.score for score in scores}
+            )
+            RatingSnapshot.objects.replay(since=position)
+            Tournament.objects.filter(pk=tournament.pk).bump_version()
         return redirect("tournament_detail", pk=tournament.pk)
 
     return HttpResponseNotAllowed(["POST"])
 
 
+@login_required
+def export_results(request):
+    """
+    Streams the recorded scores as CSV or NDJSON, one row per score.
+
+    The query string may select the ``format`` and filter by ``tournament`` and
+    ``player`` pk and by a ``date_from``/``date_to`` range of match dates. Rows
+    are streamed as they are read, so memory use does not grow with the export.
+    Under ASGI, they are read with an async iterator, since the ASGI handler
+    reads a synchronous one whole before sending it.
+    """
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    export_format = form.cleaned_data["format"]
+    filters = {
+        "tournament_id": form.cleaned_data["tournament"],
+        "player_id": form.cleaned_data["player"],
+        "date_from": form.cleaned_data["date_from"],
+        "date_to": form.cleaned_data["date_to"],
+    }
+    if served_by_asgi(request):
+        lines = aexport_lines(export_format, aexport_rows(**filters))
+    else:
+        lines = export_lines(export_format, export_rows(**filters))
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    response["Content-Disposition"] = f'attachment; filename="results.{export_format}"'
+    logger.info(f"User '{request.user.username}' exported results as {export_format}.")
+    return response
+
+
+@login_required
+async def tournament_live(request, pk):
+    """
+    Streams the standings of a tournament to scoreboard screens as Server-Sent
+    Events: a snapshot on connect, then the players whose totals changed after
+    each write.
+
+    The stream stays open for as long as the screen is connected, so it must be
+    served through the ASGI application. Under WSGI, the view answers with 501
+    Not Implemented instead.
+
+    :param request: The HTTP request object.
+    :param pk: The primary key of the tournament to follow.
+    :return: A streaming ``text/event-stream`` response.
+    """
+    if not served_by_asgi(request):
+        return HttpResponse(
+            "Live standings are only streamed through the ASGI application.",
+            status=501,
+            content_type="text/plain",
+        )
+    if not await Tournament.objects.filter(pk=pk).aexists():
+        raise Http404("Tournament not found.")
+    response = StreamingHttpResponse(event_stream(pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stops nginx from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 def assetlinks(request):
     """
     Returns an empty JSON array to satisfy the Digital Asset Links protocol